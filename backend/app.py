@@ -44,6 +44,22 @@ app.include_router(int_routes.router)
 app.include_router(analyze.router)
 app.include_router(chat.router)
 
+# --- Shutdown: save the blacklist filter, commit queued writes, then close pooled DB connections ---
+@app.on_event("shutdown")
+def flush_database_writes():
+    from utils.write_queue import close_all_queues
+    from utils.db_pool import close_all
+    from utils.blacklist import blacklist_filter
+    blacklist_filter.flush()
+    close_all_queues()
+    close_all()
+
+# --- Shutdown: close pooled LLM connections ---
+@app.on_event("shutdown")
+async def close_llm_clients():
+    from utils.llm_gateway import llm_gateway
+    await llm_gateway.aclose()
+
 # --- Anti-Caching Middleware (Fast Fix for Hard Refresh Issue) ---
 @app.middleware("http")
 async def add_no_cache_headers(request, call_next):
@@ -1,12 +1,12 @@
 import os
-import joblib
-import numpy as np
-import pandas as pd
-import sqlite3
-import requests
+import json
+import shutil
+import asyncio
+import html
+import tempfile
 from datetime import datetime
-from fastapi import APIRouter, Form, UploadFile, File, Body, BackgroundTasks
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi import APIRouter, Form, UploadFile, File, Body, BackgroundTasks, Request
+from fastapi.responses import JSONResponse, FileResponse, Response, StreamingResponse
 from utils.scraper import scrape_job_details
 from utils.email_service import send_welcome_email
 
@@ -21,13 +21,31 @@ DB_PATH = os.path.join(BASE_DIR, "data", "predictions.db")
 # ================= CREATE DATABASE =================
 os.makedirs(os.path.join(BASE_DIR, "data"), exist_ok=True)
 
+# Pooled connections (WAL, cache and mmap pragmas are applied per connection)
+from utils.db_pool import get_db, get_db_stats
+db = get_db(DB_PATH)
+
+# Request-path inserts are queued and group-committed by a single writer thread
+from utils.write_queue import get_write_queue, get_write_queue_stats
+write_queue = get_write_queue(db)
+
+
+def _query_one(sql, params=()):
+    """Single-row read; handlers call it through run_in_pool("db", ...) to keep SQLite off the event loop."""
+    with db.reader() as conn:
+        return conn.execute(sql, params).fetchone()
+
+
+from utils.analytics_rollup import (
+    create_rollup_tables, create_version_tracking, read_prediction_summary,
+    read_analytics_version, clear_rollups, BUMP_ANALYTICS_VERSION_SQL
+)
+
 def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    # Speed up SQLite
-    conn.execute("PRAGMA journal_mode=WAL;")
-    conn.execute("PRAGMA synchronous=NORMAL;")
-    conn.execute("PRAGMA cache_size=10000;")
-    
+    with db.writer() as conn:
+        _create_tables(conn)
+
+def _create_tables(conn):
     conn.execute("""
         CREATE TABLE IF NOT EXISTS predictions (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -73,30 +91,64 @@ def init_db():
             visit_count INTEGER DEFAULT 1
         )
     """)
-    conn.close()
+    # /history filters; rowid is the implicit last key, so "col = ? ORDER BY id DESC" is a range scan
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_predictions_type ON predictions(type)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_predictions_risk_level ON predictions(risk_level)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_predictions_type_risk ON predictions(type, risk_level)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_predictions_company ON predictions(company COLLATE NOCASE)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_predictions_timestamp ON predictions(timestamp)")
+    # Dashboard rollups, kept current by an insert trigger
+    create_rollup_tables(conn)
+    # Change counter for the analytics cache, bumped on every dashboard-relevant insert
+    create_version_tracking(conn)
 
 init_db()
 
 # ================= LOAD MODEL =================
-model = joblib.load(MODEL_PATH)
-vectorizer = joblib.load(VECTORIZER_PATH)
+# Memory-mapped artifacts (models/compiled) when they match the pickles, else the pickles
+from utils.model_artifacts import load_model
+model, vectorizer = load_model(MODEL_PATH, VECTORIZER_PATH)
+
+# Concurrent single-text predictions are scored together in micro-batches
+from utils.inference_batcher import InferenceBatcher
+inference_batcher = InferenceBatcher(model, vectorizer)
+
+# Large batches are sharded across the scoring pool shared with background jobs; its
+# workers start with the first large CSV or job, so idle workers cost nothing
+from utils.parallel_scoring import ParallelScorer
+from utils.scoring_pool import shutdown_scoring_pool
+parallel_scorer = ParallelScorer(model, vectorizer, model_path=MODEL_PATH, vectorizer_path=VECTORIZER_PATH)
 
 # ================= IMPORT UTILITIES =================
-from utils.explain import explain_prediction
-from utils.domain_check import analyze_url_security
-from utils.company_verify import verify_company
-from utils.blacklist import check_blacklist, add_to_blacklist, get_blacklist_stats
+from utils.domain_check import analyze_url_security_async, get_whois_cache_stats
+from utils.company_verify import verify_company_async, invalidate_company_cache, get_company_cache_stats
+from utils.blacklist import (
+    check_blacklist, check_blacklist_bulk, add_to_blacklist, get_blacklist_stats, get_blacklist_counts,
+    read_blacklist_version, find_similar_companies
+)
 from utils.risk_scorer import calculate_comprehensive_risk
+from utils.explain import get_reasoning_cache_stats
+from utils.llm_gateway import llm_gateway, get_llm_stats
+from utils.analysis_context import AnalysisContext
+from utils.executors import run_in_pool, get_executor_stats
+from utils.dns_resolver import get_resolver
+from utils.rule_engine import rule_engine
+from utils.cache import VersionedCache
+from utils.batch_scoring import prediction_rows, RESULT_COLUMNS
 
 # ================= HELPER: SAVE TO DB =================
-def save_to_db(pred_type, title, company, result, confidence, risk_score=None, risk_level=None):
-    conn = sqlite3.connect(DB_PATH)
-    conn.execute("""
+async def save_to_db(pred_type, title, company, result, confidence, risk_score=None, risk_level=None):
+    await write_queue.enqueue("""
         INSERT INTO predictions (type, title, company, result, confidence, risk_score, risk_level, timestamp)
         VALUES (?, ?, ?, ?, ?, ?, ?, ?)
     """, (pred_type, title, company, result, confidence, risk_score, risk_level, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
-    conn.commit()
-    conn.close()
+
+
+async def auto_report_scam(url, company):
+    await write_queue.enqueue("""
+        INSERT INTO reports (url, company, details, reporter, status, timestamp) 
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, (url or "Manual", company, "Auto-detected high confidence scam.", "AI-Sentinel", "auto-verified", datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
 
 
 # ================= PREDICT TEXT (ENHANCED) =================
@@ -108,30 +160,27 @@ async def predict_text(
     url: str = Form(None)
 ):
     try:
-        text = f"{title} {description} {company_profile}"
-        vect_text = vectorizer.transform([text])
-        pred_probs = model.predict_proba(vect_text)[0]
-        pred_label = np.argmax(pred_probs)  # 1 = Real, 0 = Fake
-        confidence = round(float(pred_probs[pred_label]) * 100, 2)
+        # One context per request: vectorize, predict, explain and verify only once
+        ctx = AnalysisContext(
+            title=title, description=description, company=company_profile, url=url,
+            model=model, vectorizer=vectorizer
+        )
+        await ctx.score_with(inference_batcher)
+        await ctx.prepare()
+        pred_label = ctx.pred_label  # 1 = Real, 0 = Fake
+        confidence = ctx.confidence
         
         # === NEW: Comprehensive Risk Analysis ===
-        risk_analysis = calculate_comprehensive_risk(
-            text=description,
-            title=title,
-            company=company_profile,
-            url=url, # Pass the URL if provided
-            model=model,
-            vectorizer=vectorizer
-        )
+        risk_analysis = calculate_comprehensive_risk(text=description, context=ctx)
         
         # Explainability
-        explanation = explain_prediction(text, model, vectorizer)
+        explanation = ctx.explanation
         
         # Company verification
-        company_check = verify_company(company_profile) if company_profile else None
+        company_check = ctx.company_check
         
         # Blacklist check
-        blacklist_check = check_blacklist(company=company_profile, url=url)
+        blacklist_check = ctx.blacklist_check
 
         # Determine final result (override AI if blacklisted)
         if blacklist_check.get("is_blacklisted"):
@@ -144,19 +193,13 @@ async def predict_text(
             result = "✅ Real Job" if pred_label == 1 else "❌ Fake Job"
 
         # ✅ Save to DB with risk data
-        save_to_db("text", title, company_profile, result, confidence, 
-                   risk_analysis.get("overall_score"), risk_analysis.get("risk_level"))
+        await save_to_db("text", title, company_profile, result, confidence, 
+                         risk_analysis.get("overall_score"), risk_analysis.get("risk_level"))
 
         # === NEXT LEVEL: Auto-Report High Threat Scams ===
         if risk_analysis.get("risk_level") == "critical" and confidence > 85:
             try:
-                conn = sqlite3.connect(DB_PATH)
-                conn.execute("""
-                    INSERT INTO reports (url, company, details, reporter, status, timestamp) 
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """, (url or "Manual", company_profile, "Auto-detected high confidence scam.", "AI-Sentinel", "auto-verified", datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
-                conn.commit()
-                conn.close()
+                await auto_report_scam(url, company_profile)
             except: pass
 
         return JSONResponse({
@@ -188,10 +231,10 @@ async def predict_text(
 async def predict_url(url: str = Form(...)):
     try:
         # === NEW: URL Security Analysis ===
-        url_security = analyze_url_security(url)
+        url_security = await analyze_url_security_async(url)
         
         # === NEW: Blacklist Check ===
-        blacklist_check = check_blacklist(url=url)
+        blacklist_check = await run_in_pool("db", check_blacklist, url=url)
         
         # If blacklisted, return immediately
         if blacklist_check.get("is_blacklisted"):
@@ -214,28 +257,24 @@ async def predict_url(url: str = Form(...)):
         company = scraped_data.get("company", "Unknown")
         description = scraped_data.get("description", "")
         
-        # 2. Predict
-        text = f"{title} {description} {company}"
-        vect_text = vectorizer.transform([text])
-        pred_probs = model.predict_proba(vect_text)[0]
-        pred_label = np.argmax(pred_probs)
-        confidence = round(float(pred_probs[pred_label]) * 100, 2)
+        # 2. Predict (URL security is already known, reuse it)
+        ctx = AnalysisContext(
+            title=title, description=description, company=company, url=url,
+            model=model, vectorizer=vectorizer, url_security=url_security
+        )
+        await ctx.score_with(inference_batcher)
+        await ctx.prepare()
+        pred_label = ctx.pred_label
+        confidence = ctx.confidence
         
         # === NEW: Comprehensive Risk Analysis ===
-        risk_analysis = calculate_comprehensive_risk(
-            text=description,
-            title=title,
-            company=company,
-            url=url,
-            model=model,
-            vectorizer=vectorizer
-        )
+        risk_analysis = calculate_comprehensive_risk(text=description, context=ctx)
         
         # Explainability
-        explanation = explain_prediction(text, model, vectorizer)
+        explanation = ctx.explanation
         
         # Company verification
-        company_check = verify_company(company) if company else None
+        company_check = ctx.company_check
         
         # Determine final result
         if risk_analysis.get("risk_level") == "critical":
@@ -245,8 +284,8 @@ async def predict_url(url: str = Form(...)):
             result = "✅ Real Job" if pred_label == 1 else "❌ Fake Job"
         
         # Save to DB
-        save_to_db("url", title, company, result, confidence,
-                   risk_analysis.get("overall_score"), risk_analysis.get("risk_level"))
+        await save_to_db("url", title, company, result, confidence,
+                         risk_analysis.get("overall_score"), risk_analysis.get("risk_level"))
         
         return JSONResponse({
             "prediction": int(pred_label),
@@ -279,88 +318,202 @@ async def predict_url(url: str = Form(...)):
 
 
 # ================= PREDICT CSV =================
+CSV_RESULT_FORMATS = {
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv"
+}
+
+
 @router.post("/predict-csv")
-async def predict_csv(file: UploadFile = File(...)):
+async def predict_csv(file: UploadFile = File(...), format: str = "json"):
+    """
+    Score every row of an uploaded CSV, streaming results back chunk by chunk.
+    format: json ({"results": [...]}, the default), ndjson (one row per line) or csv.
+    Only one chunk is held in memory at a time, whatever the file size.
+    """
     try:
         print(f"Received CSV: {file.filename}")
-        df = pd.read_csv(file.file)
-        print(f"Columns found: {df.columns.tolist()}")
-        df.columns = [col.strip().capitalize() for col in df.columns]
-
-        text_columns = [c for c in df.columns if c not in ["Fraudulent", "Telecommuting"]]
-        df[text_columns] = df[text_columns].fillna("")
-        df["combined_text"] = df[text_columns].apply(lambda x: " ".join(x.astype(str)), axis=1)
-
-        # PERFORMANCE LIMIT: Process only first 100 rows for demo speed
-        if len(df) > 100:
-            print(f"Limiting CSV from {len(df)} to 100 rows for performance.")
-            df = df.head(100)
-
-        vect_text = vectorizer.transform(df["combined_text"])
-        pred_probs = model.predict_proba(vect_text)
-        pred_labels = np.argmax(pred_probs, axis=1)
-        confidences = np.max(pred_probs, axis=1) * 100
-
-        df["Prediction"] = ["✅ Real Job" if p == 1 else "❌ Fake Job" for p in pred_labels]
-        df["Confidence (%)"] = np.round(confidences, 2)
-
-        # Find the correct company column
-        possible_company_cols = ["Company", "Company_profile", "Company_name", "Organization", "Employer"]
-        company_col = "Company" # Default new name
-        
-        found_col = None
-        for col in possible_company_cols:
-            # Case insensitive check against existing columns
-            match = next((c for c in df.columns if c.lower() == col.lower()), None)
-            if match:
-                found_col = match
-                break
-        
-        if found_col:
-            df["Company"] = df[found_col]
-        else:
-            df["Company"] = "Unknown"
+        if format not in CSV_RESULT_FORMATS:
+            return JSONResponse({"error": f"Unsupported format: {format}"}, status_code=400)
+
+        # The upload is closed once this handler returns, so the stream reads from its own copy
+        loop = asyncio.get_running_loop()
+        upload = tempfile.TemporaryFile()
+        try:
+            await loop.run_in_executor(None, shutil.copyfileobj, file.file, upload)
+            upload.seek(0)
+            # Parse and score the first chunk up front so bad uploads still get a 500 with the error
+            chunks = parallel_scorer.score_csv(upload)
+            first = await loop.run_in_executor(None, next, chunks, None)
+        except Exception:
+            upload.close()
+            raise
+
+        return StreamingResponse(
+            _stream_csv_results(first, chunks, format, upload),
+            media_type=CSV_RESULT_FORMATS[format],
+            headers={"Content-Disposition": "attachment; filename=predictions.csv"} if format == "csv" else None
+        )
+
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
 
-        # Find Title column
-        title_col = next((c for c in df.columns if c.lower() == "title" or c.lower() == "job_title"), None)
-        if title_col:
-             df["Title"] = df[title_col]
-        else:
-             df["Title"] = "Unknown Job"
 
-        # Batch Insert to DB
+async def _stream_csv_results(results, chunks, format, upload):
+    try:
+        async for part in _format_csv_results(results, chunks, format):
+            yield part
+    finally:
+        upload.close()
+
+
+async def _format_csv_results(results, chunks, format):
+    loop = asyncio.get_running_loop()
+    rows_done = 0
+    if format == "json":
+        yield '{"results":['
+    elif format == "csv":
+        yield ",".join(RESULT_COLUMNS) + "\n"
+
+    error = None
+    while results is not None:
+        # Batch Insert to DB (one queued executemany per chunk)
         try:
-            conn = sqlite3.connect(DB_PATH)
-            data_to_insert = []
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            
-            for i in range(len(df)):
-                title = str(df.iloc[i]["Title"])
-                company = str(df.iloc[i]["Company"])
-                result = df.iloc[i]["Prediction"]
-                confidence = float(df.iloc[i]["Confidence (%)"])
-                # type, title, company, result, confidence, risk_score, risk_level, timestamp
-                data_to_insert.append(("csv", title, company, result, confidence, 0, "low", timestamp))
-            
-            conn.executemany("""
+            await write_queue.enqueue("""
                 INSERT INTO predictions (type, title, company, result, confidence, risk_score, risk_level, timestamp)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, data_to_insert)
-            conn.commit()
-            conn.close()
+            """, prediction_rows(results, datetime.now().strftime("%Y-%m-%d %H:%M:%S")), many=True)
         except Exception as db_e:
             print(f"DB Batch Error: {db_e}")
 
-        result_json = df[["Title", "Company", "Prediction", "Confidence (%)"]].to_dict(orient="records")
-        return JSONResponse({"results": result_json})
+        # The status line is already sent, so a failing chunk ends the stream with an error record
+        try:
+            if format == "csv":
+                part = results.to_csv(index=False, header=False)
+            else:
+                records = [json.dumps(r, ensure_ascii=False, separators=(",", ":")) for r in results.to_dict(orient="records")]
+                if format == "json":
+                    part = ("," if rows_done else "") + ",".join(records)
+                else:
+                    part = "".join(record + "\n" for record in records)
+            yield part
+            rows_done += len(results)
+
+            # Read and score the next chunk off the event loop
+            results = await loop.run_in_executor(None, next, chunks, None)
+        except Exception as e:
+            error = str(e)
+            break
+
+    if error is not None:
+        print(f"[CSV] Stream failed after {rows_done} rows: {error}")
+        if format == "json":
+            yield "]," + json.dumps({"rows": rows_done, "error": error})[1:]
+        elif format == "ndjson":
+            yield json.dumps({"error": error, "rows": rows_done}) + "\n"
+        else:
+            yield f"# error after {rows_done} rows: {' '.join(error.splitlines())}\n"
+        return
+
+    if format == "json":
+        yield "]}"
+    print(f"[CSV] Scored {rows_done} rows")
+
+
+# ================= BATCH JOBS =================
+# Large CSV / URL-list scans run in the background on a process pool; poll and download by job id
+from utils.jobs import JobManager, RESULT_FORMATS as JOB_RESULT_FORMATS
+JOB_MAX_URLS = int(os.getenv("JOB_MAX_URLS", "100000"))
+
+
+def _save_job_results(kind, results):
+    scored = results[results["Prediction"].notna()]
+    if len(scored):
+        write_queue.submit("""
+            INSERT INTO predictions (type, title, company, result, confidence, risk_score, risk_level, timestamp)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, prediction_rows(scored, datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "csv" if kind == "csv" else "url"), many=True)
+
+
+job_manager = JobManager(MODEL_PATH, VECTORIZER_PATH, on_results=_save_job_results)
+
+
+@router.on_event("startup")
+def resume_jobs():
+    job_manager.resume()
 
+
+@router.on_event("shutdown")
+def stop_jobs():
+    job_manager.shutdown()
+    shutdown_scoring_pool()
+
+
+@router.post("/jobs")
+async def submit_job(file: UploadFile = File(None), urls: str = Form(""), chunk_rows: int = Form(0)):
+    """Submit a CSV upload or a newline-separated URL list; returns a job id to poll."""
+    try:
+        if file is not None:
+            job_id = await run_in_pool("db", job_manager.submit_csv, file.file, chunk_rows or None)
+        else:
+            url_list = [u.strip() for u in urls.splitlines() if u.strip()]
+            if not url_list:
+                return JSONResponse({"error": "Provide a CSV file or at least one URL."}, status_code=400)
+            if len(url_list) > JOB_MAX_URLS:
+                return JSONResponse({"error": f"Too many URLs (max {JOB_MAX_URLS})."}, status_code=413)
+            job_id = await run_in_pool("db", job_manager.submit_urls, url_list, chunk_rows or None)
+        return JSONResponse({"job_id": job_id, "status": "queued"}, status_code=202)
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+
+@router.get("/jobs")
+async def list_jobs(limit: int = 20):
+    try:
+        return JSONResponse({"jobs": await run_in_pool("db", job_manager.list, max(1, min(limit, 200)))})
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+
+@router.get("/jobs/stats")
+async def get_job_stats():
+    return JSONResponse({"stats": await run_in_pool("db", job_manager.get_stats)})
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Status, rows done, total rows (once known) and throughput."""
+    try:
+        job = await run_in_pool("db", job_manager.get, job_id)
+        if job is None:
+            return JSONResponse({"error": "Job not found."}, status_code=404)
+        return JSONResponse(job)
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+
+@router.get("/jobs/{job_id}/results")
+async def get_job_results(job_id: str, format: str = "ndjson"):
+    try:
+        if format not in JOB_RESULT_FORMATS:
+            return JSONResponse({"error": f"Unsupported format: {format}"}, status_code=400)
+        job = await run_in_pool("db", job_manager.get, job_id)
+        if job is None:
+            return JSONResponse({"error": "Job not found."}, status_code=404)
+        if job["status"] != "completed":
+            return JSONResponse({"error": f"Job is {job['status']}.", "job": job}, status_code=409)
+        return StreamingResponse(
+            job_manager.iter_results(job_id, format),
+            media_type=CSV_RESULT_FORMATS[format],
+            headers={"Content-Disposition": f"attachment; filename=job-{job_id}.{format}"}
+        )
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
 
 
 # ================= PDF GENERATION (Professional Audit Edition) =================
 from fpdf import FPDF
-import tempfile
 import os
 
 class ALLPDF(FPDF):
@@ -505,29 +658,127 @@ async def generate_report(data: dict = Body(...)):
 
 
 # ================= FETCH HISTORY =================
+HISTORY_COLUMNS = ["id", "type", "title", "company", "result", "confidence", "risk_score", "risk_level", "timestamp"]
+HISTORY_DEFAULT_LIMIT = 100
+HISTORY_MAX_LIMIT = int(os.getenv("HISTORY_MAX_LIMIT", "500"))
+
+
+def _history_id_range(conn, since: str, until: str):
+    """
+    Translate a timestamp window into an id window using idx_predictions_timestamp.
+    Rows get ids in insert order and are usually stamped in that order too, so the
+    first row at/after `since` and the last row at/before `until` bound the ids in
+    between. Rows stamped out of order (e.g. queued writes, clock steps) break that,
+    so callers use the bounds only to narrow the scan and still filter on timestamp.
+    Returns (min_id, max_id, until), or None if no row falls in the window.
+    """
+    min_id = max_id = None
+    if since:
+        row = conn.execute(
+            "SELECT id FROM predictions WHERE timestamp >= ? ORDER BY timestamp, id LIMIT 1", (since,)
+        ).fetchone()
+        if row is None:
+            return None
+        min_id = row[0]
+    if until:
+        if len(until) == 10:
+            until += " 23:59:59"  # a bare date includes the whole day
+        row = conn.execute(
+            "SELECT id FROM predictions WHERE timestamp <= ? ORDER BY timestamp DESC, id DESC LIMIT 1", (until,)
+        ).fetchone()
+        if row is None:
+            return None
+        max_id = row[0]
+    return min_id, max_id, until
+
+
+def _read_history_page(columns, conditions, params, since, until, limit):
+    with db.reader() as conn:
+        id_range = _history_id_range(conn, since, until) if since or until else (None, None, None)
+        if id_range is None:
+            return []
+        min_id, max_id, until = id_range
+        if min_id is not None:
+            conditions.append("id >= ? AND timestamp >= ?")
+            params.extend([min_id, since])
+        if max_id is not None:
+            conditions.append("id <= ? AND timestamp <= ?")
+            params.extend([max_id, until])
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return conn.execute(
+            f"SELECT {', '.join(columns)} FROM predictions {where} ORDER BY id DESC LIMIT ?",
+            params + [limit]
+        ).fetchall()
+
+
 @router.get("/history")
-async def get_history():
+async def get_history(
+    limit: int = HISTORY_DEFAULT_LIMIT,
+    cursor: int = None,
+    type: str = "",
+    risk_level: str = "",
+    company: str = "",
+    since: str = "",
+    until: str = "",
+    fields: str = ""
+):
+    """
+    Newest-first prediction history with keyset pagination.
+    Pass the returned next_cursor back as `cursor` for the next page; every page is
+    an index range scan starting at that id, so deep pages cost the same as the first.
+    Filters: type, risk_level, company (case-insensitive exact match) and a
+    since/until timestamp window. `fields` is a comma-separated column list.
+    """
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.execute("SELECT * FROM predictions ORDER BY id DESC LIMIT 100")
-        rows = cursor.fetchall()
-        conn.close()
-
-        columns = ["id", "type", "title", "company", "result", "confidence", "risk_score", "risk_level", "timestamp"]
-        history = [dict(zip(columns, row)) for row in rows]
-        return JSONResponse({"history": history})
+        columns = [c.strip() for c in fields.split(",") if c.strip()] if fields else HISTORY_COLUMNS
+        unknown = [c for c in columns if c not in HISTORY_COLUMNS]
+        if unknown:
+            return JSONResponse({"error": f"Unknown fields: {', '.join(unknown)}"}, status_code=400)
+        if "id" not in columns:
+            columns = ["id"] + columns
+        limit = max(1, min(limit, HISTORY_MAX_LIMIT))
+
+        conditions, params = [], []
+        if cursor is not None:
+            conditions.append("id < ?")
+            params.append(cursor)
+        if type:
+            conditions.append("type = ?")
+            params.append(type)
+        if risk_level:
+            conditions.append("risk_level = ?")
+            params.append(risk_level)
+        if company:
+            conditions.append("company = ? COLLATE NOCASE")
+            params.append(company)
+
+        rows = await run_in_pool("db", _read_history_page, columns, conditions, params, since, until, limit + 1)
+
+        has_more = len(rows) > limit
+        history = [dict(zip(columns, row)) for row in rows[:limit]]
+        return JSONResponse({
+            "history": history,
+            "next_cursor": history[-1]["id"] if has_more else None,
+            "limit": limit
+        })
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
 
 
 # ================= CLEAR HISTORY =================
+def _clear_history():
+    # Commit pending queued inserts first so they are cleared too
+    write_queue.flush(timeout=30)
+    with db.writer() as conn:
+        conn.execute("DELETE FROM predictions")
+        clear_rollups(conn)
+        conn.execute(BUMP_ANALYTICS_VERSION_SQL)
+
+
 @router.delete("/clear-history")
 async def clear_history():
     try:
-        conn = sqlite3.connect(DB_PATH)
-        conn.execute("DELETE FROM predictions")
-        conn.commit()
-        conn.close()
+        await run_in_pool("db", _clear_history)
         return JSONResponse({"message": "All prediction history cleared successfully."})
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
@@ -541,19 +792,16 @@ async def save_feedback(
     actual_result: str = Form("")
 ):
     try:
-        conn = sqlite3.connect(DB_PATH)
-        conn.execute("""
+        await write_queue.enqueue("""
             INSERT INTO feedback (title, user_says_correct, actual_result, timestamp) 
             VALUES (?, ?, ?, ?)
         """, (title, correct, actual_result, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
-        conn.commit()
         
         # If user says prediction was WRONG, we should learn from this
         if not correct and actual_result:
             # Log for retraining
             print(f"[FEEDBACK] User correction: '{title}' should be '{actual_result}'")
-            
-        conn.close()
+
         return JSONResponse({"message": "Feedback received. Thank you for helping improve our AI!"})
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
@@ -563,10 +811,7 @@ async def save_feedback(
 @router.get("/feedback/stats")
 async def get_feedback_stats():
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.execute("SELECT COUNT(*), SUM(user_says_correct) FROM feedback")
-        row = cursor.fetchone()
-        conn.close()
+        row = await run_in_pool("db", _query_one, "SELECT COUNT(*), SUM(user_says_correct) FROM feedback")
         
         total = row[0] or 0
         correct = row[1] or 0
@@ -591,16 +836,14 @@ async def report_scam(
 ):
     try:
         # Save to reports table
-        conn = sqlite3.connect(DB_PATH)
-        conn.execute("""
+        await write_queue.enqueue("""
             INSERT INTO reports (url, company, details, reporter, timestamp) 
             VALUES (?, ?, ?, ?, ?)
         """, (url, company, details, reporter, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
-        conn.commit()
-        conn.close()
         
         # === NEW: Add to blacklist ===
-        blacklist_result = add_to_blacklist(
+        blacklist_result = await run_in_pool(
+            "db", add_to_blacklist,
             url=url if url else None,
             company=company if company else None,
             details=details,
@@ -619,12 +862,22 @@ async def report_scam(
 @router.get("/blacklist/stats")
 async def get_blacklist_statistics():
     try:
-        stats = get_blacklist_stats()
+        stats = await run_in_pool("db", get_blacklist_stats)
         return JSONResponse({"stats": stats})
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
 
 
+@router.get("/blacklist/company-matches")
+async def get_similar_blacklisted_companies(company: str, k: int = 5, threshold: float = 0.5):
+    """Closest blacklisted company names (spelling variants, leetspeak) with similarity scores."""
+    try:
+        matches = await run_in_pool("db", find_similar_companies, company, max(1, min(k, 50)), threshold)
+        return JSONResponse({"company": company, "matches": matches})
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+
 # ================= CHECK URL/COMPANY BLACKLIST =================
 @router.post("/check-blacklist")
 async def check_blacklist_status(
@@ -632,17 +885,107 @@ async def check_blacklist_status(
     company: str = Form("")
 ):
     try:
-        result = check_blacklist(url=url if url else None, company=company if company else None)
+        result = await run_in_pool("db", check_blacklist, url=url if url else None, company=company if company else None)
+        return JSONResponse(result)
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+
+# ================= BULK BLACKLIST CHECK =================
+from pydantic import BaseModel
+from typing import List
+
+# Upper bound on URLs + domains + companies in one bulk request
+BLACKLIST_BULK_MAX_ITEMS = int(os.getenv("BLACKLIST_BULK_MAX_ITEMS", "5000"))
+
+class BlacklistBulkRequest(BaseModel):
+    urls: List[str] = []
+    domains: List[str] = []
+    companies: List[str] = []
+
+@router.post("/check-blacklist/bulk")
+async def check_blacklist_bulk_status(request: BlacklistBulkRequest):
+    """Check a whole listing page (or crawl batch) against the blacklist in one request."""
+    total = len(request.urls) + len(request.domains) + len(request.companies)
+    if total > BLACKLIST_BULK_MAX_ITEMS:
+        return JSONResponse({"error": f"Too many items ({total}); the limit is {BLACKLIST_BULK_MAX_ITEMS} per request."}, status_code=413)
+    try:
+        result = await run_in_pool("db", check_blacklist_bulk, request.urls, request.domains, request.companies)
         return JSONResponse(result)
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
 
 
+# ================= INFERENCE BATCHER STATS =================
+@router.get("/inference/stats")
+async def get_inference_stats():
+    return JSONResponse({"stats": inference_batcher.get_stats(), "parallel": parallel_scorer.get_stats()})
+
+
+# ================= EXECUTOR POOL STATS =================
+@router.get("/executors/stats")
+async def get_executor_pool_stats():
+    return JSONResponse({"pools": get_executor_stats()})
+
+
+# ================= LLM GATEWAY STATS =================
+@router.get("/llm/stats")
+async def get_llm_gateway_stats():
+    return JSONResponse({"stats": get_llm_stats()})
+
+
+# ================= DNS RESOLVER STATS =================
+@router.get("/dns/stats")
+async def get_dns_stats():
+    return JSONResponse({"stats": get_resolver().get_stats()})
+
+
+# ================= DATABASE POOL STATS =================
+@router.get("/db/stats")
+async def get_database_stats():
+    return JSONResponse({"databases": get_db_stats(), "write_queues": get_write_queue_stats()})
+
+
+# ================= LOOKUP CACHE STATS =================
+@router.get("/cache/stats")
+async def get_cache_stats():
+    return JSONResponse({
+        "whois": get_whois_cache_stats(),
+        "company": get_company_cache_stats(),
+        "analytics": analytics_cache.get_stats(),
+        "reasoning": get_reasoning_cache_stats()
+    })
+
+
+@router.delete("/company-cache")
+async def clear_company_cache(company: str = ""):
+    """Invalidate cached verification for one company, or all companies if none is given."""
+    try:
+        removed = await run_in_pool("db", invalidate_company_cache, company or None)
+        return JSONResponse({"message": "Company verification cache invalidated.", "removed": removed})
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+
+# ================= RULE PACK =================
+@router.get("/rules/stats")
+async def get_rule_stats():
+    return JSONResponse({"stats": rule_engine.get_stats()})
+
+
+@router.post("/rules/reload")
+async def reload_rules():
+    """Reload the rule pack immediately instead of waiting for the file watcher."""
+    if await run_in_pool("db", rule_engine.reload):
+        return JSONResponse({"message": "Rule pack reloaded.", "stats": rule_engine.get_stats()})
+    return JSONResponse({"error": rule_engine.get_stats()["last_error"]}, status_code=500)
+
+
 # ================= DOMAIN SECURITY CHECK =================
 @router.post("/check-domain")
 async def check_domain_security(url: str = Form(...)):
     try:
-        result = analyze_url_security(url)
+        result = await analyze_url_security_async(url)
         return JSONResponse(result)
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
@@ -652,7 +995,7 @@ async def check_domain_security(url: str = Form(...)):
 @router.post("/verify-company")
 async def verify_company_endpoint(company: str = Form(...)):
     try:
-        result = verify_company(company)
+        result = await verify_company_async(company)
         return JSONResponse(result)
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
@@ -661,97 +1004,44 @@ async def verify_company_endpoint(company: str = Form(...)):
 # ================= CHATBOT (OpenAI with Gemini Fallback) =================
 @router.post("/chat")
 async def chat_with_ai(message: str = Form(...)):
-    # 1. Load Keys
-    api_key = os.getenv("OPENAI_API_KEY")
-    gemini_key = os.getenv("GEMINI_API_KEY")
-    
-    # Manual load from .env if not in environment
-    env_path = os.path.join(BASE_DIR, ".env")
-    if os.path.exists(env_path):
-        try:
-            with open(env_path, "r") as f:
-                for line in f:
-                    if line.startswith("OPENAI_API_KEY=") and not api_key:
-                        api_key = line.split("=", 1)[1].strip()
-                    if line.startswith("GEMINI_API_KEY=") and not gemini_key:
-                        gemini_key = line.split("=", 1)[1].strip()
-        except Exception as e:
-            print(f"Env Read Error: {e}")
-    
-    # 2. Try OpenAI First
-    if api_key:
-        try:
-            headers = {
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json"
-            }
-            payload = {
-                "model": "gpt-3.5-turbo",
-                "messages": [
-                    {"role": "system", "content": "You are JobGuard AI, a helpful assistant that helps users identify fake job postings and scams. Keep replies concise and helpful, under 100 words."},
-                    {"role": "user", "content": message}
-                ],
-                "max_tokens": 200
-            }
-            
-            response = requests.post(
-                "https://api.openai.com/v1/chat/completions", 
-                json=payload, 
-                headers=headers, 
-                timeout=10
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                reply = data['choices'][0]['message']['content']
-                import html
-                reply = html.escape(reply).replace("\n", "<br>")
-                return JSONResponse({"reply": reply, "source": "openai"})
-            else:
-                print(f"OpenAI Error: {response.status_code} - {response.text[:200]}")
-                
-        except Exception as e:
-            print(f"OpenAI Exception: {e}")
-    
-    # 3. Try Gemini Fallback
-    if gemini_key:
-        try:
-            url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent?key={gemini_key}"
-            payload = {
-                "contents": [{
-                    "parts": [{
-                        "text": f"You are JobGuard AI, helping users identify fake job postings. Be concise (under 100 words). User says: {message}"
-                    }]
-                }]
-            }
-            
-            r = requests.post(url, json=payload, headers={"Content-Type": "application/json"}, timeout=10)
-            
-            if r.status_code == 200:
-                data = r.json()
-                reply = data['candidates'][0]['content']['parts'][0]['text']
-                import html
-                reply = html.escape(reply).replace("\n", "<br>")
-                return JSONResponse({"reply": reply, "source": "gemini"})
-            else:
-                print(f"Gemini Status: {r.status_code} {r.text[:200]}")
-                
-        except Exception as e:
-            print(f"Gemini Error: {e}")
-    
-    # 4. Local Fallback - Use our model to analyze the message
+    # 1. Try OpenAI First (keys come from the environment / .env via the LLM gateway)
+    if llm_gateway.is_configured("openai"):
+        response = await llm_gateway.generate(
+            "openai",
+            messages=[
+                {"role": "system", "content": "You are JobGuard AI, a helpful assistant that helps users identify fake job postings and scams. Keep replies concise and helpful, under 100 words."},
+                {"role": "user", "content": message}
+            ],
+            max_tokens=200
+        )
+        if response.ok:
+            reply = html.escape(response.text).replace("\n", "<br>")
+            return JSONResponse({"reply": reply, "source": "openai"})
+
+    # 2. Try Gemini Fallback
+    if llm_gateway.is_configured("gemini"):
+        response = await llm_gateway.generate(
+            "gemini",
+            f"You are JobGuard AI, helping users identify fake job postings. Be concise (under 100 words). User says: {message}"
+        )
+        if response.ok:
+            reply = html.escape(response.text).replace("\n", "<br>")
+            return JSONResponse({"reply": reply, "source": "gemini"})
+
+    # 3. Local Fallback - Use our model to analyze the message
     try:
         # Check if message looks like a job posting to analyze
         if len(message) > 50:
-            vect = vectorizer.transform([message])
-            pred_probs = model.predict_proba(vect)[0]
-            pred_label = np.argmax(pred_probs)
-            confidence = round(float(pred_probs[pred_label]) * 100, 1)
+            ctx = AnalysisContext(text=message, model=model, vectorizer=vectorizer)
+            await ctx.score_with(inference_batcher)
+            await ctx.prepare(parts=("explanation",))
+            pred_label = ctx.pred_label
+            confidence = round(float(ctx.probabilities[pred_label]) * 100, 1)
             
             verdict = "Real" if pred_label == 1 else "Fake"
             icon = "✅" if pred_label == 1 else "🚨"
             
-            explanation = explain_prediction(message, model, vectorizer)
+            explanation = ctx.explanation
             top_words = ", ".join(explanation.get('top_words', [])[:3])
             
             reply = (
@@ -780,76 +1070,58 @@ async def chat_with_ai(message: str = Form(...)):
 
 
 # ================= ANALYTICS DASHBOARD =================
-# Simple TTL Cache for Analytics (Next Level Performance)
-ANALYTICS_CACHE = {"data": None, "timestamp": 0}
-CACHE_TTL = 30 # 30 seconds
+# Dashboard payload cached per data version: served stale while one rebuild runs,
+# and shared between workers through the persistent cache tier
+ANALYTICS_MAX_STALE = float(os.getenv("ANALYTICS_MAX_STALE_SECONDS", "300"))
+ANALYTICS_REFRESH_INTERVAL = float(os.getenv("ANALYTICS_REFRESH_INTERVAL_SECONDS", "1"))
 
-@router.get("/analytics")
-async def get_analytics():
-    """Get optimized analytics for the dashboard."""
-    global ANALYTICS_CACHE
-    
-    import time
-    now = time.time()
-    
-    # Return cache if still valid
-    if ANALYTICS_CACHE["data"] and (now - ANALYTICS_CACHE["timestamp"] < CACHE_TTL):
-        return JSONResponse(ANALYTICS_CACHE["data"])
-        
-    try:
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row
-        
-        # 1. Combined Stats Query (Efficiency Boost)
-        stats = {}
-        
-        # Predictions breakdown
-        cursor = conn.execute("SELECT result, COUNT(*) as count FROM predictions GROUP BY result")
-        breakdown = {row["result"]: row["count"] for row in cursor.fetchall()}
-        total_preds = sum(breakdown.values())
-        
-        # Risk distribution
-        cursor = conn.execute("SELECT risk_level, COUNT(*) as count FROM predictions WHERE risk_level IS NOT NULL GROUP BY risk_level")
-        risk_dist = {row["risk_level"]: row["count"] for row in cursor.fetchall()}
-        
-        # 2. Optimized Trend (Single scan)
-        cursor = conn.execute("""
-            SELECT DATE(timestamp) as date, 
-                   COUNT(*) as total,
-                   SUM(CASE WHEN result LIKE '%Fake%' THEN 1 ELSE 0 END) as fake
-            FROM predictions 
-            WHERE timestamp >= datetime('now', '-7 days')
-            GROUP BY DATE(timestamp)
-            ORDER BY date
-        """)
-        trend = [{"date": row["date"], "fake": row["fake"] or 0, "real": row["total"] - (row["fake"] or 0)} for row in cursor.fetchall()]
+
+def _analytics_version():
+    # The payload also carries blacklist totals, which live in blacklist.db with their own counter
+    with db.reader() as conn:
+        return f"{read_analytics_version(conn)}.{read_blacklist_version()}"
+
+
+def _build_analytics():
+    with db.reader() as conn:
+        # 1. Breakdown, risk distribution and 7-day trend from the daily rollups
+        summary = read_prediction_summary(conn, trend_days=7)
         
-        # 3. Misc Stats
+        # 2. Misc Stats
         feedback = conn.execute("SELECT COUNT(*), SUM(user_says_correct) FROM feedback").fetchone()
         reports = conn.execute("SELECT COUNT(*) FROM reports").fetchone()[0]
-        
-        conn.close()
-        
-        # Prepare response
-        res_data = {
-            "predictions": {
-                "total": total_preds,
-                "breakdown": breakdown,
-                "risk_distribution": risk_dist
-            },
-            "trend": trend,
-            "feedback": {
-                "total": feedback[0] or 0,
-                "accuracy": round((feedback[1] / feedback[0]) * 100, 1) if feedback[0] and feedback[0] > 0 else 0
-            },
-            "reports": {"total": reports},
-            "blacklist": get_blacklist_stats()
-        }
-        
-        # Update Cache
-        ANALYTICS_CACHE = {"data": res_data, "timestamp": now}
-        
-        return JSONResponse(res_data)
+    
+    return {
+        "predictions": {
+            "total": summary["total"],
+            "breakdown": summary["breakdown"],
+            "risk_distribution": summary["risk_distribution"]
+        },
+        "trend": summary["trend"],
+        "feedback": {
+            "total": feedback[0] or 0,
+            "accuracy": round((feedback[1] / feedback[0]) * 100, 1) if feedback[0] and feedback[0] > 0 else 0
+        },
+        "reports": {"total": reports},
+        "blacklist": get_blacklist_counts()
+    }
+
+
+analytics_cache = VersionedCache(
+    "analytics", _analytics_version, _build_analytics,
+    refresh_interval=ANALYTICS_REFRESH_INTERVAL, max_stale=ANALYTICS_MAX_STALE
+)
+
+
+@router.get("/analytics")
+async def get_analytics(request: Request):
+    """Get optimized analytics for the dashboard. Supports If-None-Match polling."""
+    try:
+        res_data, version = await analytics_cache.get()
+        etag = f'"analytics-{version}"'
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+        return JSONResponse(res_data, headers={"ETag": etag, "Cache-Control": "no-cache"})
         
     except Exception as e:
         import traceback
@@ -861,6 +1133,26 @@ async def get_analytics():
 from pydantic import BaseModel
 from typing import Optional
 
+VISITOR_INSERT_SQL = """
+    INSERT INTO visitors (email, name, source, registered_at, last_visit)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(email) DO NOTHING
+"""
+
+
+def _record_visit(email, name, source, now):
+    """
+    Insert a new visitor, or bump visit_count/last_visit for a returning one.
+    Returns None for a new visitor, else the updated visit count. Whether the
+    visitor is new is decided by the insert itself inside one write transaction,
+    so two concurrent requests for the same email cannot both see "new".
+    """
+    with db.writer() as conn:
+        if conn.execute(VISITOR_INSERT_SQL, (email, name, source, now, now)).rowcount == 1:
+            return None
+        conn.execute("UPDATE visitors SET last_visit = ?, visit_count = visit_count + 1 WHERE email = ?", (now, email))
+        return conn.execute("SELECT visit_count FROM visitors WHERE email = ?", (email,)).fetchone()[0]
+
 class VisitorRegistration(BaseModel):
     email: str
     name: Optional[str] = None
@@ -871,35 +1163,19 @@ class VisitorRegistration(BaseModel):
 async def register_visitor(visitor: VisitorRegistration, background_tasks: BackgroundTasks):
     """Register a new visitor from the welcome modal and send welcome email"""
     try:
-        conn = sqlite3.connect(DB_PATH)
         now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
-        # Check if email already exists
-        cursor = conn.execute("SELECT id, visit_count FROM visitors WHERE email = ?", (visitor.email,))
-        existing = cursor.fetchone()
+        # Register new visitor, or update visit count (synchronously: the answer depends on it)
+        visit_count = await run_in_pool("db", _record_visit, visitor.email, visitor.name, visitor.source, now)
         
-        if existing:
-            # Update visit count
-            conn.execute("""
-                UPDATE visitors SET last_visit = ?, visit_count = visit_count + 1 WHERE email = ?
-            """, (now, visitor.email))
-            conn.commit()
-            conn.close()
+        if visit_count is not None:
             return JSONResponse({
                 "success": True,
-                "message": f"Welcome back! Visit #{existing[1] + 1}",
+                "message": f"Welcome back! Visit #{visit_count}",
                 "returning": True,
                 "email_sent": False
             })
         else:
-            # Register new visitor
-            conn.execute("""
-                INSERT INTO visitors (email, name, source, registered_at, last_visit)
-                VALUES (?, ?, ?, ?, ?)
-            """, (visitor.email, visitor.name, visitor.source, now, now))
-            conn.commit()
-            conn.close()
-            
             # --- NEXT LEVEL: Automated Welcome Email ---
             background_tasks.add_task(send_welcome_email, visitor.email, visitor.name or "Job Seeker")
             
@@ -915,27 +1191,20 @@ async def register_visitor(visitor: VisitorRegistration, background_tasks: Backg
         return JSONResponse({"error": str(e)}, status_code=500)
 
 
-@router.get("/visitors/stats")
-async def get_visitor_stats():
-    """Get visitor registration statistics"""
-    try:
-        conn = sqlite3.connect(DB_PATH)
-        
+def _read_visitor_stats():
+    with db.reader() as conn:
         # Total visitors
-        cursor = conn.execute("SELECT COUNT(*) FROM visitors")
-        total = cursor.fetchone()[0]
+        total = conn.execute("SELECT COUNT(*) FROM visitors").fetchone()[0]
         
         # Today's visitors
         today = datetime.now().strftime("%Y-%m-%d")
-        cursor = conn.execute("SELECT COUNT(*) FROM visitors WHERE registered_at LIKE ?", (f"{today}%",))
-        today_count = cursor.fetchone()[0]
+        today_count = conn.execute("SELECT COUNT(*) FROM visitors WHERE registered_at LIKE ?", (f"{today}%",)).fetchone()[0]
         
         # This week
-        cursor = conn.execute("""
+        week_count = conn.execute("""
             SELECT COUNT(*) FROM visitors 
             WHERE registered_at >= datetime('now', '-7 days')
-        """)
-        week_count = cursor.fetchone()[0]
+        """).fetchone()[0]
         
         # Recent visitors
         cursor = conn.execute("""
@@ -943,15 +1212,20 @@ async def get_visitor_stats():
             ORDER BY registered_at DESC LIMIT 10
         """)
         recent = [{"email": r[0], "source": r[1], "date": r[2]} for r in cursor.fetchall()]
-        
-        conn.close()
-        
-        return JSONResponse({
-            "total_visitors": total,
-            "today": today_count,
-            "this_week": week_count,
-            "recent": recent
-        })
+    
+    return {
+        "total_visitors": total,
+        "today": today_count,
+        "this_week": week_count,
+        "recent": recent
+    }
+
+
+@router.get("/visitors/stats")
+async def get_visitor_stats():
+    """Get visitor registration statistics"""
+    try:
+        return JSONResponse(await run_in_pool("db", _read_visitor_stats))
         
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
@@ -974,30 +1248,17 @@ async def send_welcome_email_endpoint(request: WelcomeEmailRequest, background_t
     log_email_event(f"ENDPOINT HIT: Request for {request.email} from {request.source}")
     try:
         # First, register/update the visitor
-        conn = sqlite3.connect(DB_PATH)
         now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
-        cursor = conn.execute("SELECT id, visit_count FROM visitors WHERE email = ?", (request.email,))
-        existing = cursor.fetchone()
+        visit_count = await run_in_pool("db", _record_visit, request.email, request.name or "", request.source, now)
+        is_new_user = visit_count is None
         
-        is_new_user = False
-        if existing:
-            print(f"👤 User {request.email} already exists. Updating last visit.")
-            log_email_event(f"DB: Visitor {request.email} exists, updating visit_count.")
-            conn.execute("""
-                UPDATE visitors SET last_visit = ?, visit_count = visit_count + 1 WHERE email = ?
-            """, (now, request.email))
+        if not is_new_user:
+            print(f"👤 User {request.email} already exists. Updated last visit.")
+            log_email_event(f"DB: Visitor {request.email} exists, visit_count now {visit_count}.")
         else:
-            print(f"✨ New user detected: {request.email}. Registering.")
-            log_email_event(f"DB: New visitor {request.email} detected, registering.")
-            is_new_user = True
-            conn.execute("""
-                INSERT INTO visitors (email, name, source, registered_at, last_visit)
-                VALUES (?, ?, ?, ?, ?)
-            """, (request.email, request.name or "", request.source, now, now))
-        
-        conn.commit()
-        conn.close()
+            print(f"✨ New user detected: {request.email}. Registered.")
+            log_email_event(f"DB: New visitor {request.email} detected, registered.")
         
         # Send welcome email as a Background Task (Efficiency boost)
         user_name = request.name if request.name else request.email.split("@")[0].title()
@@ -1,28 +1,13 @@
 
 from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
-import os
-import httpx
-from dotenv import load_dotenv
 
-# Optional AI libraries
-try:
-    import openai
-except ImportError:
-    openai = None
-
-load_dotenv()
+from utils.llm_gateway import llm_gateway
 
 router = APIRouter()
 
-# --- Configuration ---
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-
-# Initialize Clients
-openai_client = None
-if OPENAI_API_KEY and openai:
-    openai_client = openai.OpenAI(api_key=OPENAI_API_KEY)
+# Short timeout (3s) to prevent UI hang
+CHAT_TIMEOUT = 3.0
 
 class ChatRequest(BaseModel):
     message: str
@@ -47,59 +32,28 @@ async def chat_reply(request: ChatRequest):
         return {"reply": "pong"}
 
     # Priority 1: Google Gemini (Free Tier)
-    if GEMINI_API_KEY:
-        try:
-            # Construct context
-            history_text = "\n".join([f"{msg.get('role', 'User')}: {msg.get('content', '')}" for msg in request.history[-4:]])
-            full_prompt = f"{SYSTEM_PROMPT}\n\nRecent Chat History:\n{history_text}\n\nUser: {user_message}\nGuardAI:"
-            
-            url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-pro:generateContent?key={GEMINI_API_KEY}"
-            
-            payload = {
-                "contents": [{
-                    "parts": [{"text": full_prompt}]
-                }]
-            }
-            
-            # Short timeout (3s) to prevent UI hang
-            async with httpx.AsyncClient() as client:
-                try:
-                    response = await client.post(url, json=payload, timeout=3.0)
-                    
-                    if response.status_code == 200:
-                        data = response.json()
-                        if "candidates" in data and data["candidates"]:
-                            reply = data["candidates"][0]["content"]["parts"][0]["text"]
-                            return {"reply": reply}
-                        else:
-                            print(f"Gemini Empty Response: {data}")
-                    else:
-                        print(f"Gemini API Error: {response.status_code} - {response.text}")
-                except httpx.TimeoutException:
-                     print("Gemini Timeout (3s)")
-                    
-        except Exception as e:
-            print(f"Gemini REST Error: {e}")
-            # Fallthrough to OpenAI
+    if llm_gateway.is_configured("gemini"):
+        # Construct context
+        history_text = "\n".join([f"{msg.get('role', 'User')}: {msg.get('content', '')}" for msg in request.history[-4:]])
+        full_prompt = f"{SYSTEM_PROMPT}\n\nRecent Chat History:\n{history_text}\n\nUser: {user_message}\nGuardAI:"
+
+        response = await llm_gateway.generate("gemini", full_prompt, model="gemini-pro", timeout=CHAT_TIMEOUT)
+        if response.ok:
+            return {"reply": response.text}
+        # Fallthrough to OpenAI
 
     # Priority 2: OpenAI
-    if openai_client:
-        try:
-            messages = [{"role": "system", "content": SYSTEM_PROMPT}]
-            for msg in request.history[-4:]:
-                messages.append(msg)
-            messages.append({"role": "user", "content": user_message})
+    if llm_gateway.is_configured("openai"):
+        messages = [{"role": "system", "content": SYSTEM_PROMPT}]
+        for msg in request.history[-4:]:
+            messages.append(msg)
+        messages.append({"role": "user", "content": user_message})
 
-            response = openai_client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=messages,
-                max_tokens=200,
-                temperature=0.7,
-                timeout=3.0 # Short timeout
-            )
-            return {"reply": response.choices[0].message.content}
-        except Exception as e:
-            print(f"OpenAI Error: {e}")
+        response = await llm_gateway.generate(
+            "openai", messages=messages, max_tokens=200, temperature=0.7, timeout=CHAT_TIMEOUT
+        )
+        if response.ok:
+            return {"reply": response.text}
 
     # Fallback: Rule-based (Offline)
     lower_msg = user_message.lower()
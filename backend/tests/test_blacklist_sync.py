@@ -0,0 +1,59 @@
+from utils.blacklist import init_blacklist_db
+from utils.blacklist_index import BlacklistFilter, BlacklistIndex, read_changes
+from utils.db_pool import get_db
+
+
+def _setup(tmp_path):
+    db_path = str(tmp_path / "blacklist.db")
+    database = get_db(db_path)
+    init_blacklist_db(database)
+    return db_path, database
+
+
+def _add_url(database, url, reported_at):
+    with database.writer() as conn:
+        conn.execute("""
+            INSERT INTO blacklisted_urls (url, domain, first_reported, last_reported) VALUES (?, ?, ?, ?)
+            ON CONFLICT(url) DO UPDATE SET report_count = report_count + 1, last_reported = excluded.last_reported
+        """, (url, url.split("/")[0], reported_at, reported_at))
+
+
+def test_changes_follow_commit_order_not_timestamps(tmp_path):
+    db_path, database = _setup(tmp_path)
+    watermarks = {}
+    _add_url(database, "b.example/job", "2024-01-01 10:00:01")
+    assert [row[0] for _, row in read_changes(db_path, watermarks)] == ["b.example/job"]
+
+    # Stamped earlier but committed later (slow writer, clock step back): still picked up
+    _add_url(database, "a.example/job", "2024-01-01 10:00:00")
+    assert [row[0] for kind, row in read_changes(db_path, watermarks) if kind == "url"] == ["a.example/job"]
+    assert list(read_changes(db_path, watermarks)) == []
+
+
+def test_updates_are_synced(tmp_path):
+    db_path, database = _setup(tmp_path)
+    index = BlacklistIndex(db_path)
+    _add_url(database, "a.example/job", "2024-01-01 10:00:00")
+    index.ensure_loaded()
+    _add_url(database, "a.example/job", "2023-01-01 00:00:00")
+    assert index.sync() >= 1
+    assert index.lookup_urls("a.example/job", "a.example")[0][1] == 2
+
+
+def test_filter_saves_on_flush_not_every_sync(tmp_path):
+    db_path, database = _setup(tmp_path)
+    bloom_path = str(tmp_path / "blacklist.bloom")
+    bloom_filter = BlacklistFilter(db_path, bloom_path, capacity=1000)
+    bloom_filter.ensure_current()
+    saves = bloom_filter.get_stats()["saves"]
+
+    _add_url(database, "evil.example/apply", "2024-01-01 10:00:00")
+    assert bloom_filter.sync() == 1
+    assert bloom_filter.might_match_url("evil.example/apply", "evil.example")
+    assert bloom_filter.get_stats()["saves"] == saves
+
+    bloom_filter.flush()
+    reopened = BlacklistFilter(db_path, bloom_path, capacity=1000)
+    reopened.ensure_current()
+    assert reopened.might_match_url("evil.example/apply", "evil.example")
+    assert reopened.get_stats()["rebuilds"] == 0
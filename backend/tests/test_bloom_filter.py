@@ -0,0 +1,65 @@
+import pytest
+
+from utils.bloom_filter import BloomFilter
+
+
+def test_no_false_negatives():
+    bloom = BloomFilter(capacity=2000, fp_rate=0.01)
+    keys = [f"url:scam-{i}.example/apply" for i in range(2000)]
+    for key in keys:
+        bloom.add(key)
+    assert all(key in bloom for key in keys)
+
+
+def test_false_positive_rate_near_target():
+    bloom = BloomFilter(capacity=5000, fp_rate=0.01)
+    for i in range(5000):
+        bloom.add(f"company:scam {i}")
+    false_positives = sum(bloom.might_contain(f"company:legit {i}") for i in range(20000))
+    assert false_positives / 20000 < 0.02
+    assert bloom.estimated_fp_rate() == pytest.approx(0.01, rel=0.5)
+
+
+def test_sizing_and_stats():
+    bloom = BloomFilter(capacity=100000, fp_rate=0.01)
+    stats = bloom.get_stats()
+    # ~9.6 bits and 7 hashes per key for 1%
+    assert stats["hashes"] == 7
+    assert 115000 <= stats["memory_bytes"] <= 125000
+    assert stats["count"] == 0 and not bloom.is_full
+
+
+def test_add_reports_new_keys():
+    bloom = BloomFilter(capacity=100)
+    assert bloom.add("domain:evil.example") is True
+    assert bloom.add("domain:evil.example") is False
+    assert bloom.count == 1
+
+
+def test_save_and_load_round_trip(tmp_path):
+    path = str(tmp_path / "blacklist.bloom")
+    bloom = BloomFilter(capacity=1000, fp_rate=0.001)
+    bloom.metadata = {"sequence": "change_seq", "watermarks": {"blacklisted_urls": 3}}
+    for i in range(100):
+        bloom.add(f"url:{i}")
+    bloom.save(path)
+
+    loaded = BloomFilter.load(path)
+    assert loaded.metadata == bloom.metadata
+    assert loaded.get_stats() == bloom.get_stats()
+    assert all(f"url:{i}" in loaded for i in range(100))
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_load_rejects_bad_files(tmp_path):
+    path = tmp_path / "blacklist.bloom"
+    BloomFilter(capacity=1000).save(str(path))
+    data = path.read_bytes()
+
+    path.write_bytes(data[:-10])
+    with pytest.raises(ValueError, match="Truncated"):
+        BloomFilter.load(str(path))
+
+    path.write_bytes(b"XXXXX" + data[5:])
+    with pytest.raises(ValueError, match="Not a bloom filter"):
+        BloomFilter.load(str(path))
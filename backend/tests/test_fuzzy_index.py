@@ -0,0 +1,63 @@
+from utils.fuzzy_index import TrigramIndex, fold_name, trigrams
+
+
+def _index(*names):
+    index = TrigramIndex()
+    for name in names:
+        index.add(fold_name(name), {"name": name})
+    return index
+
+
+def _keys(results):
+    return [key for key, _, _ in results]
+
+
+def test_fold_name_undoes_leetspeak():
+    assert fold_name("Amaz0n  Hiring-Ltd.") == "amazon hiring ltd"
+    assert fold_name("P@yP4l C4r33rs") == "paypal careers"
+
+
+def test_leetspeak_variant_matches_exactly():
+    index = _index("Amazon Hiring Ltd", "Acme Recruiting", "Globex Staffing")
+    results = index.search("Amaz0n Hiring Ltd", k=3, threshold=0.7)
+    assert _keys(results) == ["amazon hiring ltd"]
+    assert results[0][1] == 1.0
+    assert results[0][2] == {"name": "Amazon Hiring Ltd"}
+
+
+def test_spelling_variants_match_above_threshold():
+    index = _index("Amazon Hiring Ltd", "Acme Recruiting", "Globex Staffing")
+    assert _keys(index.search("Amazon Hirring Ltd", threshold=0.6)) == ["amazon hiring ltd"]
+    assert _keys(index.search("Acme Recruting", threshold=0.6)) == ["acme recruiting"]
+    assert index.search("Initech Payroll", threshold=0.3) == []
+
+
+def test_results_are_best_first_and_capped_at_k():
+    index = _index("acme recruiting", "acme recruiting group", "acme recruiting group international")
+    results = index.search("acme recruiting", k=2, threshold=0.3)
+    assert _keys(results) == ["acme recruiting", "acme recruiting group"]
+    assert results[0][1] > results[1][1]
+
+
+def test_threshold_boundary_is_inclusive():
+    # 0.56 * 25 == 14.000000000000002: the required overlap and the size bound
+    # must not round up past a key whose similarity is exactly 14/25
+    query, key = "abcdefghijklm nopqrstuvw", "abcdefghijklm"
+    assert len(trigrams(query)) == 25
+    assert trigrams(key) <= trigrams(query) and len(trigrams(key)) == 14
+
+    index = _index(key)
+    assert index.search(query, threshold=0.56) == [(key, 0.56, {"name": key})]
+    assert index.search(query, threshold=0.57) == []
+
+
+def test_add_replaces_and_remove_forgets():
+    index = _index("amazon hiring ltd")
+    index.add("amazon hiring ltd", {"name": "updated"})
+    assert len(index) == 1
+    assert index.search("amazon hiring ltd")[0][2] == {"name": "updated"}
+
+    index.remove("amazon hiring ltd")
+    assert len(index) == 0
+    assert index.search("amazon hiring ltd") == []
+    assert index.get_stats()["trigrams"] == 0
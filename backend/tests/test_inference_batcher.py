@@ -0,0 +1,83 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from utils.inference_batcher import InferenceBatcher
+
+
+class FakeVectorizer:
+    def __init__(self):
+        self.calls = []
+
+    def transform(self, texts):
+        self.calls.append(list(texts))
+        return np.array([[len(text)] for text in texts], dtype=float)
+
+
+class FakeModel:
+    def predict_proba(self, vectors):
+        return np.hstack([vectors, -vectors])
+
+
+class FailingModel:
+    def predict_proba(self, vectors):
+        raise ValueError("model exploded")
+
+
+def _score_all(batcher, texts):
+    async def run():
+        return await asyncio.gather(*(batcher.score(text) for text in texts), return_exceptions=True)
+    return asyncio.run(run())
+
+
+def test_concurrent_requests_share_one_batch():
+    vectorizer = FakeVectorizer()
+    batcher = InferenceBatcher(FakeModel(), vectorizer, max_batch_size=8, window_ms=20)
+    results = _score_all(batcher, ["a", "bb", "ccc"])
+
+    assert vectorizer.calls == [["a", "bb", "ccc"]]
+    assert [row[0] for _, row in results] == [1, 2, 3]
+    assert batcher.get_stats()["in_flight"] == 0
+
+
+def test_full_batches_are_split_in_arrival_order():
+    vectorizer = FakeVectorizer()
+    batcher = InferenceBatcher(FakeModel(), vectorizer, max_batch_size=3, window_ms=20)
+    texts = ["x" * n for n in range(1, 8)]
+    results = _score_all(batcher, texts)
+
+    assert vectorizer.calls == [texts[0:3], texts[3:6], texts[6:7]]
+    # Every caller gets the row for its own text
+    assert [row[0] for _, row in results] == [len(text) for text in texts]
+    stats = batcher.get_stats()
+    assert stats["batches"] == 3
+    assert stats["max_batch_size_seen"] == 3
+
+
+def test_batch_error_fails_every_caller():
+    batcher = InferenceBatcher(FailingModel(), FakeVectorizer(), max_batch_size=4, window_ms=20)
+    results = _score_all(batcher, ["a", "b", "c", "d", "e"])
+
+    assert len(results) == 5
+    for result in results:
+        assert isinstance(result, ValueError)
+        assert str(result) == "model exploded"
+    assert batcher.get_stats()["errors"] == 2
+
+
+def test_error_in_one_batch_does_not_leak_into_the_next():
+    class FlakyModel(FakeModel):
+        calls = 0
+
+        def predict_proba(self, vectors):
+            FlakyModel.calls += 1
+            if FlakyModel.calls == 1:
+                raise RuntimeError("first batch only")
+            return super().predict_proba(vectors)
+
+    batcher = InferenceBatcher(FlakyModel(), FakeVectorizer(), max_batch_size=2, window_ms=20)
+    first, second, third = _score_all(batcher, ["a", "b", "ccc"])
+
+    assert isinstance(first, RuntimeError) and isinstance(second, RuntimeError)
+    assert third[1][0] == pytest.approx(3)
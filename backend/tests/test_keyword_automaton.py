@@ -0,0 +1,64 @@
+import random
+
+import pytest
+
+from utils.keyword_automaton import KeywordAutomaton
+
+
+def _automaton(*phrases):
+    automaton = KeywordAutomaton()
+    for phrase in phrases:
+        automaton.add(phrase, {"severity": len(phrase)})
+    return automaton.build()
+
+
+def _naive(phrases, text):
+    found = []
+    for entry_id, phrase in enumerate(phrases):
+        start = text.find(phrase)
+        while start != -1:
+            found.append((entry_id, start, start + len(phrase)))
+            start = text.find(phrase, start + 1)
+    return sorted(found, key=lambda match: (match[2], -len(phrases[match[0]])))
+
+
+def test_find_all_reports_offsets_and_payload():
+    automaton = _automaton("wire transfer", "telegram")
+    assert automaton.find_all("Send a wire transfer via Telegram or telegram") == [
+        {"phrase": "wire transfer", "start": 7, "end": 20, "severity": 13},
+        {"phrase": "telegram", "start": 37, "end": 45, "severity": 8},
+    ]
+
+
+def test_overlapping_and_nested_phrases():
+    phrases = ["he", "she", "his", "hers"]
+    automaton = _automaton(*phrases)
+    matches = [(automaton.entry(entry_id)[0], start, end) for entry_id, start, end in automaton.iter_matches("ushers")]
+    assert matches == [("she", 1, 4), ("he", 2, 4), ("hers", 2, 6)]
+
+
+def test_matches_naive_substring_search():
+    rng = random.Random(7)
+    phrases = sorted({"".join(rng.choice("abc") for _ in range(rng.randint(1, 4))) for _ in range(30)})
+    automaton = _automaton(*phrases)
+    for _ in range(50):
+        text = "".join(rng.choice("abcd") for _ in range(rng.randint(0, 40)))
+        got = sorted(automaton.iter_matches(text), key=lambda match: (match[2], -len(phrases[match[0]])))
+        assert got == _naive(phrases, text)
+
+
+def test_first_matches_keeps_the_first_occurrence():
+    automaton = _automaton("urgent", "pay")
+    assert automaton.first_matches("pay now, urgent! pay later, urgent") == {1: (0, 3), 0: (9, 15)}
+
+
+def test_add_after_build_rebuilds_lazily():
+    automaton = _automaton("fee")
+    automaton.add("registration fee")
+    assert [m["phrase"] for m in automaton.find_all("pay the registration fee")] == ["registration fee", "fee"]
+    assert len(automaton) == 2
+
+
+def test_empty_phrase_is_rejected():
+    with pytest.raises(ValueError):
+        KeywordAutomaton().add("")
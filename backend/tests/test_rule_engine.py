@@ -0,0 +1,58 @@
+import time
+
+from utils.rule_engine import RegexSet, _required_literal
+
+
+def _patterns(rules, text):
+    return [rule["pattern"] for rule in RegexSet(rules).matches(text)]
+
+
+def test_required_literal():
+    assert _required_literal(r"job.*offer.*\d+") == "offer"
+    assert _required_literal(r"bit\.ly") == "bit.ly"
+    assert _required_literal(r"(?:abc)+def") == "abc"
+    assert _required_literal(r"Telegram") == "telegram"
+    assert _required_literal(r"foo|bar") is None
+    assert _required_literal(r"[ab]\d+") is None
+
+
+def test_matches_overlapping_rules_in_rule_order():
+    rules = [{"pattern": "telegram"}, {"pattern": "urgent.*hiring"}, {"pattern": r"bit\.ly"}, {"pattern": "whatsapp"}]
+    # telegram sits inside the span of urgent.*hiring; both must be reported
+    assert _patterns(rules, "https://bit.ly/urgent-telegram-hiring") == ["telegram", "urgent.*hiring", r"bit\.ly"]
+    assert _patterns(rules, "a normal careers page") == []
+
+
+def test_literal_seen_but_pattern_fails():
+    rules = [{"pattern": r"earn\s*\$?\d{4,}\s*(?:fast|quick|easy)"}]
+    assert _patterns(rules, "earn $50 fast") == []
+    assert _patterns(rules, "earn $5000 fast") == [rules[0]["pattern"]]
+
+
+def test_rules_without_literal_always_run():
+    rules = [{"pattern": "foo|bar"}, {"pattern": "baz"}]
+    assert _patterns(rules, "xx bar xx") == ["foo|bar"]
+
+
+def test_case_sensitive_and_insensitive_patterns():
+    rules = [{"pattern": "Remote"}, {"pattern": "(?i)CASH"}]
+    assert _patterns(rules, "remote quick cash") == ["(?i)CASH"]
+    assert _patterns(rules, "Remote") == ["Remote"]
+
+
+def test_cost_is_flat_in_rule_count():
+    text = ("we are hiring a data engineer to join the platform team, salary and benefits included. " * 60) + "telegram"
+
+    def cost(rule_count):
+        rules = [{"pattern": rf"zq{i}x.*offer\d+"} for i in range(rule_count - 1)] + [{"pattern": "telegram"}]
+        regex_set = RegexSet(rules)
+        assert len(regex_set.matches(text)) == 1
+        best = float("inf")
+        for _ in range(5):
+            started = time.perf_counter()
+            regex_set.matches(text)
+            best = min(best, time.perf_counter() - started)
+        return best
+
+    small, large = cost(10), cost(2000)
+    assert large < small * 3 + 0.002
@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+from utils import write_queue as write_queue_module
+from utils.db_pool import get_db
+from utils.write_queue import WriteBehindQueue, WriteQueueFullError
+
+INSERT_SQL = "INSERT INTO events (name) VALUES (?)"
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = get_db(str(tmp_path / "queue.db"))
+    with database.writer() as conn:
+        conn.execute("CREATE TABLE events (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)")
+    return database
+
+
+def _names(db):
+    with db.reader() as conn:
+        return [row[0] for row in conn.execute("SELECT name FROM events ORDER BY id")]
+
+
+def test_statements_are_group_committed_in_order(db):
+    queue = WriteBehindQueue(db, batch_size=50, flush_ms=200)
+    with db.writer():
+        # The writer is blocked on the connection, so everything below piles up into one group
+        queue.submit(INSERT_SQL, ("first",))
+        for i in range(9):
+            queue.submit(INSERT_SQL, (f"row {i}",))
+        queue.submit(INSERT_SQL, [("many a",), ("many b",)], many=True)
+    assert queue.flush(timeout=5)
+
+    assert _names(db) == ["first"] + [f"row {i}" for i in range(9)] + ["many a", "many b"]
+    stats = queue.get_stats()
+    assert stats["committed"] == 11
+    assert stats["batches"] <= 2
+    queue.close()
+
+
+def test_failed_group_is_retried_row_by_row(db):
+    queue = WriteBehindQueue(db, batch_size=50, flush_ms=200)
+    with db.writer():
+        queue.submit(INSERT_SQL, ("a",))
+        queue.submit(INSERT_SQL, ("a",))      # violates UNIQUE
+        queue.submit(INSERT_SQL, (None,))     # violates NOT NULL
+        queue.submit(INSERT_SQL, ("b",))
+    assert queue.flush(timeout=5)
+
+    assert _names(db) == ["a", "b"]
+    stats = queue.get_stats()
+    assert stats["committed"] == 2
+    assert stats["failed"] == 2
+    queue.close()
+
+
+def test_backpressure_rejects_when_full(db, monkeypatch):
+    monkeypatch.setattr(write_queue_module, "WRITE_QUEUE_PUT_TIMEOUT_MS", 50)
+    queue = WriteBehindQueue(db, batch_size=1, flush_ms=0, max_depth=1)
+    accepted = []
+    with db.writer():
+        with pytest.raises(WriteQueueFullError):
+            for i in range(5):
+                queue.submit(INSERT_SQL, (f"row {i}",))
+                accepted.append(f"row {i}")
+    assert queue.flush(timeout=5)
+
+    assert 1 <= len(accepted) <= 2
+    assert _names(db) == accepted
+    assert queue.get_stats()["rejected"] == 1
+    queue.close()
+
+
+def test_enqueue_from_the_event_loop(db):
+    queue = WriteBehindQueue(db, flush_ms=10)
+
+    async def produce():
+        await asyncio.gather(*(queue.enqueue(INSERT_SQL, (f"row {i}",)) for i in range(20)))
+
+    asyncio.run(produce())
+    assert queue.flush(timeout=5)
+    assert sorted(_names(db)) == sorted(f"row {i}" for i in range(20))
+    queue.close()
+
+
+def test_close_commits_everything_queued(db):
+    queue = WriteBehindQueue(db, batch_size=5, flush_ms=1000)
+    for i in range(12):
+        queue.submit(INSERT_SQL, (f"row {i}",))
+    queue.close(timeout=5)
+
+    assert len(_names(db)) == 12
+    assert not queue.get_stats()["writer_alive"]
@@ -1,9 +1,9 @@
 # FakeJobAI Utilities Package
 # Contains all utility modules for the backend
 
-from .explain import explain_prediction
+from .explain import explain_prediction, explain_local_batch
 from .domain_check import analyze_url_security, check_domain
-from .company_verify import verify_company
+from .company_verify import verify_company, verify_company_async
 from .blacklist import check_blacklist, add_to_blacklist, get_blacklist_stats
 from .risk_scorer import calculate_comprehensive_risk, calculate_text_risk
 from .scraper import scrape_job_details
@@ -11,9 +11,11 @@ from .preprocess import clean_text
 
 __all__ = [
     'explain_prediction',
+    'explain_local_batch',
     'analyze_url_security',
     'check_domain', 
     'verify_company',
+    'verify_company_async',
     'check_blacklist',
     'add_to_blacklist',
     'get_blacklist_stats',
@@ -0,0 +1,121 @@
+"""
+Analysis Context Module
+Holds every intermediate result of a single scan so each expensive step runs once.
+"""
+import asyncio
+from typing import Optional
+import numpy as np
+
+from .explain import explain_prediction, explain_prediction_async
+from .domain_check import analyze_url_security, analyze_url_security_async
+from .company_verify import verify_company, verify_company_async
+from .blacklist import check_blacklist
+from .executors import run_in_pool
+
+ALL_PARTS = ("explanation", "company_check", "blacklist_check", "url_security")
+
+
+class AnalysisContext:
+    """
+    Per-request analysis state shared by the analyze routes and the risk scorer.
+
+    Each result (TF-IDF vector, probabilities, explanation, company, blacklist
+    and URL checks) is computed lazily on first access and then reused by every
+    consumer. Results that are already known can be passed in as keyword
+    arguments, e.g. AnalysisContext(..., url_security=prior_result).
+    """
+
+    def __init__(
+        self,
+        title: str = "",
+        description: str = "",
+        company: str = "",
+        url: Optional[str] = None,
+        model=None,
+        vectorizer=None,
+        text: Optional[str] = None,
+        **precomputed
+    ):
+        self.title = title or ""
+        self.description = description or ""
+        self.company = company or ""
+        self.url = url or None
+        self.model = model
+        self.vectorizer = vectorizer
+        self.text = text if text is not None else f"{self.title} {self.description} {self.company}"
+        self._results = dict(precomputed)
+
+    def _get(self, key: str, compute):
+        if key not in self._results:
+            self._results[key] = compute()
+        return self._results[key]
+
+    @property
+    def has_model(self) -> bool:
+        return self.model is not None and self.vectorizer is not None
+
+    # ----- ML model -----
+    async def score_with(self, batcher):
+        """Fill the vector and probabilities through the shared InferenceBatcher."""
+        if "probabilities" not in self._results:
+            self._results["vector"], self._results["probabilities"] = await batcher.score(self.text)
+
+    async def prepare(self, parts=ALL_PARTS):
+        """
+        Resolve the blocking parts of the analysis concurrently on the executor
+        pools, so later property reads are served from the context.
+        """
+        jobs = {}
+        if "explanation" in parts and self.has_model and "explanation" not in self._results:
+            jobs["explanation"] = explain_prediction_async(
+                self.text, self.model, self.vectorizer,
+                input_vec=self.vector, pred_label=self.pred_label
+            )
+        if "company_check" in parts and self.company and "company_check" not in self._results:
+            jobs["company_check"] = verify_company_async(self.company)
+        if "blacklist_check" in parts and "blacklist_check" not in self._results:
+            jobs["blacklist_check"] = run_in_pool("db", check_blacklist, self.url, self.company or None)
+        if "url_security" in parts and self.url and "url_security" not in self._results:
+            jobs["url_security"] = analyze_url_security_async(self.url)
+            
+        if jobs:
+            values = await asyncio.gather(*jobs.values())
+            self._results.update(zip(jobs.keys(), values))
+
+    @property
+    def vector(self):
+        """Sparse TF-IDF row for the combined text."""
+        return self._get("vector", lambda: self.vectorizer.transform([self.text]))
+
+    @property
+    def probabilities(self):
+        return self._get("probabilities", lambda: self.model.predict_proba(self.vector)[0])
+
+    @property
+    def pred_label(self) -> int:
+        """1 = Real, 0 = Fake"""
+        return int(np.argmax(self.probabilities))
+
+    @property
+    def confidence(self) -> float:
+        return round(float(self.probabilities[self.pred_label]) * 100, 2)
+
+    @property
+    def explanation(self) -> dict:
+        return self._get("explanation", lambda: explain_prediction(
+            self.text, self.model, self.vectorizer,
+            input_vec=self.vector, pred_label=self.pred_label
+        ))
+
+    # ----- External checks -----
+    @property
+    def company_check(self) -> Optional[dict]:
+        return self._get("company_check", lambda: verify_company(self.company) if self.company else None)
+
+    @property
+    def blacklist_check(self) -> dict:
+        return self._get("blacklist_check", lambda: check_blacklist(url=self.url, company=self.company or None))
+
+    @property
+    def url_security(self) -> Optional[dict]:
+        return self._get("url_security", lambda: analyze_url_security(self.url) if self.url else None)
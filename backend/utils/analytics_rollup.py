@@ -0,0 +1,154 @@
+"""
+Analytics Rollup Module
+Daily prediction counts by type, result and risk level, maintained by a trigger on every insert.
+
+Backfill / rebuild from existing history (run from the backend folder):
+    python -m utils.analytics_rollup [--db data/predictions.db]
+"""
+import os
+import argparse
+
+from .db_pool import get_db
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_PATH = os.path.join(BASE_DIR, "data", "predictions.db")
+
+# Same test the dashboard always used for the fake/real split (LIKE is case-insensitive)
+RESULT_CLASS_SQL = "CASE WHEN {result} LIKE '%Fake%' THEN 'fake' ELSE 'real' END"
+
+ROLLUP_TRIGGER = "trg_predictions_rollup"
+
+# Writes to these tables change what the dashboard shows
+ANALYTICS_SOURCES = ("predictions", "reports", "feedback")
+
+# Bulk deletes skip the per-row triggers, so they bump the version with this instead
+BUMP_ANALYTICS_VERSION_SQL = "UPDATE data_versions SET version = version + 1 WHERE name = 'analytics'"
+
+
+def create_rollup_tables(conn) -> bool:
+    """
+    Create the rollup table and its insert trigger. Call inside a write transaction.
+    The first time the trigger is created the rollups are backfilled in the same
+    transaction, so no insert is ever counted twice or missed. Returns True if it backfilled.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS prediction_rollups (
+            day TEXT NOT NULL,
+            type TEXT NOT NULL,
+            result TEXT NOT NULL,
+            result_class TEXT NOT NULL,
+            risk_level TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, type, result, risk_level)
+        ) WITHOUT ROWID
+    """)
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = ?", (ROLLUP_TRIGGER,)
+    ).fetchone()
+    if exists:
+        return False
+
+    # NULLs are stored as '' because they are part of the key
+    conn.execute(f"""
+        CREATE TRIGGER {ROLLUP_TRIGGER} AFTER INSERT ON predictions
+        BEGIN
+            INSERT INTO prediction_rollups (day, type, result, result_class, risk_level, count)
+            VALUES (
+                substr(IFNULL(NEW.timestamp, ''), 1, 10), IFNULL(NEW.type, ''), IFNULL(NEW.result, ''),
+                {RESULT_CLASS_SQL.format(result="NEW.result")}, IFNULL(NEW.risk_level, ''), 1
+            )
+            ON CONFLICT(day, type, result, risk_level) DO UPDATE SET count = count + 1;
+        END
+    """)
+    backfill(conn)
+    return True
+
+
+def backfill(conn) -> int:
+    """Rebuild every rollup row from the predictions table. Returns the number of rollup rows."""
+    conn.execute("DELETE FROM prediction_rollups")
+    conn.execute(f"""
+        INSERT INTO prediction_rollups (day, type, result, result_class, risk_level, count)
+        SELECT substr(IFNULL(timestamp, ''), 1, 10), IFNULL(type, ''), IFNULL(result, ''),
+               {RESULT_CLASS_SQL.format(result="result")}, IFNULL(risk_level, ''), COUNT(*)
+        FROM predictions
+        GROUP BY 1, 2, 3, 5
+    """)
+    return conn.execute("SELECT COUNT(*) FROM prediction_rollups").fetchone()[0]
+
+
+def clear_rollups(conn):
+    """Empty the rollups (used together with DELETE FROM predictions)."""
+    conn.execute("DELETE FROM prediction_rollups")
+
+
+def create_version_tracking(conn):
+    """
+    A single 'analytics' counter in data_versions, bumped by an insert trigger on
+    every ANALYTICS_SOURCES table. Every worker process reads the same counter, so
+    it is a cheap, shared change marker for caches of dashboard data.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS data_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    conn.execute("INSERT OR IGNORE INTO data_versions (name, version) VALUES ('analytics', 0)")
+    for table in ANALYTICS_SOURCES:
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_analytics_version AFTER INSERT ON {table}
+            BEGIN
+                {BUMP_ANALYTICS_VERSION_SQL};
+            END
+        """)
+
+
+def read_analytics_version(conn) -> int:
+    row = conn.execute("SELECT version FROM data_versions WHERE name = 'analytics'").fetchone()
+    return row[0] if row else 0
+
+
+def read_prediction_summary(conn, trend_days: int = 7) -> dict:
+    """Totals, result breakdown, risk distribution and a daily fake/real trend over the last trend_days days (today included)."""
+    breakdown = {}
+    for result, count in conn.execute("SELECT result, SUM(count) FROM prediction_rollups GROUP BY result"):
+        breakdown[result or None] = count
+
+    risk_distribution = {
+        risk_level: count for risk_level, count in conn.execute(
+            "SELECT risk_level, SUM(count) FROM prediction_rollups WHERE risk_level != '' GROUP BY risk_level"
+        )
+    }
+
+    trend = [
+        {"date": day, "fake": fake or 0, "real": total - (fake or 0)}
+        for day, total, fake in conn.execute("""
+            SELECT day, SUM(count), SUM(CASE WHEN result_class = 'fake' THEN count ELSE 0 END)
+            FROM prediction_rollups
+            WHERE day >= date('now', ?)
+            GROUP BY day
+            ORDER BY day
+        """, (f"-{max(1, int(trend_days)) - 1} days",))
+    ]
+
+    return {
+        "total": sum(breakdown.values()),
+        "breakdown": breakdown,
+        "risk_distribution": risk_distribution,
+        "trend": trend
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild the prediction analytics rollups from history.")
+    parser.add_argument("--db", default=DB_PATH, help="Path to predictions.db")
+    args = parser.parse_args()
+
+    with get_db(args.db).writer() as conn:
+        created = create_rollup_tables(conn)
+        rows = conn.execute("SELECT COUNT(*) FROM prediction_rollups").fetchone()[0] if created else backfill(conn)
+        # Let running servers' dashboard caches pick up the rebuilt numbers
+        create_version_tracking(conn)
+        conn.execute(BUMP_ANALYTICS_VERSION_SQL)
+    print(f"[ROLLUP] {rows} rollup rows written for {args.db}")
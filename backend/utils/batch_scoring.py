@@ -0,0 +1,84 @@
+"""
+Batch Scoring Module
+Chunked CSV reading and vectorized scoring, so uploads of any size run in bounded memory.
+"""
+import os
+import numpy as np
+import pandas as pd
+
+# Rows read, vectorized and scored at a time
+CSV_CHUNK_ROWS = int(os.getenv("CSV_CHUNK_ROWS", "5000"))
+
+# Columns returned for every scored row
+RESULT_COLUMNS = ["Title", "Company", "Prediction", "Confidence (%)"]
+
+# Label columns that must not leak into the model input
+NON_TEXT_COLUMNS = ["Fraudulent", "Telecommuting"]
+COMPANY_COLUMNS = ["Company", "Company_profile", "Company_name", "Organization", "Employer"]
+TITLE_COLUMNS = ["title", "job_title"]
+
+
+def read_csv_chunks(source, chunk_rows: int = None):
+    """Yield DataFrames of at most chunk_rows rows with normalized ("Company_profile") column names."""
+    for chunk in pd.read_csv(source, chunksize=chunk_rows or CSV_CHUNK_ROWS):
+        chunk.columns = [str(col).strip().capitalize() for col in chunk.columns]
+        yield chunk
+
+
+def combine_text(df: pd.DataFrame) -> pd.Series:
+    """Space-join every text column per row (column-wise str.cat, no per-row Python)."""
+    text_columns = [c for c in df.columns if c not in NON_TEXT_COLUMNS]
+    if not text_columns:
+        return pd.Series([""] * len(df), index=df.index)
+    columns = [df[c].fillna("").astype(str) for c in text_columns]
+    return columns[0].str.cat(columns[1:], sep=" ") if len(columns) > 1 else columns[0]
+
+
+def score_texts(texts, model, vectorizer):
+    """Return (labels, confidences%) for a batch of texts in one transform + predict_proba call."""
+    probabilities = model.predict_proba(vectorizer.transform(texts))
+    return np.argmax(probabilities, axis=1), np.round(np.max(probabilities, axis=1) * 100, 2)
+
+
+def _find_column(df: pd.DataFrame, names):
+    lowered = {c.lower(): c for c in df.columns}
+    return next((lowered[name.lower()] for name in names if name.lower() in lowered), None)
+
+
+def score_frame(df: pd.DataFrame, model, vectorizer) -> pd.DataFrame:
+    """Score one chunk; returns a frame with RESULT_COLUMNS aligned to the input rows."""
+    labels, confidences = score_texts(combine_text(df), model, vectorizer)
+    return build_results(df, labels, confidences)
+
+
+def build_results(df: pd.DataFrame, labels, confidences) -> pd.DataFrame:
+    """RESULT_COLUMNS frame for a chunk from its per-row labels and confidences."""
+    company_col = _find_column(df, COMPANY_COLUMNS)
+    title_col = _find_column(df, TITLE_COLUMNS)
+    return pd.DataFrame({
+        "Title": df[title_col].fillna("") if title_col else "Unknown Job",
+        "Company": df[company_col].fillna("") if company_col else "Unknown",
+        "Prediction": np.where(labels == 1, "✅ Real Job", "❌ Fake Job"),
+        "Confidence (%)": confidences
+    }, index=df.index)
+
+
+def score_csv(source, model, vectorizer, chunk_rows: int = None):
+    """Yield one scored RESULT_COLUMNS frame per chunk of the CSV."""
+    for chunk in read_csv_chunks(source, chunk_rows):
+        if len(chunk):
+            yield score_frame(chunk, model, vectorizer)
+
+
+def prediction_rows(results: pd.DataFrame, timestamp: str, pred_type: str = "csv") -> list:
+    """predictions-table tuples (type, title, company, result, confidence, risk_score, risk_level, timestamp)."""
+    return list(zip(
+        [pred_type] * len(results),
+        results["Title"].astype(str),
+        results["Company"].astype(str),
+        results["Prediction"],
+        results["Confidence (%)"].astype(float),
+        [0] * len(results),
+        ["low"] * len(results),
+        [timestamp] * len(results)
+    ))
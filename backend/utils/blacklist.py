@@ -3,85 +3,122 @@ Scam Blacklist Database Module
 Manages a global database of reported scam URLs, domains, and company names.
 """
 import os
-import sqlite3
 from datetime import datetime
 from typing import Optional, List
 from urllib.parse import urlparse
 
+from .blacklist_index import BlacklistIndex, BlacklistFilter
+from .db_pool import get_db
+
 # Database path
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DB_PATH = os.path.join(BASE_DIR, "data", "blacklist.db")
+BLOOM_PATH = os.path.join(BASE_DIR, "data", "blacklist.bloom")
+
+# Pooled connections (pragmas applied once per connection)
+db = get_db(DB_PATH)
+
+# Minimum trigram similarity (0-1) for a company spelling variant to be reported as a possible match
+BLACKLIST_FUZZY_THRESHOLD = float(os.getenv("BLACKLIST_FUZZY_THRESHOLD", "0.7"))
 
 
-def init_blacklist_db():
-    """Initialize the blacklist database tables."""
+def init_blacklist_db(database=None):
+    """Initialize the blacklist database tables (in blacklist.db unless another pooled database is given)."""
     os.makedirs(os.path.join(BASE_DIR, "data"), exist_ok=True)
     
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    # Blacklisted URLs table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS blacklisted_urls (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            url TEXT UNIQUE NOT NULL,
-            domain TEXT,
-            report_count INTEGER DEFAULT 1,
-            first_reported TEXT,
-            last_reported TEXT,
-            severity TEXT DEFAULT 'medium',
-            details TEXT
-        )
-    """)
+    with (database or db).writer() as conn:
+        cursor = conn.cursor()
+        
+        # Blacklisted URLs table
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS blacklisted_urls (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT UNIQUE NOT NULL,
+                domain TEXT,
+                report_count INTEGER DEFAULT 1,
+                first_reported TEXT,
+                last_reported TEXT,
+                severity TEXT DEFAULT 'medium',
+                details TEXT
+            )
+        """)
     
-    # Blacklisted domains table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS blacklisted_domains (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            domain TEXT UNIQUE NOT NULL,
-            report_count INTEGER DEFAULT 1,
-            first_reported TEXT,
-            last_reported TEXT,
-            severity TEXT DEFAULT 'medium',
-            reason TEXT
-        )
-    """)
+        # Blacklisted domains table
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS blacklisted_domains (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                domain TEXT UNIQUE NOT NULL,
+                report_count INTEGER DEFAULT 1,
+                first_reported TEXT,
+                last_reported TEXT,
+                severity TEXT DEFAULT 'medium',
+                reason TEXT
+            )
+        """)
     
-    # Blacklisted company names table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS blacklisted_companies (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            company_name TEXT NOT NULL,
-            normalized_name TEXT UNIQUE,
-            report_count INTEGER DEFAULT 1,
-            first_reported TEXT,
-            last_reported TEXT,
-            aliases TEXT,
-            reason TEXT
-        )
-    """)
+        # Blacklisted company names table
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS blacklisted_companies (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                company_name TEXT NOT NULL,
+                normalized_name TEXT UNIQUE,
+                report_count INTEGER DEFAULT 1,
+                first_reported TEXT,
+                last_reported TEXT,
+                aliases TEXT,
+                reason TEXT
+            )
+        """)
     
-    # User reports tracking
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS user_reports (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            url TEXT,
-            company TEXT,
-            reporter TEXT,
-            details TEXT,
-            timestamp TEXT,
-            verified BOOLEAN DEFAULT 0,
-            status TEXT DEFAULT 'pending'
-        )
-    """)
+        # User reports tracking
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS user_reports (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT,
+                company TEXT,
+                reporter TEXT,
+                details TEXT,
+                timestamp TEXT,
+                verified BOOLEAN DEFAULT 0,
+                status TEXT DEFAULT 'pending'
+            )
+        """)
     
-    conn.commit()
-    conn.close()
+        # Incremental index/filter syncs read rows by change_seq: a counter bumped by triggers
+        # inside each writing transaction, so it follows commit order (unlike wall-clock stamps)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS blacklist_sequence (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                seq INTEGER NOT NULL
+            )
+        """)
+        cursor.execute("INSERT OR IGNORE INTO blacklist_sequence (id, seq) VALUES (1, 0)")
+        for table in ("blacklisted_urls", "blacklisted_domains", "blacklisted_companies"):
+            columns = {row[1] for row in cursor.execute(f"PRAGMA table_info({table})")}
+            if "change_seq" not in columns:
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN change_seq INTEGER")
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_seq ON {table}(change_seq)")
+            stamp = f"""
+                UPDATE blacklist_sequence SET seq = seq + 1 WHERE id = 1;
+                UPDATE {table} SET change_seq = (SELECT seq FROM blacklist_sequence WHERE id = 1) WHERE id = NEW.id;
+            """
+            cursor.execute(f"CREATE TRIGGER IF NOT EXISTS trg_{table}_seq_insert AFTER INSERT ON {table} BEGIN {stamp} END")
+            # The WHEN clause skips the trigger's own change_seq update
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_seq_update AFTER UPDATE ON {table}
+                WHEN NEW.change_seq IS OLD.change_seq BEGIN {stamp} END
+            """)
 
 
 # Initialize on module load
 init_blacklist_db()
 
+# In-memory mirror of the tables above; loaded on first possible hit
+blacklist_index = BlacklistIndex(DB_PATH)
+
+# Bloom filter in front of the index; most checks are negative and stop here
+blacklist_filter = BlacklistFilter(DB_PATH, BLOOM_PATH)
+
 
 def normalize_url(url: str) -> str:
     """Normalize URL for comparison."""
@@ -128,218 +165,321 @@ def add_to_blacklist(url: str = None, domain: str = None, company: str = None,
     Add an entry to the blacklist.
     Can blacklist URL, domain, or company name.
     """
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
     now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     
     results = {"added": [], "updated": []}
     
     try:
-        # Add URL
-        if url:
-            normalized_url = normalize_url(url)
-            domain_from_url = extract_domain_from_url(url)
+        with db.writer() as conn:
+            cursor = conn.cursor()
             
-            cursor.execute("""
-                INSERT INTO blacklisted_urls (url, domain, first_reported, last_reported, severity, details)
-                VALUES (?, ?, ?, ?, ?, ?)
-                ON CONFLICT(url) DO UPDATE SET
-                    report_count = report_count + 1,
-                    last_reported = ?,
-                    severity = CASE WHEN severity = 'critical' THEN 'critical' ELSE ? END
-            """, (normalized_url, domain_from_url, now, now, severity, details, now, severity))
+            # Add URL
+            if url:
+                normalized_url = normalize_url(url)
+                domain_from_url = extract_domain_from_url(url)
+            
+                cursor.execute("""
+                    INSERT INTO blacklisted_urls (url, domain, first_reported, last_reported, severity, details)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(url) DO UPDATE SET
+                        report_count = report_count + 1,
+                        last_reported = ?,
+                        severity = CASE WHEN severity = 'critical' THEN 'critical' ELSE ? END
+                """, (normalized_url, domain_from_url, now, now, severity, details, now, severity))
             
-            if cursor.rowcount > 0:
-                results["added"].append(f"URL: {normalized_url[:50]}...")
-            else:
-                results["updated"].append(f"URL: {normalized_url[:50]}...")
+                if cursor.rowcount > 0:
+                    results["added"].append(f"URL: {normalized_url[:50]}...")
+                else:
+                    results["updated"].append(f"URL: {normalized_url[:50]}...")
                 
-            # Also blacklist the domain if new
-            if domain_from_url:
-                domain = domain_from_url
+                # Also blacklist the domain if new
+                if domain_from_url:
+                    domain = domain_from_url
                 
-        # Add Domain
-        if domain:
-            cursor.execute("""
-                INSERT INTO blacklisted_domains (domain, first_reported, last_reported, severity, reason)
-                VALUES (?, ?, ?, ?, ?)
-                ON CONFLICT(domain) DO UPDATE SET
-                    report_count = report_count + 1,
-                    last_reported = ?
-            """, (domain.lower(), now, now, severity, details, now))
-            
-            results["added" if cursor.rowcount > 0 else "updated"].append(f"Domain: {domain}")
+            # Add Domain
+            if domain:
+                cursor.execute("""
+                    INSERT INTO blacklisted_domains (domain, first_reported, last_reported, severity, reason)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(domain) DO UPDATE SET
+                        report_count = report_count + 1,
+                        last_reported = ?
+                """, (domain.lower(), now, now, severity, details, now))
             
-        # Add Company
-        if company:
-            normalized = normalize_company_name(company)
-            cursor.execute("""
-                INSERT INTO blacklisted_companies (company_name, normalized_name, first_reported, last_reported, reason)
-                VALUES (?, ?, ?, ?, ?)
-                ON CONFLICT(normalized_name) DO UPDATE SET
-                    report_count = report_count + 1,
-                    last_reported = ?
-            """, (company, normalized, now, now, details, now))
+                results["added" if cursor.rowcount > 0 else "updated"].append(f"Domain: {domain}")
             
-            results["added" if cursor.rowcount > 0 else "updated"].append(f"Company: {company}")
+            # Add Company
+            if company:
+                normalized = normalize_company_name(company)
+                cursor.execute("""
+                    INSERT INTO blacklisted_companies (company_name, normalized_name, first_reported, last_reported, reason)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(normalized_name) DO UPDATE SET
+                        report_count = report_count + 1,
+                        last_reported = ?
+                """, (company, normalized, now, now, details, now))
             
-        conn.commit()
+                results["added" if cursor.rowcount > 0 else "updated"].append(f"Company: {company}")
         
     except Exception as e:
         results["error"] = str(e)
-    finally:
-        conn.close()
+        
+    # Pick up the new rows right away instead of waiting for the periodic sync
+    blacklist_filter.sync()
+    blacklist_index.sync()
         
     return results
 
 
-def check_blacklist(url: str = None, company: str = None) -> dict:
-    """
-    Check if URL or company is blacklisted.
-    Returns blacklist status and details.
-    """
-    result = {
+def _empty_check_result() -> dict:
+    return {
         "is_blacklisted": False,
         "url_blacklisted": False,
         "domain_blacklisted": False,
         "company_blacklisted": False,
         "matches": [],
+        "possible_matches": [],
         "severity": "none",
         "recommendation": ""
     }
-    
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+
+
+def _match_url(result: dict, normalized_url: str, domain: str):
+    """Fold URL and domain matches from the index into a check result."""
+    # Exact URL, or any reported URL on this domain / a parent domain
+    url_matches = blacklist_index.lookup_urls(normalized_url, domain)
+    if url_matches:
+        result["url_blacklisted"] = True
+        result["is_blacklisted"] = True
+        for match in url_matches:
+            result["matches"].append({
+                "type": "url",
+                "value": match[0],
+                "report_count": match[1],
+                "severity": match[2],
+                "details": match[3]
+            })
+            if match[2] == "critical":
+                result["severity"] = "critical"
+            elif match[2] == "high" and result["severity"] != "critical":
+                result["severity"] = "high"
+                
+    # Domain match (including parent domains)
+    domain_matches = blacklist_index.lookup_domains(domain)
+    if domain_matches:
+        result["domain_blacklisted"] = True
+        result["is_blacklisted"] = True
+        for match in domain_matches:
+            result["matches"].append({
+                "type": "domain",
+                "value": match[0],
+                "report_count": match[1],
+                "severity": match[2]
+            })
+
+
+def _match_company(result: dict, normalized: str, exact_possible: bool = True):
+    """
+    Exact match on the normalized name/aliases blacklists the company. Otherwise
+    the closest spelling variant is only reported under possible_matches, since a
+    similar name alone does not make a company the reported one.
+    """
+    match = blacklist_index.lookup_company(normalized) if exact_possible else None
+    if match:
+        result["company_blacklisted"] = True
+        result["is_blacklisted"] = True
+        result["matches"].append({
+            "type": "company",
+            "value": match[0],
+            "report_count": match[1],
+            "reason": match[2]
+        })
+        return
+        
+    fuzzy = blacklist_index.lookup_company_fuzzy(normalized, k=1, threshold=BLACKLIST_FUZZY_THRESHOLD)
+    if fuzzy:
+        match, matched_key, similarity = fuzzy[0]
+        result["possible_matches"].append({
+            "type": "company",
+            "value": match[0],
+            "report_count": match[1],
+            "reason": match[2],
+            "match": "fuzzy",
+            "matched_name": matched_key,
+            "similarity": similarity
+        })
+
+
+def find_similar_companies(company: str, k: int = 5, threshold: float = 0.5) -> List[dict]:
+    """Top-k blacklisted companies whose names resemble the given one, with similarity scores."""
+    blacklist_index.ensure_loaded()
+    return [
+        {"company_name": record[0], "matched_name": key, "similarity": similarity,
+         "report_count": record[1], "reason": record[2]}
+        for record, key, similarity in blacklist_index.lookup_company_fuzzy(normalize_company_name(company), k, threshold)
+    ]
+
+
+def _set_recommendation(result: dict):
+    if result["is_blacklisted"]:
+        total_reports = sum(m.get("report_count", 1) for m in result["matches"])
+        
+        if result["severity"] == "critical" or total_reports >= 5:
+            result["severity"] = "critical"
+            result["recommendation"] = "🚨 CONFIRMED SCAM! This has been reported multiple times. DO NOT apply."
+        elif total_reports >= 3:
+            result["severity"] = "high"
+            result["recommendation"] = "⚠️ Multiple scam reports exist for this job/company. Avoid!"
+        else:
+            result["severity"] = "medium"
+            result["recommendation"] = "⚠️ This has been flagged as suspicious. Proceed with caution."
+    elif result["possible_matches"]:
+        match = result["possible_matches"][0]
+        result["severity"] = "low"
+        result["recommendation"] = (f"ℹ️ Company name resembles a reported company ({match['value']}, "
+                                    f"{round(match['similarity'] * 100)}% similar). Verify the employer's identity.")
+
+
+def check_blacklist(url: str = None, company: str = None) -> dict:
+    """
+    Check if URL or company is blacklisted.
+    Returns blacklist status and details.
+    """
+    result = _empty_check_result()
     
     try:
-        # Check URL
-        if url:
-            normalized_url = normalize_url(url)
-            domain = extract_domain_from_url(url)
-            
-            # Exact URL match
-            cursor.execute("""
-                SELECT url, report_count, severity, details FROM blacklisted_urls 
-                WHERE url = ? OR url LIKE ?
-            """, (normalized_url, f"%{domain}%"))
-            
-            url_matches = cursor.fetchall()
-            if url_matches:
-                result["url_blacklisted"] = True
-                result["is_blacklisted"] = True
-                for match in url_matches:
-                    result["matches"].append({
-                        "type": "url",
-                        "value": match[0],
-                        "report_count": match[1],
-                        "severity": match[2],
-                        "details": match[3]
-                    })
-                    if match[2] == "critical":
-                        result["severity"] = "critical"
-                    elif match[2] == "high" and result["severity"] != "critical":
-                        result["severity"] = "high"
-                        
-            # Domain match
-            cursor.execute("""
-                SELECT domain, report_count, severity FROM blacklisted_domains 
-                WHERE domain = ?
-            """, (domain,))
-            
-            domain_matches = cursor.fetchall()
-            if domain_matches:
-                result["domain_blacklisted"] = True
-                result["is_blacklisted"] = True
-                for match in domain_matches:
-                    result["matches"].append({
-                        "type": "domain",
-                        "value": match[0],
-                        "report_count": match[1],
-                        "severity": match[2]
-                    })
-                    
-        # Check Company
-        if company:
-            normalized = normalize_company_name(company)
-            
-            cursor.execute("""
-                SELECT company_name, report_count, reason FROM blacklisted_companies 
-                WHERE normalized_name = ? OR company_name LIKE ?
-            """, (normalized, f"%{company}%"))
-            
-            company_matches = cursor.fetchall()
-            if company_matches:
-                result["company_blacklisted"] = True
-                result["is_blacklisted"] = True
-                for match in company_matches:
-                    result["matches"].append({
-                        "type": "company",
-                        "value": match[0],
-                        "report_count": match[1],
-                        "reason": match[2]
-                    })
+        blacklist_filter.ensure_current()
+        normalized_url = normalize_url(url) if url else ""
+        domain = extract_domain_from_url(url) if url else ""
+        normalized = normalize_company_name(company) if company else ""
+        
+        # Negative fast path: skip whatever the bloom filter rules out.
+        # Company names always reach the index, since spelling variants can't be ruled out by hash.
+        check_url = bool(url) and blacklist_filter.might_match_url(normalized_url, domain)
+        exact_company = bool(normalized) and blacklist_filter.might_match_company(normalized)
+        if check_url or normalized:
+            blacklist_index.ensure_loaded()
+        
+        if check_url:
+            _match_url(result, normalized_url, domain)
+        if normalized:
+            _match_company(result, normalized, exact_company)
                     
-        # Set recommendation
-        if result["is_blacklisted"]:
-            total_reports = sum(m.get("report_count", 1) for m in result["matches"])
-            
-            if result["severity"] == "critical" or total_reports >= 5:
-                result["severity"] = "critical"
-                result["recommendation"] = "🚨 CONFIRMED SCAM! This has been reported multiple times. DO NOT apply."
-            elif total_reports >= 3:
-                result["severity"] = "high"
-                result["recommendation"] = "⚠️ Multiple scam reports exist for this job/company. Avoid!"
-            else:
-                result["severity"] = "medium"
-                result["recommendation"] = "⚠️ This has been flagged as suspicious. Proceed with caution."
+        blacklist_filter.record(check_url or exact_company, result["is_blacklisted"])
+        _set_recommendation(result)
                 
     except Exception as e:
         result["error"] = str(e)
-    finally:
-        conn.close()
         
     return result
 
 
+def check_blacklist_bulk(urls: List[str] = None, domains: List[str] = None, companies: List[str] = None) -> dict:
+    """
+    Check many URLs, domains and company names in one call.
+    Inputs are normalized and de-duplicated, the bloom filter drops the
+    definite URL/domain negatives as a set, and only the remaining keys
+    (plus company names, for fuzzy matching) hit the index.
+    Returns one verdict per input, in input order.
+    """
+    blacklist_filter.ensure_current()
+    
+    url_keys = {u: (normalize_url(u), extract_domain_from_url(u)) for u in set(urls or []) if u}
+    domain_keys = {d: ("", extract_domain_from_url(d)) for d in set(domains or []) if d}
+    company_keys = {c: normalize_company_name(c) for c in set(companies or []) if c}
+    
+    # Unique lookup keys that survive the filter
+    possible_urls = {key for key in set(url_keys.values()) | set(domain_keys.values())
+                     if blacklist_filter.might_match_url(*key)}
+    unique_companies = {key for key in set(company_keys.values()) if key}
+    exact_companies = {key for key in unique_companies if blacklist_filter.might_match_company(key)}
+    
+    if possible_urls or unique_companies:
+        blacklist_index.ensure_loaded()
+    
+    verdicts = {}
+    for key in possible_urls:
+        verdicts[("url", key)] = result = _empty_check_result()
+        _match_url(result, *key)
+        _set_recommendation(result)
+    for key in unique_companies:
+        verdicts[("company", key)] = result = _empty_check_result()
+        _match_company(result, key, key in exact_companies)
+        _set_recommendation(result)
+    
+    def verdict(value, kind, key):
+        result = verdicts.get((kind, key))
+        if result is None:
+            return {"input": value, "is_blacklisted": False, "severity": "none", "recommendation": "",
+                    "matches": [], "possible_matches": []}
+        return {
+            "input": value,
+            "is_blacklisted": result["is_blacklisted"],
+            "severity": result["severity"],
+            "recommendation": result["recommendation"],
+            "matches": result["matches"],
+            "possible_matches": result["possible_matches"]
+        }
+    
+    results = {
+        "urls": [verdict(u, "url", url_keys.get(u)) for u in urls or []],
+        "domains": [verdict(d, "url", domain_keys.get(d)) for d in domains or []],
+        "companies": [verdict(c, "company", company_keys.get(c)) for c in companies or []]
+    }
+    checked = sum(len(items) for items in results.values())
+    blacklisted = sum(1 for items in results.values() for item in items if item["is_blacklisted"])
+    unique_urls = set(url_keys.values()) | set(domain_keys.values())
+    blacklist_filter.record(False, False, count=len(unique_urls) - len(possible_urls))
+    for (kind, key), result in verdicts.items():
+        if kind == "url" or key in exact_companies:
+            blacklist_filter.record(True, result["is_blacklisted"])
+    
+    return {
+        "results": results,
+        "summary": {"checked": checked, "unique_lookups": len(verdicts), "blacklisted": blacklisted}
+    }
+
+
 def get_recent_blacklist_entries(limit: int = 20) -> List[dict]:
     """Get recently added blacklist entries."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
     entries = []
     
     try:
-        # Get recent URLs
-        cursor.execute("""
-            SELECT 'url' as type, url as value, report_count, severity, first_reported 
-            FROM blacklisted_urls 
-            ORDER BY first_reported DESC LIMIT ?
-        """, (limit // 2,))
-        entries.extend([dict(zip(['type', 'value', 'report_count', 'severity', 'date'], row)) for row in cursor.fetchall()])
+        with db.reader() as conn:
+            cursor = conn.cursor()
+            # Get recent URLs
+            cursor.execute("""
+                SELECT 'url' as type, url as value, report_count, severity, first_reported 
+                FROM blacklisted_urls 
+                ORDER BY first_reported DESC LIMIT ?
+            """, (limit // 2,))
+            entries.extend([dict(zip(['type', 'value', 'report_count', 'severity', 'date'], row)) for row in cursor.fetchall()])
         
-        # Get recent companies
-        cursor.execute("""
-            SELECT 'company' as type, company_name as value, report_count, 'medium' as severity, first_reported 
-            FROM blacklisted_companies 
-            ORDER BY first_reported DESC LIMIT ?
-        """, (limit // 2,))
-        entries.extend([dict(zip(['type', 'value', 'report_count', 'severity', 'date'], row)) for row in cursor.fetchall()])
+            # Get recent companies
+            cursor.execute("""
+                SELECT 'company' as type, company_name as value, report_count, 'medium' as severity, first_reported 
+                FROM blacklisted_companies 
+                ORDER BY first_reported DESC LIMIT ?
+            """, (limit // 2,))
+            entries.extend([dict(zip(['type', 'value', 'report_count', 'severity', 'date'], row)) for row in cursor.fetchall()])
         
     except Exception as e:
         pass
-    finally:
-        conn.close()
         
     # Sort by date
     entries.sort(key=lambda x: x.get('date', ''), reverse=True)
     return entries[:limit]
 
 
-def get_blacklist_stats() -> dict:
-    """Get blacklist statistics."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
+def read_blacklist_version() -> int:
+    """The blacklist change sequence; it moves on every insert or update, so it versions the counts below."""
+    with db.reader() as conn:
+        row = conn.execute("SELECT seq FROM blacklist_sequence WHERE id = 1").fetchone()
+    return row[0] if row else 0
+
+
+def get_blacklist_counts() -> dict:
+    """Blacklist totals read from the database (the same in every worker)."""
     stats = {
         "total_urls": 0,
         "total_domains": 0,
@@ -349,25 +489,32 @@ def get_blacklist_stats() -> dict:
     }
     
     try:
-        cursor.execute("SELECT COUNT(*) FROM blacklisted_urls")
-        stats["total_urls"] = cursor.fetchone()[0]
+        with db.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT COUNT(*) FROM blacklisted_urls")
+            stats["total_urls"] = cursor.fetchone()[0]
         
-        cursor.execute("SELECT COUNT(*) FROM blacklisted_domains")
-        stats["total_domains"] = cursor.fetchone()[0]
+            cursor.execute("SELECT COUNT(*) FROM blacklisted_domains")
+            stats["total_domains"] = cursor.fetchone()[0]
         
-        cursor.execute("SELECT COUNT(*) FROM blacklisted_companies")
-        stats["total_companies"] = cursor.fetchone()[0]
+            cursor.execute("SELECT COUNT(*) FROM blacklisted_companies")
+            stats["total_companies"] = cursor.fetchone()[0]
         
-        cursor.execute("SELECT SUM(report_count) FROM blacklisted_urls")
-        result = cursor.fetchone()[0]
-        stats["total_reports"] = result if result else 0
+            cursor.execute("SELECT SUM(report_count) FROM blacklisted_urls")
+            result = cursor.fetchone()[0]
+            stats["total_reports"] = result if result else 0
         
-        cursor.execute("SELECT COUNT(*) FROM blacklisted_urls WHERE severity = 'critical'")
-        stats["critical_count"] = cursor.fetchone()[0]
+            cursor.execute("SELECT COUNT(*) FROM blacklisted_urls WHERE severity = 'critical'")
+            stats["critical_count"] = cursor.fetchone()[0]
         
     except Exception as e:
         stats["error"] = str(e)
-    finally:
-        conn.close()
-        
+    return stats
+
+
+def get_blacklist_stats() -> dict:
+    """Get blacklist statistics, with this process's index and bloom filter counters."""
+    stats = get_blacklist_counts()
+    stats["index"] = blacklist_index.get_stats()
+    stats["bloom_filter"] = blacklist_filter.get_stats()
     return stats
@@ -0,0 +1,404 @@
+"""
+Blacklist Index Module
+In-memory lookup structures (exact index and bloom filter) over the blacklist tables so checks never scan SQLite.
+"""
+import os
+import time
+import threading
+
+from .bloom_filter import BloomFilter
+from .db_pool import get_db
+from .fuzzy_index import TrigramIndex
+
+# How often (seconds) to pull rows written by other worker processes
+BLACKLIST_SYNC_INTERVAL = float(os.getenv("BLACKLIST_SYNC_INTERVAL", "30"))
+# How often (seconds) a changed bloom filter is written back to disk (and at shutdown)
+BLACKLIST_BLOOM_SAVE_INTERVAL = float(os.getenv("BLACKLIST_BLOOM_SAVE_INTERVAL", "300"))
+
+# Negative fast path: sized for this many keys at this false-positive rate
+BLACKLIST_BLOOM_CAPACITY = int(os.getenv("BLACKLIST_BLOOM_CAPACITY", "1000000"))
+BLACKLIST_BLOOM_FP_RATE = float(os.getenv("BLACKLIST_BLOOM_FP_RATE", "0.001"))
+
+
+def read_changes(db_path: str, watermarks: dict):
+    """
+    Yield (kind, row) for blacklist rows inserted or updated after the per-table
+    change_seq watermarks ("urls", "domains", "companies"), advancing them as rows
+    are read. change_seq is assigned inside the writing transaction and writers are
+    serialized, so a row can never become visible behind an advanced watermark.
+    A table missing from watermarks is read in full.
+    """
+    queries = [
+        ("url", "urls", "SELECT url, domain, report_count, severity, details, change_seq FROM blacklisted_urls"),
+        ("domain", "domains", "SELECT domain, report_count, severity, change_seq FROM blacklisted_domains"),
+        ("company", "companies",
+         "SELECT company_name, normalized_name, aliases, report_count, reason, change_seq FROM blacklisted_companies"),
+    ]
+    with get_db(db_path).reader() as conn:
+        for kind, table, query in queries:
+            # First load reads everything (including rows from before change_seq existed);
+            # later syncs are an index range scan on change_seq
+            if table in watermarks:
+                rows = conn.execute(f"{query} WHERE change_seq > ?", (watermarks[table],))
+            else:
+                rows = conn.execute(query)
+                watermarks[table] = 0
+            for row in rows:
+                change_seq = row[-1]
+                if change_seq and change_seq > watermarks.get(table, 0):
+                    watermarks[table] = change_seq
+                yield kind, row[:-1]
+
+
+def company_keys(normalized: str, aliases: str = None) -> set:
+    """Lookup keys for a company row: its normalized name plus any comma-separated aliases."""
+    keys = {normalized} if normalized else set()
+    keys.update(alias.strip().lower() for alias in (aliases or "").split(",") if alias.strip())
+    return keys
+
+
+def parent_domains(domain: str) -> list:
+    """jobs.evil.com -> ["jobs.evil.com", "evil.com", "com"]"""
+    labels = (domain or "").lower().split(".")
+    return [".".join(labels[i:]) for i in range(len(labels))] if domain else []
+
+
+class _DomainNode:
+    """One label in the reversed-label trie (com -> example -> jobs)."""
+    __slots__ = ("children", "domain", "urls")
+
+    def __init__(self):
+        self.children = {}
+        self.domain = None   # (domain, report_count, severity) if this exact domain is blacklisted
+        self.urls = None     # set of blacklisted URL keys hosted on this exact domain
+
+
+class BlacklistIndex:
+    """
+    Exact-URL hash map, reversed-label domain trie, normalized company map and
+    company trigram index, loaded from blacklist.db and kept current incrementally.
+
+    A lookup for jobs.evil.com walks com -> evil -> jobs, so a blacklisted
+    evil.com also covers its subdomains. Lookups cost O(1) for URLs and
+    companies and O(labels) for domains regardless of table size.
+    SQLite remains the source of truth; the index only mirrors it.
+    """
+
+    def __init__(self, db_path: str, sync_interval: float = None):
+        self.db_path = db_path
+        self.sync_interval = BLACKLIST_SYNC_INTERVAL if sync_interval is None else sync_interval
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._next_sync = 0
+        self._watermarks = {}
+        self._stats = {"loads": 0, "syncs": 0, "rows_applied": 0, "lookups": 0, "load_ms": 0}
+        self._reset()
+
+    def _reset(self):
+        self._urls = {}          # url -> (url, report_count, severity, details)
+        self._root = _DomainNode()
+        self._domain_count = 0
+        self._companies = {}     # normalized name or alias -> (company_name, report_count, reason)
+        self._company_keys = {}  # normalized name -> keys it is indexed under (name + aliases)
+        self._fuzzy = TrigramIndex()  # company keys by trigram, for spelling variants
+
+    # ----- Loading -----
+    def ensure_loaded(self):
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self.load()
+        elif time.monotonic() >= self._next_sync:
+            self.sync()
+
+    def load(self):
+        """Full rebuild from SQLite."""
+        start = time.perf_counter()
+        with self._lock:
+            self._reset()
+            self._watermarks = {}
+            self._apply_changes()
+            self._loaded = True
+            self._stats["loads"] += 1
+            self._stats["load_ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+    def sync(self) -> int:
+        """
+        Apply rows inserted or updated since the last sync (by any process).
+        A no-op until the index is loaded, since the first load reads everything.
+        """
+        with self._lock:
+            if not self._loaded:
+                return 0
+            applied = self._apply_changes()
+            self._stats["syncs"] += 1
+            return applied
+
+    def _apply_changes(self) -> int:
+        # Called with the lock held
+        applied = 0
+        for kind, row in read_changes(self.db_path, self._watermarks):
+            if kind == "url":
+                url, domain, report_count, severity, details = row
+                self._put_url(url, domain, (url, report_count, severity, details))
+            elif kind == "domain":
+                domain, report_count, severity = row
+                node = self._node(domain, create=True)
+                if node.domain is None:
+                    self._domain_count += 1
+                node.domain = (domain, report_count, severity)
+            else:
+                company_name, normalized, aliases, report_count, reason = row
+                self._put_company(normalized, aliases, (company_name, report_count, reason))
+            applied += 1
+        self._next_sync = time.monotonic() + self.sync_interval
+        self._stats["rows_applied"] += applied
+        return applied
+
+    # ----- Mutation -----
+    def _node(self, domain: str, create: bool = False):
+        node = self._root
+        for label in reversed((domain or "").lower().split(".")):
+            child = node.children.get(label)
+            if child is None:
+                if not create:
+                    return None
+                child = node.children[label] = _DomainNode()
+            node = child
+        return node
+
+    def _put_url(self, url: str, domain: str, record: tuple):
+        self._urls[url] = record
+        if domain:
+            node = self._node(domain, create=True)
+            if node.urls is None:
+                node.urls = set()
+            node.urls.add(url)
+
+    def _put_company(self, normalized: str, aliases: str, record: tuple):
+        if not normalized:
+            return
+        keys = company_keys(normalized, aliases)
+        for stale in self._company_keys.get(normalized, set()) - keys:
+            self._companies.pop(stale, None)
+            self._fuzzy.remove(stale)
+        for key in keys:
+            if key not in self._companies:
+                self._fuzzy.add(key)
+            self._companies[key] = record
+        self._company_keys[normalized] = keys
+
+    # ----- Lookups -----
+    def lookup_urls(self, url: str, domain: str) -> list:
+        """The exact URL plus every blacklisted URL on this domain or a parent domain."""
+        with self._lock:
+            self._stats["lookups"] += 1
+            keys = []
+            if url in self._urls:
+                keys.append(url)
+            for node in self._walk(domain):
+                if node.urls:
+                    keys.extend(key for key in node.urls if key != url)
+            return [self._urls[key] for key in keys]
+
+    def lookup_domains(self, domain: str) -> list:
+        """Blacklisted entries for this domain or any parent domain."""
+        with self._lock:
+            self._stats["lookups"] += 1
+            return [node.domain for node in self._walk(domain) if node.domain]
+
+    def lookup_company(self, normalized: str):
+        with self._lock:
+            self._stats["lookups"] += 1
+            return self._companies.get(normalized)
+
+    def lookup_company_fuzzy(self, name: str, k: int = 5, threshold: float = 0.7) -> list:
+        """Top-k (record, matched_key, similarity) for near-variants of a company name."""
+        with self._lock:
+            self._stats["lookups"] += 1
+            matches = []
+            seen = set()
+            for key, similarity, _ in self._fuzzy.search(name, k=k * 2, threshold=threshold):
+                record = self._companies.get(key)
+                if record is None or record in seen:
+                    continue
+                seen.add(record)
+                matches.append((record, key, similarity))
+            return matches[:k]
+
+    def _walk(self, domain: str):
+        """Trie nodes along the path of a domain, from the TLD down."""
+        if not domain:
+            return
+        node = self._root
+        for label in reversed(domain.lower().split(".")):
+            node = node.children.get(label)
+            if node is None:
+                return
+            yield node
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({
+                "loaded": self._loaded,
+                "urls": len(self._urls),
+                "domains": self._domain_count,
+                "companies": len(self._company_keys),
+                "company_keys": len(self._companies),
+                "fuzzy": self._fuzzy.get_stats(),
+                "watermarks": dict(self._watermarks)
+            })
+        return stats
+
+
+class BlacklistFilter:
+    """
+    Bloom filter over every blacklisted URL, domain (including hosts of
+    reported URLs) and company key.
+
+    check_blacklist consults it first and only goes to the exact index when it
+    reports a possible hit, so the common negative case touches neither SQLite
+    nor the full index. The filter is persisted next to blacklist.db with its
+    sync watermarks, so startup loads it from disk and only catches up on rows
+    reported since it was saved. Rows written by other workers are picked up
+    by the same periodic catch-up. Changes are written back at most every
+    BLACKLIST_BLOOM_SAVE_INTERVAL seconds and on flush() at shutdown.
+    """
+
+    def __init__(self, db_path: str, path: str, capacity: int = None, fp_rate: float = None, sync_interval: float = None):
+        self.db_path = db_path
+        self.path = path
+        self.capacity = capacity or BLACKLIST_BLOOM_CAPACITY
+        self.fp_rate = fp_rate or BLACKLIST_BLOOM_FP_RATE
+        self.sync_interval = BLACKLIST_SYNC_INTERVAL if sync_interval is None else sync_interval
+        self._lock = threading.RLock()
+        self._bloom = None
+        self._next_sync = 0
+        self._dirty = False
+        self._last_save = time.monotonic()
+        self._stats = {"checks": 0, "negatives": 0, "possible_hits": 0, "false_positives": 0, "rebuilds": 0, "saves": 0}
+
+    # ----- Keys -----
+    @staticmethod
+    def url_keys(url: str, domain: str) -> list:
+        """Keys whose presence means check_blacklist could find a URL or domain match."""
+        keys = [f"u:{url}"] if url else []
+        keys.extend(f"d:{parent}" for parent in parent_domains(domain))
+        return keys
+
+    def _add_row(self, bloom, kind: str, row: tuple):
+        if kind == "url":
+            bloom.add(f"u:{row[0]}")
+            if row[1]:
+                bloom.add(f"d:{row[1].lower()}")  # hosts of reported URLs share the domain keys
+        elif kind == "domain":
+            bloom.add(f"d:{row[0].lower()}")
+        else:
+            for key in company_keys(row[1], row[2]):
+                bloom.add(f"c:{key}")
+
+    # ----- Lifecycle -----
+    def ensure_current(self):
+        if self._bloom is None:
+            with self._lock:
+                if self._bloom is None:
+                    self._open()
+        elif time.monotonic() >= self._next_sync:
+            self.sync()
+
+    def _open(self):
+        # Called with the lock held
+        try:
+            bloom = BloomFilter.load(self.path)
+            if bloom.fp_rate != self.fp_rate or bloom.metadata.get("db_path") != self.db_path:
+                raise ValueError("settings changed")
+            if bloom.metadata.get("sequence") != "change_seq":
+                raise ValueError("saved with timestamp watermarks")
+            self._bloom = bloom
+            self.sync()
+        except FileNotFoundError:
+            self.rebuild()
+        except Exception as e:
+            print(f"[BLACKLIST] Rebuilding bloom filter ({e})")
+            self.rebuild()
+
+    def rebuild(self):
+        """Build a fresh filter from the whole database (sized for growth) and persist it."""
+        with self._lock:
+            rows = []
+            watermarks = {}
+            for kind, row in read_changes(self.db_path, watermarks):
+                rows.append((kind, row))
+            bloom = BloomFilter(capacity=max(self.capacity, 2 * len(rows)), fp_rate=self.fp_rate)
+            for kind, row in rows:
+                self._add_row(bloom, kind, row)
+            bloom.metadata = {"db_path": self.db_path, "watermarks": watermarks, "sequence": "change_seq"}
+            self._bloom = bloom
+            self._stats["rebuilds"] += 1
+            self._next_sync = time.monotonic() + self.sync_interval
+            self._save()
+
+    def sync(self) -> int:
+        """
+        Add rows reported since the last sync and persist if anything changed.
+        A no-op until the filter is opened, which catches up on its own.
+        """
+        with self._lock:
+            bloom = self._bloom
+            if bloom is None:
+                return 0
+            watermarks = bloom.metadata.setdefault("watermarks", {})
+            applied = 0
+            for kind, row in read_changes(self.db_path, watermarks):
+                self._add_row(bloom, kind, row)
+                applied += 1
+            self._next_sync = time.monotonic() + self.sync_interval
+            if bloom.is_full:
+                self.rebuild()
+            elif applied:
+                self._dirty = True
+                if time.monotonic() - self._last_save >= BLACKLIST_BLOOM_SAVE_INTERVAL:
+                    self._save()
+            return applied
+
+    def flush(self):
+        """Persist unsaved changes (called at shutdown)."""
+        with self._lock:
+            if self._dirty and self._bloom is not None:
+                self._save()
+
+    def _save(self):
+        try:
+            self._bloom.save(self.path)
+            self._dirty = False
+            self._last_save = time.monotonic()
+            self._stats["saves"] += 1
+        except OSError as e:
+            print(f"[BLACKLIST] Could not persist bloom filter: {e}")
+
+    # ----- Checks -----
+    def might_match_url(self, url: str, domain: str) -> bool:
+        bloom = self._bloom
+        return any(bloom.might_contain(key) for key in self.url_keys(url, domain))
+
+    def might_match_company(self, normalized: str) -> bool:
+        return bool(normalized) and self._bloom.might_contain(f"c:{normalized}")
+
+    def record(self, possible: bool, found: bool, count: int = 1):
+        """Track how often the filter short-circuits and how often it was wrong."""
+        self._stats["checks"] += count
+        if not possible:
+            self._stats["negatives"] += count
+        else:
+            self._stats["possible_hits"] += count
+            if not found:
+                self._stats["false_positives"] += count
+
+    def get_stats(self) -> dict:
+        stats = dict(self._stats)
+        stats["path"] = self.path
+        if self._bloom is not None:
+            stats.update(self._bloom.get_stats())
+            stats["memory_kb"] = round(stats["memory_bytes"] / 1024, 1)
+        return stats
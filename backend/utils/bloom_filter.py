@@ -0,0 +1,111 @@
+"""
+Bloom Filter Module
+Compact probabilistic set used as a negative fast path in front of exact lookups.
+"""
+import os
+import json
+import math
+import struct
+import hashlib
+import threading
+
+_MAGIC = b"FJBF1"
+_HEADER = struct.Struct("<5sQIQQdI")  # magic, bits, hashes, count, capacity, fp_rate, metadata length
+
+
+class BloomFilter:
+    """
+    Sized from an expected capacity and a target false-positive rate.
+    might_contain() never returns False for a key that was added.
+    """
+
+    def __init__(self, capacity: int = 100000, fp_rate: float = 0.01):
+        self.capacity = max(1, int(capacity))
+        self.fp_rate = min(0.5, max(1e-9, float(fp_rate)))
+        self.num_bits = max(8, int(math.ceil(-self.capacity * math.log(self.fp_rate) / (math.log(2) ** 2))))
+        self.num_hashes = max(1, int(round(self.num_bits / self.capacity * math.log(2))))
+        self.count = 0
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self._lock = threading.Lock()
+        self.metadata = {}
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, key: str) -> bool:
+        """Add a key. Returns False if it was (probably) already present."""
+        with self._lock:
+            changed = False
+            for pos in self._positions(key):
+                mask = 1 << (pos & 7)
+                if not self._bits[pos >> 3] & mask:
+                    self._bits[pos >> 3] |= mask
+                    changed = True
+            if changed:
+                self.count += 1
+            return changed
+
+    def might_contain(self, key: str) -> bool:
+        bits = self._bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    def __contains__(self, key: str) -> bool:
+        return self.might_contain(key)
+
+    @property
+    def is_full(self) -> bool:
+        return self.count > self.capacity
+
+    def estimated_fp_rate(self) -> float:
+        """Expected false-positive rate at the current fill level."""
+        return (1 - math.exp(-self.num_hashes * self.count / self.num_bits)) ** self.num_hashes
+
+    # ----- Persistence -----
+    def save(self, path: str):
+        """
+        Write atomically (temp file + rename) so readers never see a partial filter.
+        self.metadata (JSON-serializable) is stored alongside the bits.
+        """
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with self._lock:
+            metadata = json.dumps(self.metadata).encode("utf-8")
+            header = _HEADER.pack(_MAGIC, self.num_bits, self.num_hashes, self.count,
+                                  self.capacity, self.fp_rate, len(metadata))
+            with open(tmp_path, "wb") as f:
+                f.write(header)
+                f.write(metadata)
+                f.write(self._bits)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "BloomFilter":
+        with open(path, "rb") as f:
+            magic, num_bits, num_hashes, count, capacity, fp_rate, meta_len = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != _MAGIC:
+                raise ValueError(f"Not a bloom filter file: {path}")
+            metadata = json.loads(f.read(meta_len) or b"{}")
+            bits = bytearray(f.read())
+        if len(bits) != (num_bits + 7) // 8:
+            raise ValueError(f"Truncated bloom filter file: {path}")
+        bloom = cls.__new__(cls)
+        bloom.capacity, bloom.fp_rate = capacity, fp_rate
+        bloom.num_bits, bloom.num_hashes, bloom.count = num_bits, num_hashes, count
+        bloom._bits = bits
+        bloom._lock = threading.Lock()
+        bloom.metadata = metadata
+        return bloom
+
+    def get_stats(self) -> dict:
+        return {
+            "capacity": self.capacity,
+            "count": self.count,
+            "bits": self.num_bits,
+            "hashes": self.num_hashes,
+            "memory_bytes": len(self._bits),
+            "target_fp_rate": self.fp_rate,
+            "estimated_fp_rate": round(self.estimated_fp_rate(), 6)
+        }
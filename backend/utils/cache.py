@@ -0,0 +1,342 @@
+"""
+Caching Primitives Module
+Thread-safe TTL/LRU cache, SQLite-backed persistent tier and in-flight request
+deduplication shared by the lookup modules.
+"""
+import os
+import json
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from .db_pool import get_db
+from .executors import run_in_pool
+
+# Sentinel for "not in cache" so None can be cached as a value
+MISSING = object()
+
+# Persistent tier lives next to the other SQLite databases
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DB_PATH = os.path.join(BASE_DIR, "data", "cache.db")
+
+
+class TTLCache:
+    """
+    In-memory LRU cache where every entry carries its own expiry time.
+    Safe to use from the event loop and from executor threads.
+    """
+
+    def __init__(self, maxsize: int = 10000, default_ttl: float = 300, name: str = "cache"):
+        self.name = name
+        self.maxsize = max(1, maxsize)
+        self.default_ttl = default_ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0}
+
+    def get(self, key, default=MISSING):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return default
+            value, expires_at = entry
+            if expires_at <= now:
+                del self._data[key]
+                self._stats["expired"] += 1
+                self._stats["misses"] += 1
+                return default
+            self._data.move_to_end(key)
+            self._stats["hits"] += 1
+            return value
+
+    def set(self, key, value, ttl: float = None):
+        expires_at = time.monotonic() + (self.default_ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def delete(self, key) -> bool:
+        with self._lock:
+            return self._data.pop(key, None) is not None
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._data)
+        stats["maxsize"] = self.maxsize
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0
+        return stats
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls for the same key into a single execution.
+    Callers that arrive while a call is in flight wait for its result instead
+    of starting their own. Works across threads and the event loop.
+    """
+
+    def __init__(self):
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "shared": 0}
+
+    def _begin(self, key):
+        with self._lock:
+            self._stats["calls"] += 1
+            future = self._inflight.get(key)
+            if future is not None:
+                self._stats["shared"] += 1
+                return future, False
+            future = Future()
+            self._inflight[key] = future
+            return future, True
+
+    def _finish(self, key, future, result=None, error=None):
+        with self._lock:
+            self._inflight.pop(key, None)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key, fn, *args, **kwargs):
+        """Run fn once for all concurrent callers with the same key (blocking)."""
+        future, leader = self._begin(key)
+        if not leader:
+            return future.result()
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result)
+        return result
+
+    async def do_async(self, key, fn, *args, **kwargs):
+        """Await fn(*args) once for all concurrent callers with the same key."""
+        future, leader = self._begin(key)
+        if not leader:
+            return await asyncio.wrap_future(future)
+        try:
+            result = await fn(*args, **kwargs)
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result)
+        return result
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = len(self._inflight)
+        return stats
+
+
+class PersistentCache:
+    """
+    SQLite-backed key/value store with expiry, shared by all worker processes.
+    Values must be JSON-serializable. Entries are grouped by namespace.
+    """
+
+    def __init__(self, namespace: str, db_path: str = None):
+        self.namespace = namespace
+        self.db_path = db_path or CACHE_DB_PATH
+        self._stats = {"hits": 0, "misses": 0, "writes": 0, "errors": 0}
+        self._db = get_db(self.db_path)
+        self._init_db()
+
+    def _init_db(self):
+        with self._db.writer() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS cache_entries (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT,
+                    expires_at REAL,
+                    PRIMARY KEY (namespace, key)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_entries_expiry ON cache_entries(expires_at)")
+
+    def get(self, key):
+        """Return (value, remaining_ttl) or (MISSING, 0)."""
+        try:
+            with self._db.reader() as conn:
+                row = conn.execute(
+                    "SELECT value, expires_at FROM cache_entries WHERE namespace = ? AND key = ?",
+                    (self.namespace, key)
+                ).fetchone()
+        except Exception as e:
+            self._stats["errors"] += 1
+            print(f"[CACHE] {self.namespace} read error: {e}")
+            return MISSING, 0
+        remaining = (row[1] - time.time()) if row else 0
+        if not row or remaining <= 0:
+            self._stats["misses"] += 1
+            return MISSING, 0
+        self._stats["hits"] += 1
+        return json.loads(row[0]), remaining
+
+    def set(self, key, value, ttl: float):
+        try:
+            with self._db.writer() as conn:
+                conn.execute("""
+                    INSERT INTO cache_entries (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)
+                    ON CONFLICT(namespace, key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at
+                """, (self.namespace, key, json.dumps(value), time.time() + ttl))
+            self._stats["writes"] += 1
+        except Exception as e:
+            self._stats["errors"] += 1
+            print(f"[CACHE] {self.namespace} write error: {e}")
+
+    def delete(self, key=None) -> int:
+        """Delete one key, or the whole namespace when key is None."""
+        with self._db.writer() as conn:
+            if key is None:
+                cursor = conn.execute("DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,))
+            else:
+                cursor = conn.execute("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (self.namespace, key))
+        return cursor.rowcount
+
+    def purge_expired(self) -> int:
+        with self._db.writer() as conn:
+            cursor = conn.execute("DELETE FROM cache_entries WHERE namespace = ? AND expires_at <= ?", (self.namespace, time.time()))
+        return cursor.rowcount
+
+    def get_stats(self) -> dict:
+        return dict(self._stats)
+
+
+class TieredCache:
+    """
+    In-process TTLCache in front of a PersistentCache.
+    Memory hits cost microseconds; persistent hits survive restarts and are
+    shared between workers, and are promoted into memory on read.
+    """
+
+    def __init__(self, namespace: str, maxsize: int = 10000, db_path: str = None):
+        self.namespace = namespace
+        self.memory = TTLCache(maxsize=maxsize, name=namespace)
+        self.persistent = PersistentCache(namespace, db_path)
+
+    def get(self, key, default=MISSING):
+        value = self.memory.get(key)
+        if value is not MISSING:
+            return value
+        value, remaining = self.persistent.get(key)
+        if value is MISSING:
+            return default
+        self.memory.set(key, value, ttl=remaining)
+        return value
+
+    def set(self, key, value, ttl: float):
+        self.memory.set(key, value, ttl=ttl)
+        self.persistent.set(key, value, ttl)
+
+    def invalidate(self, key=None) -> int:
+        """Drop one key (or everything in this namespace) from both tiers."""
+        if key is None:
+            self.memory.clear()
+        else:
+            self.memory.delete(key)
+        return self.persistent.delete(key)
+
+    def get_stats(self) -> dict:
+        return {"memory": self.memory.get_stats(), "persistent": self.persistent.get_stats()}
+
+
+class VersionedCache:
+    """
+    One computed value (e.g. a dashboard payload) tagged with the version of the
+    data it was built from. version_fn() must be cheap and shared by all workers
+    (a counter bumped on every write); build_fn() is the expensive blocking query.
+
+    get() returns (value, version):
+      - current version cached      -> served from memory
+      - older version, not too old  -> served stale while one background rebuild runs
+      - nothing usable              -> waits for the (shared) rebuild
+    Rebuilds first look in the persistent tier, so a version built by one worker
+    is reused by the others instead of being recomputed.
+    """
+
+    def __init__(self, name: str, version_fn, build_fn, refresh_interval: float = 1.0,
+                 max_stale: float = 300, persistent_ttl: float = 600):
+        self.name = name
+        self.version_fn = version_fn
+        self.build_fn = build_fn
+        self.refresh_interval = refresh_interval
+        self.max_stale = max_stale
+        self.persistent_ttl = persistent_ttl
+        self.persistent = PersistentCache(name)
+        self._entry = None          # (version, value, built_at)
+        self._inflight = SingleFlight()
+        self._background = set()
+        self._last_refresh = 0.0
+        self._stats = {"fresh_hits": 0, "stale_hits": 0, "misses": 0, "rebuilds": 0, "shared_hits": 0, "errors": 0}
+
+    async def get(self):
+        version = await run_in_pool("db", self.version_fn)
+        entry = self._entry
+        if entry is not None and entry[0] == version:
+            self._stats["fresh_hits"] += 1
+            return entry[1], entry[0]
+        if entry is not None and time.monotonic() - entry[2] < self.max_stale:
+            self._stats["stale_hits"] += 1
+            self._refresh_in_background()
+            return entry[1], entry[0]
+        self._stats["misses"] += 1
+        return await self._inflight.do_async(self.name, self._load)
+
+    def _refresh_in_background(self):
+        now = time.monotonic()
+        if now - self._last_refresh < self.refresh_interval:
+            return
+        self._last_refresh = now
+        task = asyncio.ensure_future(self._inflight.do_async(self.name, self._load))
+        self._background.add(task)
+        task.add_done_callback(self._refresh_done)
+
+    def _refresh_done(self, task):
+        self._background.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            self._stats["errors"] += 1
+            print(f"[CACHE] {self.name} background rebuild failed: {task.exception()}")
+
+    async def _load(self):
+        # Read the version before the data so a concurrent write can only make us conservative
+        version = await run_in_pool("db", self.version_fn)
+        value, _ = await run_in_pool("db", self.persistent.get, str(version))
+        if value is MISSING:
+            self._stats["rebuilds"] += 1
+            value = await run_in_pool("db", self.build_fn)
+            await run_in_pool("db", self.persistent.set, str(version), value, self.persistent_ttl)
+        else:
+            self._stats["shared_hits"] += 1
+        self._entry = (version, value, time.monotonic())
+        return value, version
+
+    def invalidate(self):
+        """Forget the in-memory value; the next get() waits for a rebuild."""
+        self._entry = None
+
+    def get_stats(self) -> dict:
+        stats = dict(self._stats)
+        stats["version"] = self._entry[0] if self._entry else None
+        stats["in_flight"] = self._inflight.get_stats()["in_flight"]
+        stats["persistent"] = self.persistent.get_stats()
+        return stats
@@ -3,10 +3,24 @@ Company Verification Module
 Validates company legitimacy using multiple data sources.
 """
 import os
-import re
+import asyncio
 from typing import Optional
 import requests
 
+from .cache import TieredCache, MISSING
+from .executors import run_in_pool, run_coroutine_sync
+from .rule_engine import get_rules
+
+# Verification cache: verified companies rarely change, unverified ones get re-checked sooner.
+# Only the network lookups (Clearbit, domain / DNS / WHOIS) are cached; the name-based
+# checks depend on the exact spelling (e.g. ALL CAPS) and are recomputed on every call.
+COMPANY_CACHE_TTL_VERIFIED = int(os.getenv("COMPANY_CACHE_TTL_VERIFIED", str(7 * 86400)))
+COMPANY_CACHE_TTL_UNVERIFIED = int(os.getenv("COMPANY_CACHE_TTL_UNVERIFIED", str(6 * 3600)))
+company_cache = TieredCache("company_sources", maxsize=int(os.getenv("COMPANY_CACHE_SIZE", "5000")))
+
+# Overall time budget (seconds) for the concurrent verification fan-out
+COMPANY_VERIFY_DEADLINE = float(os.getenv("COMPANY_VERIFY_DEADLINE", "6"))
+
 # Known Fortune 500 / Major Companies
 KNOWN_COMPANIES = {
     "google": {"verified": True, "industry": "Technology", "employees": "100000+"},
@@ -42,22 +56,6 @@ KNOWN_COMPANIES = {
     "wipro": {"verified": True, "industry": "IT Services", "employees": "200000+"},
 }
 
-# Red flag company name patterns
-SUSPICIOUS_COMPANY_PATTERNS = [
-    r"work.*from.*home.*inc",
-    r"easy.*money",
-    r"quick.*cash",
-    r"online.*job.*\d+",
-    r"data.*entry.*remote",
-    r"typing.*job",
-    r"copy.*paste.*job",
-    r"hiring.*urgently",
-    r"no.*experience.*needed",
-    r"earn.*\$?\d{4,}.*week",
-    r"earn.*\$?\d{4,}.*day",
-]
-
-
 def normalize_company_name(name: str) -> str:
     """Normalize company name for matching."""
     if not name:
@@ -115,11 +113,11 @@ def check_suspicious_patterns(company_name: str) -> dict:
     
     name_lower = company_name.lower()
     
-    for pattern in SUSPICIOUS_COMPANY_PATTERNS:
-        if re.search(pattern, name_lower):
-            result["is_suspicious"] = True
-            result["flags"].append(f"Suspicious pattern: '{pattern}'")
-            result["risk_score"] += 30
+    # Red flag name patterns from the rule pack
+    for rule in get_rules().company_patterns.matches(name_lower):
+        result["is_suspicious"] = True
+        result["flags"].append(rule.get("flag") or f"Suspicious pattern: '{rule['pattern']}'")
+        result["risk_score"] += rule["score"]
             
     # Check for excessive punctuation (scam indicator)
     if name_lower.count('!') > 0 or name_lower.count('$') > 0:
@@ -190,7 +188,7 @@ def verify_company_existence_google(company_name: str, api_key: Optional[str] =
     return result
 
 
-def verify_company_clearbit(company_name: str, api_key: Optional[str] = None) -> dict:
+def verify_company_clearbit(company_name: str, api_key: Optional[str] = None, timeout: float = 5) -> dict:
     """
     Verify company using Clearbit API (if available).
     Provides rich company data.
@@ -214,7 +212,7 @@ def verify_company_clearbit(company_name: str, api_key: Optional[str] = None) ->
         headers = {"Authorization": f"Bearer {api_key}"}
         params = {"name": company_name}
         
-        response = requests.get(url, headers=headers, params=params, timeout=5)
+        response = requests.get(url, headers=headers, params=params, timeout=timeout)
         
         if response.status_code == 200:
             data = response.json()
@@ -244,7 +242,96 @@ def verify_company(company_name: str) -> dict:
     """
     Main entry point for company verification.
     Combines multiple verification methods.
+    Thin synchronous wrapper around verify_company_async for existing callers.
+    """
+    placeholder = _placeholder_result(company_name)
+    if placeholder:
+        return placeholder
+    
+    cached = _cached_company_result(company_name)
+    if cached:
+        return cached
+        
+    # Safe from inside an event loop too: runs on the shared bridge loop thread
+    return run_coroutine_sync(verify_company_async(company_name))
+
+
+async def verify_company_async(company_name: str, deadline: Optional[float] = None) -> dict:
+    """
+    Verify a company with all independent lookups running concurrently.
+    
+    Clearbit and the domain analysis (DNS -> search -> WHOIS) start together
+    under one overall deadline. Anything still running when the deadline hits
+    is cancelled and the result is marked partial, listing the missing sources.
+    The blocking HTTP lookups get socket timeouts capped at the time left, so
+    their pool threads finish about when the deadline does.
+    The network results are cached per normalized company name (partial results
+    are not); the local name checks always run on the name as given.
     """
+    placeholder = _placeholder_result(company_name)
+    if placeholder:
+        return placeholder
+    
+    cached = _cached_company_result(company_name)
+    if cached:
+        return cached
+        
+    deadline = COMPANY_VERIFY_DEADLINE if deadline is None else deadline
+    
+    # Local checks are instant
+    known_check = check_known_company(company_name)
+    pattern_check = check_suspicious_patterns(company_name)
+    
+    # Network checks fan out concurrently
+    expires = asyncio.get_running_loop().time() + deadline
+    domain_state = {}
+    tasks = {
+        "clearbit": asyncio.ensure_future(
+            run_in_pool("http", verify_company_clearbit, company_name, None, _time_left(expires, 5))
+        ),
+        "domain": asyncio.ensure_future(analyze_company_domain_async(company_name, domain_state, expires)),
+    }
+    done, pending = await asyncio.wait(tasks.values(), timeout=deadline)
+    for task in pending:
+        task.cancel()
+        
+    missing = []
+    clearbit_result = None
+    domain_analysis = None
+    
+    clearbit_task = tasks["clearbit"]
+    if clearbit_task in done and not clearbit_task.exception():
+        clearbit_result = clearbit_task.result()
+    else:
+        missing.append("clearbit")
+        
+    domain_task = tasks["domain"]
+    if domain_task in done and not domain_task.exception():
+        domain_analysis = domain_task.result()
+    else:
+        # Keep whatever the domain chain finished before the deadline
+        domain_analysis = domain_state.get("result")
+        missing.append(domain_state.get("step") or "domain")
+        
+    result = _build_company_result(company_name, known_check, pattern_check, clearbit_result, domain_analysis)
+    if missing:
+        result["partial"] = True
+        result["missing_sources"] = missing
+        result["flags"].append(f"ℹ️ Verification incomplete: {', '.join(missing)} timed out or failed")
+    else:
+        _store_company_sources(company_name, clearbit_result, domain_analysis, result.get("verified"))
+        
+    return result
+
+
+def _time_left(expires: Optional[float], cap: float) -> float:
+    """Timeout for a blocking call: at most `cap`, and no later than `expires` (loop time)."""
+    if expires is None:
+        return cap
+    return max(0.1, min(cap, expires - asyncio.get_running_loop().time()))
+
+
+def _placeholder_result(company_name: str) -> Optional[dict]:
     if not company_name or company_name.lower() in ["unknown", "n/a", "none", ""]:
         return {
             "company": company_name,
@@ -254,7 +341,45 @@ def verify_company(company_name: str) -> dict:
             "flags": ["No company name provided"],
             "recommendations": ["⚠️ Be very cautious - no company information available"]
         }
-    
+    return None
+
+
+def _cached_company_result(company_name: str) -> Optional[dict]:
+    """Full result from the cached network lookups plus fresh local checks on the raw name."""
+    sources = company_cache.get(_company_cache_key(company_name))
+    if sources is MISSING:
+        return None
+    return _build_company_result(
+        company_name, check_known_company(company_name), check_suspicious_patterns(company_name),
+        sources.get("clearbit"), sources.get("domain")
+    )
+
+
+def _company_cache_key(company_name: str) -> str:
+    return normalize_company_name(company_name) or company_name.lower().strip()
+
+
+def _store_company_sources(company_name: str, clearbit_result: Optional[dict],
+                           domain_analysis: Optional[dict], verified: bool):
+    ttl = COMPANY_CACHE_TTL_VERIFIED if verified else COMPANY_CACHE_TTL_UNVERIFIED
+    company_cache.set(_company_cache_key(company_name), {"clearbit": clearbit_result, "domain": domain_analysis}, ttl=ttl)
+
+
+def invalidate_company_cache(company_name: Optional[str] = None) -> int:
+    """
+    Drop the cached verification for one company (matched by normalized name),
+    or for every company when no name is given. Returns the number of persisted entries removed.
+    """
+    return company_cache.invalidate(_company_cache_key(company_name) if company_name else None)
+
+
+def get_company_cache_stats() -> dict:
+    return company_cache.get_stats()
+
+
+def _build_company_result(company_name: str, known_check: dict, pattern_check: dict,
+                          clearbit_result: Optional[dict], domain_analysis: Optional[dict]) -> dict:
+    """Combine the individual verification sources into the final verdict."""
     result = {
         "company": company_name,
         "verified": False,
@@ -266,7 +391,6 @@ def verify_company(company_name: str) -> dict:
     }
     
     # 1. Check known companies first
-    known_check = check_known_company(company_name)
     result["known_company"] = known_check
     
     if known_check.get("verified"):
@@ -275,26 +399,23 @@ def verify_company(company_name: str) -> dict:
         result["flags"].append(known_check.get("message"))
     else:
         # 2. Check for suspicious patterns
-        pattern_check = check_suspicious_patterns(company_name)
         result["risk_score"] += pattern_check.get("risk_score", 0)
         result["flags"].extend(pattern_check.get("flags", []))
         
         if pattern_check.get("is_suspicious"):
             result["risk_level"] = "high"
             
-    # 3. Try Clearbit verification (if API key available)
-    clearbit_result = verify_company_clearbit(company_name)
-    if clearbit_result.get("found"):
+    # 3. Clearbit verification (if API key available)
+    if clearbit_result and clearbit_result.get("found"):
         result["verified"] = True
         result["clearbit_data"] = clearbit_result.get("data")
         result["flags"].append("✅ Verified via Clearbit")
         result["risk_score"] = max(0, result["risk_score"] - 20)
     
     # 4. Automatic Domain & Age Analysis (New Feature)
-    domain_analysis = analyze_company_domain(company_name)
     result["domain_info"] = domain_analysis
     
-    if domain_analysis.get("found"):
+    if domain_analysis and domain_analysis.get("found"):
         # Adjust risk based on domain age
         age_years = domain_analysis.get("age_years", 0)
         if age_years > 5:
@@ -339,7 +460,7 @@ def get_base_domain(url: str) -> str:
     except:
         return ""
 
-def search_domain_duckduckgo(company_name: str) -> Optional[str]:
+def search_domain_duckduckgo(company_name: str, timeout: float = 4) -> Optional[str]:
     """
     Search for official company website using DuckDuckGo HTML (no API key required).
     """
@@ -351,7 +472,7 @@ def search_domain_duckduckgo(company_name: str) -> Optional[str]:
         url = "https://html.duckduckgo.com/html/"
         
         # Sriram: Using post request for HTML version
-        response = requests.post(url, data={"q": query}, headers=headers, timeout=4)
+        response = requests.post(url, data={"q": query}, headers=headers, timeout=timeout)
         
         if response.status_code == 200:
             soup = BeautifulSoup(response.text, "html.parser")
@@ -369,6 +490,9 @@ def guess_company_domain(company_name: str) -> str:
     clean = normalize_company_name(company_name).replace(" ", "").replace("&", "").replace("-", "")
     return f"{clean}.com"
 
+GENERIC_COMPANY_NAMES = ["unknown", "unknown company", "confidential", "hidden", "n/a"]
+
+
 def analyze_company_domain(company_name: str) -> dict:
     """
     Attempt to find and analyze company domain.
@@ -379,16 +503,8 @@ def analyze_company_domain(company_name: str) -> dict:
     from utils.domain_check import check_domain_age_whois, check_domain_dns
     
     # 1. Block generic placeholders
-    if company_name.lower() in ["unknown", "unknown company", "confidential", "hidden", "n/a"]:
-        return {
-            "found": False,
-            "domain": None,
-            "method": "blocked",
-            "age_days": 0,
-            "age_years": 0,
-            "created": None,
-            "details": "Generic company name provided"
-        }
+    if company_name.lower() in GENERIC_COMPANY_NAMES:
+        return _blocked_domain_result()
 
     # 2. Try Heuristic
     heuristic_domain = guess_company_domain(company_name)
@@ -408,6 +524,72 @@ def analyze_company_domain(company_name: str) -> dict:
             # Re-check DNS for the searched domain
             dns_check = check_domain_dns(target_domain)
             
+    result = _company_domain_result(target_domain, method, dns_check)
+    
+    if result["found"]:
+        # 3. Check WHOIS Age
+        _apply_whois_age(result, check_domain_age_whois(target_domain))
+            
+    return result
+
+
+async def analyze_company_domain_async(company_name: str, state: Optional[dict] = None,
+                                      expires: Optional[float] = None) -> dict:
+    """
+    Async variant of analyze_company_domain. Lookups run on the resolver and
+    executor pools. Progress is written to `state` ("step" in progress and the
+    partial "result") so a caller that cancels it can still use what finished.
+    `expires` (event loop time) caps the web search timeout. python-whois has a
+    fixed socket timeout, so a WHOIS query can outlive it; its result still fills
+    the shared WHOIS cache for the next lookup.
+    """
+    from utils.domain_check import check_domain_age_whois, check_domain_dns_async
+    state = {} if state is None else state
+    
+    if company_name.lower() in GENERIC_COMPANY_NAMES:
+        return _blocked_domain_result()
+        
+    heuristic_domain = guess_company_domain(company_name)
+    target_domain = heuristic_domain
+    method = "heuristic"
+    
+    state["step"] = "dns"
+    dns_check = await check_domain_dns_async(target_domain)
+    
+    if not dns_check.get("has_valid_dns"):
+        print(f"Heuristic domain {heuristic_domain} failed. Searching web...")
+        state["step"] = "search"
+        searched_domain = await run_in_pool("http", search_domain_duckduckgo, company_name, _time_left(expires, 4))
+        if searched_domain:
+            target_domain = searched_domain
+            method = "search"
+            state["step"] = "dns"
+            dns_check = await check_domain_dns_async(target_domain)
+            
+    result = _company_domain_result(target_domain, method, dns_check)
+    state["result"] = result
+    
+    if result["found"]:
+        state["step"] = "whois"
+        _apply_whois_age(result, await run_in_pool("whois", check_domain_age_whois, target_domain))
+        
+    state["step"] = None
+    return result
+
+
+def _blocked_domain_result() -> dict:
+    return {
+        "found": False,
+        "domain": None,
+        "method": "blocked",
+        "age_days": 0,
+        "age_years": 0,
+        "created": None,
+        "details": "Generic company name provided"
+    }
+
+
+def _company_domain_result(target_domain: str, method: str, dns_check: dict) -> dict:
     result = {
         "found": False,
         "domain": target_domain if dns_check.get("has_valid_dns") else None,
@@ -422,13 +604,13 @@ def analyze_company_domain(company_name: str) -> dict:
         result["found"] = True
         result["domain"] = target_domain
         
-        # 3. Check WHOIS Age
-        whois_check = check_domain_age_whois(target_domain)
-        result["age_days"] = whois_check.get("age_days", 0)
-        result["created"] = whois_check.get("creation_date")
-        result["details"] = whois_check.get("details")
-        
-        if result["age_days"]:
-            result["age_years"] = round(result["age_days"] / 365, 1)
-            
     return result
+
+
+def _apply_whois_age(result: dict, whois_check: dict):
+    result["age_days"] = whois_check.get("age_days", 0)
+    result["created"] = whois_check.get("creation_date")
+    result["details"] = whois_check.get("details")
+    
+    if result["age_days"]:
+        result["age_years"] = round(result["age_days"] / 365, 1)
@@ -0,0 +1,159 @@
+"""
+SQLite Connection Manager Module
+Long-lived, pre-configured connections: one reader per thread and one serialized writer per database.
+"""
+import os
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# Applied once to every new connection
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    "cache_size": -int(os.getenv("SQLITE_CACHE_KB", "20000")),        # negative = KiB
+    "mmap_size": int(os.getenv("SQLITE_MMAP_BYTES", str(256 * 1024 * 1024))),
+    "temp_store": "MEMORY",
+}
+
+# Per-connection prepared statement cache (sqlite3's cached_statements)
+SQLITE_STATEMENT_CACHE = int(os.getenv("SQLITE_STATEMENT_CACHE", "256"))
+
+
+class ConnectionManager:
+    """
+    Connection pool for one SQLite file.
+
+    reader() hands each thread its own long-lived connection (created on first
+    use), so statements stay prepared in the connection's statement cache.
+    writer() serializes all writes through a single dedicated connection and
+    commits (or rolls back) when the block exits. WAL mode lets readers run
+    while the writer commits.
+    """
+
+    def __init__(self, db_path: str, name: str = None):
+        self.db_path = db_path
+        self.name = name or os.path.splitext(os.path.basename(db_path))[0]
+        self._local = threading.local()
+        self._readers_lock = threading.Lock()
+        self._readers = {}        # thread id -> connection
+        self._writer = None
+        self._write_lock = threading.Lock()
+        self._pid = os.getpid()
+        self._stats = {
+            "connections_opened": 0,
+            "reads": 0,
+            "writes": 0,
+            "rollbacks": 0,
+            "write_wait_ms_total": 0.0,
+            "write_wait_ms_max": 0.0
+        }
+
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=SQLITE_PRAGMAS["busy_timeout"] / 1000,
+            check_same_thread=False,
+            cached_statements=SQLITE_STATEMENT_CACHE
+        )
+        for pragma, value in SQLITE_PRAGMAS.items():
+            conn.execute(f"PRAGMA {pragma}={value}")
+        self._stats["connections_opened"] += 1
+        return conn
+
+    def _check_fork(self):
+        # Connections must not cross a fork; a child starts with a fresh pool
+        if os.getpid() != self._pid:
+            self._pid = os.getpid()
+            self._local = threading.local()
+            self._readers = {}
+            self._writer = None
+            self._write_lock = threading.Lock()
+
+    @contextmanager
+    def reader(self):
+        """This thread's read connection. Do not write through it."""
+        self._check_fork()
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+            with self._readers_lock:
+                self._readers[threading.get_ident()] = conn
+        self._stats["reads"] += 1
+        yield conn
+
+    @contextmanager
+    def writer(self):
+        """The shared write connection, held exclusively; commits on success."""
+        self._check_fork()
+        started = time.perf_counter()
+        with self._write_lock:
+            waited = (time.perf_counter() - started) * 1000
+            self._stats["write_wait_ms_total"] += waited
+            self._stats["write_wait_ms_max"] = max(self._stats["write_wait_ms_max"], waited)
+            if self._writer is None:
+                self._writer = self._connect()
+            conn = self._writer
+            try:
+                yield conn
+                conn.commit()
+                self._stats["writes"] += 1
+            except BaseException:
+                conn.rollback()
+                self._stats["rollbacks"] += 1
+                raise
+
+    def close(self):
+        """Close every connection (e.g. on shutdown)."""
+        with self._readers_lock:
+            for conn in self._readers.values():
+                conn.close()
+            self._readers.clear()
+        self._local = threading.local()
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+    def get_stats(self) -> dict:
+        stats = dict(self._stats)
+        stats["write_wait_ms_total"] = round(stats["write_wait_ms_total"], 2)
+        stats["write_wait_ms_max"] = round(stats["write_wait_ms_max"], 2)
+        with self._readers_lock:
+            stats["reader_connections"] = len(self._readers)
+        stats.update({
+            "path": self.db_path,
+            "writer_open": self._writer is not None,
+            "writer_busy": self._write_lock.locked(),
+            "statement_cache": SQLITE_STATEMENT_CACHE
+        })
+        return stats
+
+
+_managers = {}
+_managers_lock = threading.Lock()
+
+
+def get_db(db_path: str) -> ConnectionManager:
+    """Return the shared ConnectionManager for a database file."""
+    key = os.path.abspath(db_path)
+    manager = _managers.get(key)
+    if manager is None:
+        with _managers_lock:
+            manager = _managers.get(key)
+            if manager is None:
+                manager = _managers[key] = ConnectionManager(key)
+    return manager
+
+
+def get_db_stats() -> dict:
+    """Pool metrics for every database opened through get_db()."""
+    return {manager.name: manager.get_stats() for manager in list(_managers.values())}
+
+
+def close_all():
+    for manager in list(_managers.values()):
+        manager.close()
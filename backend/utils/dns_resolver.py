@@ -0,0 +1,127 @@
+"""
+Caching DNS Resolver Module
+Resolves hostnames with in-flight deduplication, TTL-based positive caching and NXDOMAIN negative caching.
+"""
+import os
+import socket
+
+from .cache import TTLCache, SingleFlight, MISSING
+from .executors import run_in_pool
+
+# dnspython gives us real record TTLs; without it we fall back to the system resolver
+try:
+    import dns.resolver
+    dnspython_available = True
+except ImportError:
+    dnspython_available = False
+
+DNS_TIMEOUT = float(os.getenv("DNS_TIMEOUT", "3"))
+DNS_DEFAULT_TTL = int(os.getenv("DNS_DEFAULT_TTL", "300"))     # used when the upstream has no TTL
+DNS_MIN_TTL = int(os.getenv("DNS_MIN_TTL", "30"))
+DNS_MAX_TTL = int(os.getenv("DNS_MAX_TTL", "86400"))
+DNS_NEGATIVE_TTL = int(os.getenv("DNS_NEGATIVE_TTL", "600"))   # how long NXDOMAIN answers are kept
+DNS_CACHE_SIZE = int(os.getenv("DNS_CACHE_SIZE", "20000"))
+
+_NXDOMAIN = "nxdomain"
+
+
+class NXDomainError(Exception):
+    """The name does not exist (or has no address records)."""
+
+
+def system_upstream(host: str) -> dict:
+    """
+    Default upstream. Returns {"addresses": [...], "ttl": seconds}.
+    Raises NXDomainError for names that do not exist; other errors are transient.
+    """
+    if dnspython_available:
+        try:
+            answer = dns.resolver.resolve(host, "A", lifetime=DNS_TIMEOUT)
+            return {"addresses": [r.address for r in answer], "ttl": answer.rrset.ttl}
+        except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer) as e:
+            raise NXDomainError(host) from e
+
+    try:
+        _, _, addresses = socket.gethostbyname_ex(host)
+        return {"addresses": addresses, "ttl": DNS_DEFAULT_TTL}
+    except socket.gaierror as e:
+        if e.errno in (socket.EAI_NONAME, getattr(socket, "EAI_NODATA", socket.EAI_NONAME)):
+            raise NXDomainError(host) from e
+        raise
+
+
+class DNSResolver:
+    """
+    Shared resolver used by the domain and company checks.
+
+    The upstream is any callable host -> {"addresses": [...], "ttl": int} that
+    raises NXDomainError for missing names, so tests can plug in a stub.
+    """
+
+    def __init__(self, upstream=None, negative_ttl: int = None, maxsize: int = None):
+        self.upstream = upstream or system_upstream
+        self.negative_ttl = DNS_NEGATIVE_TTL if negative_ttl is None else negative_ttl
+        self._cache = TTLCache(maxsize=maxsize or DNS_CACHE_SIZE, default_ttl=DNS_DEFAULT_TTL, name="dns")
+        self._inflight = SingleFlight()
+
+    @staticmethod
+    def _normalize(host: str) -> str:
+        return (host or "").strip().lower().rstrip(".")
+
+    def _cached(self, host: str):
+        answer = self._cache.get(host)
+        if answer is _NXDOMAIN:
+            raise NXDomainError(host)
+        return answer
+
+    def _lookup(self, host: str) -> dict:
+        try:
+            answer = self.upstream(host)
+        except NXDomainError:
+            self._cache.set(host, _NXDOMAIN, ttl=self.negative_ttl)
+            raise
+        answer = {"host": host, "addresses": list(answer.get("addresses", [])), "ttl": answer.get("ttl", DNS_DEFAULT_TTL)}
+        ttl = min(DNS_MAX_TTL, max(DNS_MIN_TTL, int(answer["ttl"] or DNS_DEFAULT_TTL)))
+        self._cache.set(host, answer, ttl=ttl)
+        return answer
+
+    def resolve(self, host: str) -> dict:
+        """Blocking resolve (for code already running on a worker thread)."""
+        host = self._normalize(host)
+        answer = self._cached(host)
+        if answer is not MISSING:
+            return answer
+        return self._inflight.do(host, self._lookup, host)
+
+    async def resolve_async(self, host: str) -> dict:
+        """Resolve without blocking the event loop; misses run on the DNS pool."""
+        host = self._normalize(host)
+        answer = self._cached(host)
+        if answer is not MISSING:
+            return answer
+        return await self._inflight.do_async(host, run_in_pool, "dns", self._lookup, host)
+
+    def set_upstream(self, upstream):
+        """Swap the upstream (e.g. a stub in tests) and drop cached answers."""
+        self.upstream = upstream or system_upstream
+        self._cache.clear()
+
+    def clear(self):
+        self._cache.clear()
+
+    def get_stats(self) -> dict:
+        return {
+            "cache": self._cache.get_stats(),
+            "in_flight": self._inflight.get_stats(),
+            "negative_ttl": self.negative_ttl,
+            "upstream": getattr(self.upstream, "__name__", type(self.upstream).__name__),
+            "dnspython": dnspython_available
+        }
+
+
+# Shared instance for the whole process
+resolver = DNSResolver()
+
+
+def get_resolver() -> DNSResolver:
+    return resolver
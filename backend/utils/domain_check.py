@@ -2,39 +2,28 @@
 Domain Age & Verification Module
 Checks WHOIS data for domain registration age and suspicious indicators.
 """
-import re
+import os
+import asyncio
 from datetime import datetime, timedelta
 from urllib.parse import urlparse
 import socket
 
-# Known legitimate job domains
-TRUSTED_JOB_DOMAINS = [
-    "linkedin.com", "indeed.com", "glassdoor.com", "monster.com",
-    "ziprecruiter.com", "careerbuilder.com", "simplyhired.com",
-    "dice.com", "hired.com", "angel.co", "wellfound.com",
-    "lever.co", "greenhouse.io", "workday.com", "brassring.com",
-    "icims.com", "jobvite.com", "workable.com", "google.com",
-    "microsoft.com", "amazon.jobs", "meta.com", "apple.com"
-]
-
-# Suspicious Top-Level Domains
-SUSPICIOUS_TLDS = [
-    ".xyz", ".top", ".work", ".click", ".link", ".info", 
-    ".online", ".site", ".website", ".space", ".pw", ".tk",
-    ".ml", ".ga", ".cf", ".gq", ".cc"
-]
-
-# Known scam patterns in URLs
-SCAM_URL_PATTERNS = [
-    r"job.*offer.*\d+",
-    r"urgent.*hiring",
-    r"work.*from.*home.*\d+k",
-    r"telegram",
-    r"whatsapp",
-    r"bit\.ly",
-    r"tinyurl",
-    r"goo\.gl"
-]
+from .executors import run_in_pool
+from .dns_resolver import resolver, NXDomainError
+from .cache import TieredCache, SingleFlight, MISSING
+from .rule_engine import get_rules
+
+# WHOIS cache expiry (seconds), tiered by domain age
+WHOIS_TTL_ESTABLISHED = int(os.getenv("WHOIS_TTL_ESTABLISHED", str(21 * 86400)))  # older than a year
+WHOIS_TTL_YOUNG = int(os.getenv("WHOIS_TTL_YOUNG", str(2 * 86400)))               # 90 days to a year
+WHOIS_TTL_NEW = int(os.getenv("WHOIS_TTL_NEW", str(6 * 3600)))                    # younger than 90 days
+WHOIS_TTL_UNKNOWN = int(os.getenv("WHOIS_TTL_UNKNOWN", str(86400)))               # no creation date
+WHOIS_TTL_FAILURE = int(os.getenv("WHOIS_TTL_FAILURE", str(15 * 60)))             # lookup failed
+
+# Shared by analyze_url_security and analyze_company_domain
+whois_cache = TieredCache("whois", maxsize=int(os.getenv("WHOIS_CACHE_SIZE", "10000")))
+_whois_inflight = SingleFlight()
+
 
 def extract_domain(url: str) -> dict:
     """
@@ -81,72 +70,143 @@ def check_domain_age_whois(domain: str) -> dict:
     """
     Attempt to check domain age via WHOIS lookup.
     Uses python-whois library if available, otherwise uses heuristics.
+    Results are served from the shared WHOIS cache when possible.
     """
+    key = _whois_cache_key(domain)
+    entry = whois_cache.get(key)
+    if entry is MISSING:
+        entry = _whois_inflight.do(key, _refresh_whois_entry, key)
+    return _whois_result_from_entry(domain, entry)
+
+
+def _whois_cache_key(domain: str) -> str:
+    domain = (domain or "").strip().lower().rstrip(".")
+    return domain[4:] if domain.startswith("www.") else domain
+
+
+def _refresh_whois_entry(domain: str) -> dict:
+    """Run a live WHOIS query and store it with an expiry based on the domain's age."""
+    entry = _lookup_whois(domain)
+    whois_cache.set(domain, entry, ttl=_whois_ttl(entry))
+    return entry
+
+
+def _lookup_whois(domain: str) -> dict:
+    """Live WHOIS query. Returns a cacheable entry (dates as strings)."""
+    entry = {"status": "ok", "creation_date": None, "registrar": None, "details": ""}
+    try:
+        import whois
+        w = whois.whois(domain)
+        
+        # Handle list of dates
+        creation = w.creation_date
+        if isinstance(creation, list):
+            creation = creation[0]
+        if isinstance(creation, datetime):
+            entry["creation_date"] = creation.strftime("%Y-%m-%d")
+        else:
+            entry["status"] = "unknown"
+            entry["details"] = "Could not retrieve creation date."
+            
+        if w.registrar:
+            entry["registrar"] = str(w.registrar)
+            
+    except ImportError:
+        entry["status"] = "failed"
+        entry["details"] = "WHOIS library not installed. Install with: pip install python-whois"
+    except Exception as e:
+        entry["status"] = "failed"
+        entry["details"] = f"WHOIS lookup failed: {str(e)[:100]}"
+        
+    return entry
+
+
+def _whois_ttl(entry: dict) -> int:
+    """Tiered expiry: established domains rarely change, new ones are re-checked often."""
+    if entry["status"] == "failed":
+        return WHOIS_TTL_FAILURE
+    if not entry.get("creation_date"):
+        return WHOIS_TTL_UNKNOWN
+    age_days = (datetime.now() - datetime.strptime(entry["creation_date"], "%Y-%m-%d")).days
+    if age_days >= 365:
+        return WHOIS_TTL_ESTABLISHED
+    if age_days >= 90:
+        return WHOIS_TTL_YOUNG
+    return WHOIS_TTL_NEW
+
+
+def _whois_result_from_entry(domain: str, entry: dict) -> dict:
+    """Build the risk result from a cached entry (age is recomputed on every read)."""
     result = {
         "domain": domain,
         "age_days": None,
         "creation_date": None,
         "is_new_domain": False,
         "risk_level": "unknown",
-        "details": ""
+        "details": entry.get("details", "")
     }
     
-    try:
-        import whois
-        w = whois.whois(domain)
+    if entry.get("creation_date"):
+        creation = datetime.strptime(entry["creation_date"], "%Y-%m-%d")
+        age = datetime.now() - creation
+        result["age_days"] = age.days
+        result["creation_date"] = entry["creation_date"]
         
-        if w.creation_date:
-            # Handle list of dates
-            creation = w.creation_date
-            if isinstance(creation, list):
-                creation = creation[0]
-            
-            if isinstance(creation, datetime):
-                age = datetime.now() - creation
-                result["age_days"] = age.days
-                result["creation_date"] = creation.strftime("%Y-%m-%d")
-                
-                # Risk assessment based on age
-                if age.days < 30:
-                    result["is_new_domain"] = True
-                    result["risk_level"] = "critical"
-                    result["details"] = f"🚨 EXTREMELY NEW DOMAIN! Created only {age.days} days ago."
-                elif age.days < 90:
-                    result["is_new_domain"] = True
-                    result["risk_level"] = "high"
-                    result["details"] = f"⚠️ Very new domain. Created {age.days} days ago."
-                elif age.days < 365:
-                    result["risk_level"] = "medium"
-                    result["details"] = f"Domain is less than 1 year old ({age.days} days)."
-                else:
-                    years = age.days // 365
-                    result["risk_level"] = "low"
-                    result["details"] = f"✅ Established domain. {years}+ years old."
-                    
+        # Risk assessment based on age
+        if age.days < 30:
+            result["is_new_domain"] = True
+            result["risk_level"] = "critical"
+            result["details"] = f"🚨 EXTREMELY NEW DOMAIN! Created only {age.days} days ago."
+        elif age.days < 90:
+            result["is_new_domain"] = True
+            result["risk_level"] = "high"
+            result["details"] = f"⚠️ Very new domain. Created {age.days} days ago."
+        elif age.days < 365:
+            result["risk_level"] = "medium"
+            result["details"] = f"Domain is less than 1 year old ({age.days} days)."
         else:
-            result["details"] = "Could not retrieve creation date."
+            years = age.days // 365
+            result["risk_level"] = "low"
+            result["details"] = f"✅ Established domain. {years}+ years old."
             
-        # Check registrar for suspicious patterns
-        if w.registrar:
-            registrar_lower = str(w.registrar).lower()
-            suspicious_registrars = ["namecheap", "epik", "porkbun", "hostinger"]
-            if any(r in registrar_lower for r in suspicious_registrars):
-                result["details"] += " (Budget registrar - often used by scammers)"
-                if result["risk_level"] == "low":
-                    result["risk_level"] = "medium"
-                    
-    except ImportError:
-        result["details"] = "WHOIS library not installed. Install with: pip install python-whois"
-    except Exception as e:
-        result["details"] = f"WHOIS lookup failed: {str(e)[:100]}"
-        
+    # Check registrar for suspicious patterns
+    if entry.get("registrar"):
+        registrar_lower = entry["registrar"].lower()
+        suspicious_registrars = ["namecheap", "epik", "porkbun", "hostinger"]
+        if any(r in registrar_lower for r in suspicious_registrars):
+            result["details"] += " (Budget registrar - often used by scammers)"
+            if result["risk_level"] == "low":
+                result["risk_level"] = "medium"
+                
     return result
 
 
+def get_whois_cache_stats() -> dict:
+    return {**whois_cache.get_stats(), "in_flight": _whois_inflight.get_stats()}
+
+
 def check_domain_dns(domain: str) -> dict:
     """
     Basic DNS checks to verify domain exists and has proper records.
+    Answers come from the shared caching resolver.
     """
+    try:
+        answer = resolver.resolve(domain)
+        return _dns_result(domain, answer)
+    except Exception as e:
+        return _dns_result(domain, error=e)
+
+
+async def check_domain_dns_async(domain: str) -> dict:
+    """Async variant of check_domain_dns (cache hits never leave the event loop)."""
+    try:
+        answer = await resolver.resolve_async(domain)
+        return _dns_result(domain, answer)
+    except Exception as e:
+        return _dns_result(domain, error=e)
+
+
+def _dns_result(domain: str, answer: dict = None, error: Exception = None) -> dict:
     result = {
         "domain": domain,
         "has_valid_dns": False,
@@ -154,24 +214,21 @@ def check_domain_dns(domain: str) -> dict:
         "details": ""
     }
     
-    try:
-        ip = socket.gethostbyname(domain)
+    if answer and answer.get("addresses"):
+        ip = answer["addresses"][0]
         result["has_valid_dns"] = True
         result["ip_address"] = ip
         result["details"] = f"Domain resolves to {ip}"
-    except socket.gaierror:
+    elif error is None or isinstance(error, (NXDomainError, socket.gaierror)):
         result["details"] = "⚠️ Domain does not resolve - may be dead or fake"
-    except Exception as e:
-        result["details"] = f"DNS check error: {str(e)[:50]}"
+    else:
+        result["details"] = f"DNS check error: {str(error)[:50]}"
         
     return result
 
 
-def analyze_url_security(url: str) -> dict:
-    """
-    Comprehensive URL security analysis.
-    Returns a risk score and detailed breakdown.
-    """
+def _url_static_checks(url: str) -> dict:
+    """URL checks that need no network access (trusted list, TLD, shorteners, patterns)."""
     domain_info = extract_domain(url)
     
     result = {
@@ -185,36 +242,40 @@ def analyze_url_security(url: str) -> dict:
         "recommendations": []
     }
     
-    # 1. Check if trusted domain
+    rules = get_rules()
+    url_lower = url.lower()
+    
+    # 1. Check if trusted domain (the host or one of its parent domains)
     domain = domain_info.get("full_domain", "").lower()
-    for trusted in TRUSTED_JOB_DOMAINS:
-        if domain.endswith(trusted):
-            result["trusted"] = True
-            result["flags"].append(f"✅ Trusted job platform: {trusted}")
-            result["risk_score"] -= 30  # Reduce risk
-            break
+    trusted = rules.trusted_domain(domain)
+    if trusted:
+        result["trusted"] = True
+        result["flags"].append(f"✅ Trusted job platform: {trusted}")
+        result["risk_score"] += rules.trusted_score  # Reduce risk
     
     # 2. Check suspicious TLDs
     tld = domain_info.get("tld", "")
-    if tld in SUSPICIOUS_TLDS:
-        result["risk_score"] += 25
+    if tld in rules.suspicious_tlds:
+        result["risk_score"] += rules.suspicious_tld_score
         result["flags"].append(f"🚨 Suspicious TLD: {tld}")
         
     # 3. Check for URL shorteners (red flag)
-    shorteners = ["bit.ly", "tinyurl", "goo.gl", "t.co", "ow.ly", "is.gd"]
-    if any(s in url.lower() for s in shorteners):
-        result["risk_score"] += 40
+    if rules.has_shortener(url_lower):
+        result["risk_score"] += rules.shortener_score
         result["flags"].append("🚨 URL Shortener detected - could hide malicious destination")
         
     # 4. Check for scam patterns in URL
-    for pattern in SCAM_URL_PATTERNS:
-        if re.search(pattern, url.lower()):
-            result["risk_score"] += 20
-            result["flags"].append(f"⚠️ Suspicious pattern in URL: {pattern}")
+    for rule in rules.url_patterns.matches(url_lower):
+        result["risk_score"] += rule["score"]
+        result["flags"].append(rule.get("flag") or f"⚠️ Suspicious pattern in URL: {rule['pattern']}")
             
+    return result
+
+
+def _apply_domain_lookups(result: dict, whois_result: dict, dns_result: dict) -> dict:
+    """Fold WHOIS/DNS results into the URL analysis and compute the final risk level."""
     # 5. Check domain age (if WHOIS available)
-    if not result["trusted"]:
-        whois_result = check_domain_age_whois(domain)
+    if whois_result is not None:
         result["domain_age"] = whois_result
         
         if whois_result.get("is_new_domain"):
@@ -224,7 +285,6 @@ def analyze_url_security(url: str) -> dict:
             result["risk_score"] += 15
             
     # 6. DNS check
-    dns_result = check_domain_dns(domain)
     if not dns_result.get("has_valid_dns"):
         result["risk_score"] += 30
         result["flags"].append("⚠️ Domain has no valid DNS records")
@@ -252,6 +312,37 @@ def analyze_url_security(url: str) -> dict:
     return result
 
 
+def analyze_url_security(url: str) -> dict:
+    """
+    Comprehensive URL security analysis.
+    Returns a risk score and detailed breakdown.
+    """
+    result = _url_static_checks(url)
+    domain = result["domain"]
+    
+    whois_result = None if result["trusted"] else check_domain_age_whois(domain)
+    dns_result = check_domain_dns(domain)
+    return _apply_domain_lookups(result, whois_result, dns_result)
+
+
+async def analyze_url_security_async(url: str) -> dict:
+    """
+    Same analysis as analyze_url_security, with the WHOIS and DNS lookups
+    running concurrently on their executor pools instead of the event loop.
+    """
+    result = _url_static_checks(url)
+    domain = result["domain"]
+    
+    dns_task = check_domain_dns_async(domain)
+    if result["trusted"]:
+        whois_result, dns_result = None, await dns_task
+    else:
+        whois_result, dns_result = await asyncio.gather(
+            run_in_pool("whois", check_domain_age_whois, domain), dns_task
+        )
+    return _apply_domain_lookups(result, whois_result, dns_result)
+
+
 def check_domain(url: str) -> dict:
     """
     Main entry point for domain checking.
@@ -0,0 +1,163 @@
+"""
+Managed Execution Module
+Bounded thread pools that keep blocking I/O (DNS, WHOIS, outbound HTTP, SQLite) off the event loop.
+"""
+import os
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# One pool per kind of dependency so a slow WHOIS server can't starve DB writes
+POOL_CONFIG = {
+    "dns": {"workers": int(os.getenv("DNS_POOL_SIZE", "16")), "queue": int(os.getenv("DNS_POOL_QUEUE", "256"))},
+    "whois": {"workers": int(os.getenv("WHOIS_POOL_SIZE", "4")), "queue": int(os.getenv("WHOIS_POOL_QUEUE", "64"))},
+    "http": {"workers": int(os.getenv("HTTP_POOL_SIZE", "16")), "queue": int(os.getenv("HTTP_POOL_QUEUE", "256"))},
+    "db": {"workers": int(os.getenv("DB_POOL_SIZE", "4")), "queue": int(os.getenv("DB_POOL_QUEUE", "512"))},
+    # Micro-batched model scoring (CPU-bound, mostly in numpy/scipy outside the GIL)
+    "inference": {"workers": int(os.getenv("INFERENCE_POOL_SIZE", "2")), "queue": int(os.getenv("INFERENCE_POOL_QUEUE", "64"))},
+}
+
+# Process budget for CPU-bound scoring, shared by the parallel CSV scorer and the
+# background job pool. Defaults to this web worker's share of the cores, so
+# N gunicorn workers (WEB_CONCURRENCY) together stay at about one process per core.
+SCORING_PROCESSES = max(1, int(os.getenv(
+    "SCORING_PROCESSES", str((os.cpu_count() or 1) // max(1, int(os.getenv("WEB_CONCURRENCY", "1"))))
+)))
+
+
+class PoolSaturatedError(RuntimeError):
+    """Raised when a pool's wait queue is full and the call is rejected."""
+
+
+class BoundedPool:
+    """A ThreadPoolExecutor with a capped backlog and saturation counters."""
+
+    def __init__(self, name: str, max_workers: int, max_queue: int):
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=f"{name}-pool")
+        self._lock = threading.Lock()
+        self._active = 0
+        self._queued = 0
+        self._saturated = False
+        self._stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "rejected": 0,
+            "saturation_events": 0,
+            "peak_queued": 0
+        }
+
+    def submit(self, fn, *args, **kwargs):
+        with self._lock:
+            if self._active + self._queued >= self.max_workers + self.max_queue:
+                self._stats["rejected"] += 1
+                raise PoolSaturatedError(f"{self.name} pool saturated ({self._queued} calls waiting)")
+            self._queued += 1
+            self._stats["submitted"] += 1
+            self._stats["peak_queued"] = max(self._stats["peak_queued"], self._queued)
+            self._check_saturation()
+        return self._executor.submit(self._run, fn, args, kwargs)
+
+    def _run(self, fn, args, kwargs):
+        with self._lock:
+            self._queued -= 1
+            self._active += 1
+        try:
+            result = fn(*args, **kwargs)
+            with self._lock:
+                self._stats["completed"] += 1
+            return result
+        except Exception:
+            with self._lock:
+                self._stats["failed"] += 1
+            raise
+        finally:
+            with self._lock:
+                self._active -= 1
+                self._check_saturation()
+
+    def _check_saturation(self):
+        # Called with the lock held; logs only on transitions
+        saturated = self._active + self._queued > self.max_workers
+        if saturated and not self._saturated:
+            self._stats["saturation_events"] += 1
+            print(f"[EXECUTOR] {self.name} pool saturated: {self._active} active, {self._queued} waiting")
+        self._saturated = saturated
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "active": self._active,
+                "queued": self._queued,
+                "saturated": self._saturated,
+                "utilization": round(self._active / self.max_workers, 2)
+            })
+        return stats
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(kind: str) -> BoundedPool:
+    """Return the shared pool for a dependency kind ('dns', 'whois', 'http', 'db', 'inference')."""
+    pool = _pools.get(kind)
+    if pool is None:
+        if kind not in POOL_CONFIG:
+            raise ValueError(f"Unknown executor pool: {kind}")
+        with _pools_lock:
+            pool = _pools.get(kind)
+            if pool is None:
+                config = POOL_CONFIG[kind]
+                pool = BoundedPool(kind, config["workers"], config["queue"])
+                _pools[kind] = pool
+    return pool
+
+
+async def run_in_pool(kind: str, fn, *args, **kwargs):
+    """Run a blocking callable on the named pool and await its result."""
+    return await asyncio.wrap_future(get_pool(kind).submit(fn, *args, **kwargs))
+
+
+# One long-lived event loop thread for synchronous callers of async code
+_bridge = None      # (loop, pid)
+_bridge_lock = threading.Lock()
+
+
+def _get_bridge_loop():
+    global _bridge
+    with _bridge_lock:
+        # A loop inherited through fork has no thread running it in this process
+        if _bridge is None or _bridge[1] != os.getpid():
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="async-bridge", daemon=True).start()
+            _bridge = (loop, os.getpid())
+        return _bridge[0]
+
+
+def run_coroutine_sync(coro, timeout: float = None):
+    """
+    Run a coroutine from synchronous code and return its result. Works whether
+    or not the caller is itself inside an event loop; every call shares one
+    background loop thread instead of starting a thread and a loop of its own.
+    """
+    loop = _get_bridge_loop()
+    try:
+        caller_loop = asyncio.get_running_loop()
+    except RuntimeError:
+        caller_loop = None
+    if caller_loop is loop:
+        coro.close()
+        raise RuntimeError("run_coroutine_sync() would block the bridge loop it runs on; await the coroutine instead")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result(timeout)
+
+
+def get_executor_stats() -> dict:
+    """Per-pool utilization and saturation counters."""
+    return {kind: get_pool(kind).get_stats() for kind in POOL_CONFIG}
@@ -1,31 +1,60 @@
 import numpy as np
-import requests
+import hashlib
+import weakref
 import json
 import os
+from scipy import sparse
 
-def explain_prediction(text, model, vectorizer, top_n=5):
+from .executors import run_in_pool
+from .cache import TieredCache, SingleFlight, MISSING
+from .llm_gateway import llm_gateway
+
+# Gemini reasoning per (normalized text, verdict): reposted scam ads are near-identical,
+# so most requests are answered without an upstream call. Failures are not cached.
+REASONING_CACHE_TTL = int(os.getenv("REASONING_CACHE_TTL", str(7 * 86400)))
+reasoning_cache = TieredCache("reasoning", maxsize=int(os.getenv("REASONING_CACHE_SIZE", "5000")))
+_reasoning_inflight = SingleFlight()
+REASONING_OPTIONS = {"temperature": 0.4, "top_p": 0.8, "max_tokens": 150, "timeout": 10}
+
+def explain_prediction(text, model, vectorizer, top_n=5, input_vec=None, pred_label=None):
     """
     Enhanced: Explain the prediction using both Local ML weights and Gemini AI.
+    Pass input_vec / pred_label when the caller has already vectorized and predicted the text.
     """
     # 1. Local ML Step (Always done as fallback/baseline)
-    local_explanation = _calculate_local_explanation(text, model, vectorizer, top_n)
+    local_explanation = _calculate_local_explanation(text, model, vectorizer, top_n, input_vec, pred_label)
     
     # 2. AI Brain Step (Next Level)
-    gemini_key = os.getenv("GEMINI_API_KEY")
-    if not gemini_key:
-        # Check .env manually if not in env
+    if llm_gateway.is_configured("gemini"):
         try:
-            from dotenv import load_dotenv
-            load_dotenv()
-            gemini_key = os.getenv("GEMINI_API_KEY")
-        except: pass
+            key = _reasoning_cache_key(text, local_explanation['prediction'])
+            ai_insight = _reasoning_inflight.do(key, _cached_gemini_reasoning, key, text, local_explanation['prediction'])
+            _attach_ai_insight(local_explanation, ai_insight)
+        except Exception as e:
+            print(f"Gemini Analysis Error: {e}")
+            local_explanation['brain_mode'] = "local"
+    else:
+        local_explanation['brain_mode'] = "local"
+
+    return local_explanation
 
-    if gemini_key:
+async def explain_prediction_async(text, model, vectorizer, top_n=5, input_vec=None, pred_label=None):
+    """
+    Same as explain_prediction, but the Gemini call is awaited through the async
+    LLM gateway so it never blocks the event loop.
+    """
+    local_explanation = _calculate_local_explanation(text, model, vectorizer, top_n, input_vec, pred_label)
+    
+    if llm_gateway.is_configured("gemini"):
         try:
-            ai_insight = _get_gemini_reasoning(text, local_explanation['prediction'], gemini_key)
-            if ai_insight:
-                local_explanation['ai_summary'] = ai_insight
-                local_explanation['brain_mode'] = "gemini"
+            key = _reasoning_cache_key(text, local_explanation['prediction'])
+            ai_insight = reasoning_cache.memory.get(key)
+            if ai_insight is MISSING:
+                # Identical concurrent requests await one upstream call
+                ai_insight = await _reasoning_inflight.do_async(
+                    key, _cached_gemini_reasoning_async, key, text, local_explanation['prediction']
+                )
+            _attach_ai_insight(local_explanation, ai_insight)
         except Exception as e:
             print(f"Gemini Analysis Error: {e}")
             local_explanation['brain_mode'] = "local"
@@ -34,81 +63,145 @@ def explain_prediction(text, model, vectorizer, top_n=5):
 
     return local_explanation
 
-def _get_gemini_reasoning(text, pred_label, api_key):
+def _attach_ai_insight(explanation, ai_insight):
+    if ai_insight:
+        explanation['ai_summary'] = ai_insight
+        explanation['brain_mode'] = "gemini"
+
+def _reasoning_cache_key(text, pred_label):
+    """Verdict + SHA-256 of the prompt text with case and whitespace normalized."""
+    normalized = " ".join(str(text)[:2000].split()).casefold()
+    verdict = "real" if pred_label == 1 else "fake"
+    return f"{verdict}:{hashlib.sha256(normalized.encode('utf-8')).hexdigest()}"
+
+def _cached_gemini_reasoning(key, text, pred_label):
+    """Cached reasoning for key, calling Gemini on a miss (blocking)."""
+    reasoning = reasoning_cache.get(key)
+    if reasoning is not MISSING:
+        return reasoning
+    reasoning = _get_gemini_reasoning(text, pred_label)
+    if reasoning:
+        reasoning_cache.set(key, reasoning, ttl=REASONING_CACHE_TTL)
+    return reasoning
+
+async def _cached_gemini_reasoning_async(key, text, pred_label):
+    """Same as _cached_gemini_reasoning; the SQLite tier is read on the DB pool, Gemini through the async gateway."""
+    reasoning = await run_in_pool("db", reasoning_cache.get, key)
+    if reasoning is not MISSING:
+        return reasoning
+    response = await llm_gateway.generate("gemini", _reasoning_prompt(text, pred_label), **REASONING_OPTIONS)
+    reasoning = response.text.strip() if response.ok else None
+    if reasoning:
+        await run_in_pool("db", reasoning_cache.set, key, reasoning, REASONING_CACHE_TTL)
+    return reasoning
+
+def get_reasoning_cache_stats():
+    return {**reasoning_cache.get_stats(), "in_flight": _reasoning_inflight.get_stats()}
+
+def _reasoning_prompt(text, pred_label):
+    verdict = "LEGITIMATE" if pred_label == 1 else "SUSPICIOUS/FRAUDULENT"
+    return (
+        f"As a Cybersecurity Analyst specializing in Job Scams, analyze this job posting. "
+        f"Our AI model predicts it is {verdict}.\n\n"
+        f"JOB TEXT: {text[:2000]}\n\n"
+        f"Provide a concise summary (under 60 words) explaining WHY this might be {verdict.lower()}. "
+        f"If it's suspicious, highlight the sneaky red flags. If it's real, mention the professional hallmarks. "
+        f"Be authoritative and professional."
+    )
+
+def _get_gemini_reasoning(text, pred_label):
     """Call Gemini to get a deep analysis of the job description."""
+    response = llm_gateway.generate_sync("gemini", _reasoning_prompt(text, pred_label), **REASONING_OPTIONS)
+    return response.text.strip() if response.ok else None
+
+# ================= LOCAL EXPLANATION =================
+_FALLBACK_EXPLANATION = {"prediction": 0, "top_words": [], "details": [], "ai_summary": "In-depth scan complete."}
+
+def _calculate_local_explanation(text, model, vectorizer, top_n, input_vec=None, pred_label=None):
+    """Local ML explanation for one text (see explain_local_batch)."""
     try:
-        url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent?key={api_key}"
-        
-        verdict = "LEGITIMATE" if pred_label == 1 else "SUSPICIOUS/FRAUDULENT"
-        prompt = (
-            f"As a Cybersecurity Analyst specializing in Job Scams, analyze this job posting. "
-            f"Our AI model predicts it is {verdict}.\n\n"
-            f"JOB TEXT: {text[:2000]}\n\n"
-            f"Provide a concise summary (under 60 words) explaining WHY this might be {verdict.lower()}. "
-            f"If it's suspicious, highlight the sneaky red flags. If it's real, mention the professional hallmarks. "
-            f"Be authoritative and professional."
-        )
-        
-        payload = {
-            "contents": [{"parts": [{"text": prompt}]}],
-            "generationConfig": {
-                "temperature": 0.4,
-                "topP": 0.8,
-                "maxOutputTokens": 150,
-            }
-        }
-        
-        r = requests.post(url, json=payload, headers={"Content-Type": "application/json"}, timeout=10)
-        
-        if r.status_code == 200:
-            data = r.json()
-            reasoning = data['candidates'][0]['content']['parts'][0]['text']
-            return reasoning.strip()
-    except:
-        return None
-
-def _calculate_local_explanation(text, model, vectorizer, top_n):
-    """Legacy local ML explanation logic."""
-    try:
-        input_vec = vectorizer.transform([text])
-        feature_names = vectorizer.get_feature_names_out()
-        pred_label = model.predict(input_vec)[0]
-        
-        contributions = []
+        return explain_local_batch(
+            [text], model, vectorizer, top_n,
+            input_matrix=input_vec, pred_labels=None if pred_label is None else [pred_label]
+        )[0]
+    except Exception as e:
+        return dict(_FALLBACK_EXPLANATION)
+
+# Per-vectorizer / per-model arrays, built once instead of on every explanation
+_feature_names = weakref.WeakKeyDictionary()
+_feature_weights = weakref.WeakKeyDictionary()
+
+def _get_feature_names(vectorizer):
+    names = _feature_names.get(vectorizer)
+    if names is None:
+        names = _feature_names[vectorizer] = np.asarray(vectorizer.get_feature_names_out(), dtype=object)
+    return names
+
+def _get_feature_weights(model):
+    """(weights, signed): coef_[0] (signed) or feature_importances_, or (None, False)."""
+    weights = _feature_weights.get(model)
+    if weights is None:
         if hasattr(model, "coef_"):
-            coefs = model.coef_[0]
-            _, col_indices = input_vec.nonzero()
-            for idx in col_indices:
-                impact = coefs[idx] * input_vec[0, idx]
-                contributions.append({"word": feature_names[idx], "impact": impact})
-            
-            contributions.sort(key=lambda x: x['impact'], reverse=(pred_label == 1))
-            relevant = [c for c in contributions if (c['impact'] > 0 if pred_label == 1 else c['impact'] < 0)]
-            top_words_list = relevant[:top_n]
+            weights = (np.asarray(model.coef_[0], dtype=np.float64), True)
         elif hasattr(model, "feature_importances_"):
-            importances = model.feature_importances_
-            _, col_indices = input_vec.nonzero()
-            for idx in col_indices:
-                score = importances[idx] * input_vec[0, idx]
-                contributions.append({"word": feature_names[idx], "impact": score})
-            contributions.sort(key=lambda x: x['impact'], reverse=True)
-            top_words_list = contributions[:top_n]
+            # A property on sklearn forests that walks every tree, so it is worth caching
+            weights = (np.asarray(model.feature_importances_, dtype=np.float64), False)
         else:
-            top_words_list = []
+            weights = (None, False)
+        _feature_weights[model] = weights
+    return weights
 
-        word_list = [w['word'] for w in top_words_list]
-        if not word_list:
-            ai_summary = "Analysis conducted via global pattern recognition."
-        else:
-            joined = ", ".join(f"'{w}'" for w in word_list)
-            ai_summary = f"Flagged due to terms: {joined}." if pred_label == 0 else f"Verified by hallmarks: {joined}."
-
-        return {
-            "prediction": int(pred_label),
-            "top_words": word_list,
-            "details": top_words_list,
-            "ai_summary": ai_summary
-        }
-    except Exception as e:
-        return {"prediction": 0, "top_words": [], "details": [], "ai_summary": "In-depth scan complete."}
+def explain_local_batch(texts, model, vectorizer, top_n=5, input_matrix=None, pred_labels=None):
+    """
+    Local ML explanations for many documents at once.
+    Contributions are one element-wise product of the TF-IDF matrix with the
+    model weights; each row then keeps its top_n terms via argpartition.
+    Pass input_matrix / pred_labels when the caller has already vectorized and predicted.
+    """
+    if input_matrix is None:
+        input_matrix = vectorizer.transform(texts)
+    input_matrix = sparse.csr_matrix(input_matrix)
+    if pred_labels is None:
+        pred_labels = model.predict(input_matrix)
+
+    feature_names = _get_feature_names(vectorizer)
+    weights, signed = _get_feature_weights(model)
+    impacts = input_matrix.data * weights[input_matrix.indices] if weights is not None else None
+
+    explanations = []
+    for row, pred_label in enumerate(pred_labels):
+        top_words_list = []
+        if impacts is not None:
+            start, end = input_matrix.indptr[row], input_matrix.indptr[row + 1]
+            columns, row_impacts = input_matrix.indices[start:end], impacts[start:end]
+            # Linear models: terms pushing towards the predicted class, strongest first
+            scores = (row_impacts if pred_label == 1 else -row_impacts) if signed else row_impacts
+            if signed:
+                keep = scores > 0
+                columns, row_impacts, scores = columns[keep], row_impacts[keep], scores[keep]
+            if len(scores) > top_n:
+                top = np.argpartition(-scores, top_n - 1)[:top_n] if top_n > 0 else np.array([], dtype=int)
+                columns, row_impacts, scores = columns[top], row_impacts[top], scores[top]
+            # Ties keep vocabulary order
+            order = np.lexsort((columns, -scores))
+            top_words_list = [
+                {"word": feature_names[column], "impact": float(impact)}
+                for column, impact in zip(columns[order], row_impacts[order])
+            ]
+        explanations.append(_build_local_explanation(pred_label, top_words_list))
+    return explanations
+
+def _build_local_explanation(pred_label, top_words_list):
+    word_list = [w['word'] for w in top_words_list]
+    if not word_list:
+        ai_summary = "Analysis conducted via global pattern recognition."
+    else:
+        joined = ", ".join(f"'{w}'" for w in word_list)
+        ai_summary = f"Flagged due to terms: {joined}." if pred_label == 0 else f"Verified by hallmarks: {joined}."
 
+    return {
+        "prediction": int(pred_label),
+        "top_words": word_list,
+        "details": top_words_list,
+        "ai_summary": ai_summary
+    }
@@ -0,0 +1,117 @@
+"""
+Fuzzy Matching Module
+Character-trigram inverted index for near-duplicate name lookups (e.g. "Amaz0n Hiring" vs "Amazon Hiring").
+"""
+import re
+import math
+import heapq
+import threading
+from collections import Counter
+
+# Digit/symbol substitutions scammers use to dodge exact matching
+LEET_TABLE = str.maketrans({"0": "o", "1": "i", "3": "e", "4": "a", "5": "s", "7": "t", "8": "b", "@": "a", "$": "s", "|": "l"})
+
+# Hits a candidate needs among the query's rarest grams before it is scored
+PREFIX_EXTRA_HITS = 2
+
+# Slack for float products like 0.7 * 10 == 7.000000000000001, which would
+# otherwise round the required overlap (and size bound) up past exact-threshold matches
+_EPSILON = 1e-9
+
+
+def fold_name(text: str) -> str:
+    """Lowercase, undo leetspeak and collapse whitespace/punctuation."""
+    text = (text or "").lower().translate(LEET_TABLE)
+    return re.sub(r"[\W_]+", " ", text).strip()
+
+
+def trigrams(text: str) -> frozenset:
+    """Character trigrams of the folded text, padded so short names still produce grams."""
+    padded = f"  {fold_name(text)} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+class TrigramIndex:
+    """
+    Inverted index from trigram to keys, scored by Jaccard similarity.
+
+    search() uses prefix filtering: to reach similarity t a candidate must
+    share at least m of the query's (n - ceil(t * n) + m) rarest trigrams,
+    so only those short posting lists are counted, and the few keys that hit
+    m times are verified exactly. Common grams like "ing" are never read.
+    """
+
+    def __init__(self):
+        self._postings = {}   # trigram -> set of keys
+        self._entries = {}    # key -> (trigrams, payload)
+        self._lock = threading.Lock()
+        self._stats = {"searches": 0, "candidates": 0}
+
+    def add(self, key: str, payload=None):
+        grams = trigrams(key)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (grams, payload)
+            for gram in grams:
+                self._postings.setdefault(gram, set()).add(key)
+
+    def remove(self, key: str):
+        with self._lock:
+            self._remove(key)
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for gram in entry[0]:
+            keys = self._postings.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._postings[gram]
+
+    def search(self, query: str, k: int = 5, threshold: float = 0.5) -> list:
+        """Top-k (key, similarity, payload) with similarity >= threshold, best first."""
+        grams = trigrams(query)
+        if not grams:
+            return []
+        threshold = min(1.0, max(0.01, threshold))
+        size = len(grams)
+        min_overlap = math.ceil(threshold * size - _EPSILON)
+        min_size, max_size = threshold * size - _EPSILON, size / threshold + _EPSILON
+
+        with self._lock:
+            self._stats["searches"] += 1
+            postings = self._postings
+            rarest = sorted(grams, key=lambda gram: len(postings.get(gram, ())))
+            # Reading `required - 1` extra grams lets us demand that many hits per candidate
+            required = min(PREFIX_EXTRA_HITS, min_overlap)
+            hits = Counter()
+            for gram in rarest[:size - min_overlap + required]:
+                hits.update(postings.get(gram, ()))
+            candidates = [key for key, count in hits.items() if count >= required]
+            self._stats["candidates"] += len(candidates)
+
+            scored = []
+            for key in candidates:
+                other, payload = self._entries[key]
+                if not min_size <= len(other) <= max_size:
+                    continue
+                shared = len(grams & other)
+                score = shared / (size + len(other) - shared)
+                if score >= threshold - _EPSILON:
+                    scored.append((score, key, payload))
+
+        return [(key, round(score, 3), payload) for score, key, payload in heapq.nlargest(k, scored, key=lambda item: item[0])]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["trigrams"] = len(self._postings)
+        stats["avg_candidates"] = round(stats["candidates"] / stats["searches"], 1) if stats["searches"] else 0
+        return stats
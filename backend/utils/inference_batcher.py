@@ -0,0 +1,123 @@
+"""
+Inference Micro-Batching Module
+Groups concurrent single-text predictions into one sparse transform + predict_proba call.
+"""
+import os
+import time
+import asyncio
+from typing import Optional
+
+from .executors import run_in_pool
+
+# Requests arriving within this window (or until the batch is full) are scored together
+DEFAULT_WINDOW_MS = float(os.getenv("INFERENCE_BATCH_WINDOW_MS", "5"))
+DEFAULT_MAX_BATCH_SIZE = int(os.getenv("INFERENCE_BATCH_MAX_SIZE", "32"))
+
+# Upper bounds of the batch-size histogram buckets
+HISTOGRAM_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128]
+
+
+class InferenceBatcher:
+    """
+    Asyncio micro-batcher in front of the TF-IDF vectorizer and classifier.
+
+    score(text) returns (sparse_row, probabilities) for a single text, but the
+    actual work is done once per batch on the bounded "inference" pool so the
+    event loop stays free while the batch is being scored. A failed batch
+    fails every request in it.
+    """
+
+    def __init__(self, model, vectorizer, max_batch_size: Optional[int] = None, window_ms: Optional[float] = None):
+        self.model = model
+        self.vectorizer = vectorizer
+        self.max_batch_size = max(1, max_batch_size or DEFAULT_MAX_BATCH_SIZE)
+        self.window = (DEFAULT_WINDOW_MS if window_ms is None else window_ms) / 1000.0
+
+        self._loop = None
+        self._pending = []
+        self._timer = None
+        self._tasks = set()     # batches being scored; referenced so they are not collected mid-flight
+
+        self._stats = {
+            "batches": 0,
+            "requests": 0,
+            "max_batch_size_seen": 0,
+            "errors": 0,
+            "last_batch_ms": 0.0,
+            "histogram": {str(b): 0 for b in HISTOGRAM_BUCKETS}
+        }
+
+    async def score(self, text: str):
+        """Queue one text and wait for its (vector_row, probabilities) result."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # New event loop (e.g. after a reload): drop state bound to the old one
+            self._loop = loop
+            self._pending = []
+            self._timer = None
+
+        future = loop.create_future()
+        self._pending.append((text, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch = self._pending[:self.max_batch_size]
+        self._pending = self._pending[self.max_batch_size:]
+        if self._pending:
+            self._timer = self._loop.call_later(self.window, self._flush)
+
+        if batch:
+            task = self._loop.create_task(self._score_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _score_batch(self, batch):
+        texts = [text for text, _ in batch]
+        start = time.perf_counter()
+        try:
+            vectors, probabilities = await run_in_pool("inference", self._predict, texts)
+        except Exception as e:
+            self._stats["errors"] += 1
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self._record(len(batch), (time.perf_counter() - start) * 1000)
+        for i, (_, future) in enumerate(batch):
+            if not future.done():
+                future.set_result((vectors[i], probabilities[i]))
+
+    def _predict(self, texts):
+        vectors = self.vectorizer.transform(texts)
+        return vectors, self.model.predict_proba(vectors)
+
+    def _record(self, size: int, elapsed_ms: float):
+        stats = self._stats
+        stats["batches"] += 1
+        stats["requests"] += size
+        stats["max_batch_size_seen"] = max(stats["max_batch_size_seen"], size)
+        stats["last_batch_ms"] = round(elapsed_ms, 2)
+        bucket = next((b for b in HISTOGRAM_BUCKETS if size <= b), HISTOGRAM_BUCKETS[-1])
+        stats["histogram"][str(bucket)] += 1
+
+    def get_stats(self) -> dict:
+        """Batch-size statistics for monitoring."""
+        stats = dict(self._stats)
+        stats["histogram"] = dict(self._stats["histogram"])
+        stats["avg_batch_size"] = round(stats["requests"] / stats["batches"], 2) if stats["batches"] else 0
+        stats["window_ms"] = self.window * 1000
+        stats["max_batch_size"] = self.max_batch_size
+        stats["queued"] = len(self._pending)
+        stats["in_flight"] = len(self._tasks)
+        return stats
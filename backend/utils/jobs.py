@@ -0,0 +1,461 @@
+"""
+Batch Jobs Module
+Background CSV and URL-list scans: chunked, scored by a process pool, tracked in SQLite and resumable.
+"""
+import os
+import json
+import time
+import uuid
+import queue
+import shutil
+import asyncio
+import threading
+from datetime import datetime
+from concurrent.futures import FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import pandas as pd
+
+from .db_pool import get_db
+from .executors import SCORING_PROCESSES
+from .batch_scoring import read_csv_chunks, RESULT_COLUMNS, CSV_CHUNK_ROWS
+from .scoring_pool import get_scoring_pool, discard_scoring_pool, score_chunk, score_worker_texts
+from .scraper import scrape_job_details, new_client
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+JOBS_DB_PATH = os.path.join(BASE_DIR, "data", "jobs.db")
+JOBS_DIR = os.path.join(BASE_DIR, "data", "jobs")
+
+# Chunks submitted to the pool ahead of completion, per worker (bounds parent memory)
+JOB_CHUNKS_AHEAD = int(os.getenv("JOB_CHUNKS_AHEAD", "2"))
+JOB_URL_CHUNK = int(os.getenv("JOB_URL_CHUNK", "50"))
+# Concurrent fetches per URL chunk inside a worker
+JOB_URL_CONCURRENCY = int(os.getenv("JOB_URL_CONCURRENCY", "8"))
+# A running job's owner refreshes its heartbeat this often; a job whose heartbeat is
+# older than JOB_STALE_AFTER is treated as orphaned and may be claimed by another process
+JOB_HEARTBEAT_INTERVAL = float(os.getenv("JOB_HEARTBEAT_INTERVAL", "10"))
+JOB_STALE_AFTER = float(os.getenv("JOB_STALE_AFTER", "60"))
+
+JOB_KINDS = ("csv", "urls")
+URL_RESULT_COLUMNS = ["Url"] + RESULT_COLUMNS + ["Error"]
+RESULT_FORMATS = ("json", "ndjson", "csv")
+
+
+# ================= WORKER PROCESSES =================
+# Run in the shared scoring pool, whose processes hold the model (see utils.scoring_pool)
+def _score_url_chunk(urls: list) -> pd.DataFrame:
+    return asyncio.run(_scrape_and_score(urls))
+
+
+async def _scrape_and_score(urls: list) -> pd.DataFrame:
+    semaphore = asyncio.Semaphore(JOB_URL_CONCURRENCY)
+    async with new_client() as client:
+        async def scrape(url):
+            async with semaphore:
+                return await scrape_job_details(url, client=client)
+        scraped = await asyncio.gather(*(scrape(url) for url in urls))
+
+    rows = []
+    for url, data in zip(urls, scraped):
+        data = data or {"error": "Failed to scrape URL"}
+        rows.append({
+            "Url": url,
+            "Title": data.get("title", ""),
+            "Company": data.get("company", ""),
+            "Prediction": None,
+            "Confidence (%)": None,
+            "Error": data.get("error"),
+            "_text": f"{data.get('title', '')} {data.get('description', '')} {data.get('company', '')}"
+        })
+
+    scored = [row for row in rows if not row["Error"]]
+    if scored:
+        labels, confidences = score_worker_texts([row["_text"] for row in scored])
+        for row, label, confidence in zip(scored, labels, confidences):
+            row["Prediction"] = "✅ Real Job" if label == 1 else "❌ Fake Job"
+            row["Confidence (%)"] = float(confidence)
+    return pd.DataFrame(rows, columns=URL_RESULT_COLUMNS)
+
+
+# ================= JOB MANAGER =================
+class _ClaimLost(Exception):
+    """Another process took over the job this one was running."""
+
+
+class JobManager:
+    """
+    Runs submitted jobs one at a time on a dispatcher thread.
+
+    The dispatcher reads the job's input chunk by chunk, fans the chunks out to
+    the shared scoring pool (at most JOB_CHUNKS_AHEAD per worker in flight) and records
+    each finished chunk in SQLite together with its NDJSON output file. A job
+    interrupted by a restart is picked up by resume(), which skips the chunks
+    already recorded. on_results(kind, results_frame) is called once per
+    finished chunk (e.g. to store predictions).
+
+    Several processes (e.g. gunicorn workers) may share one jobs database. A
+    job only runs after its status is claimed in a single UPDATE, and the
+    owner keeps a heartbeat; a job whose owner stops heartbeating can be
+    claimed by another process.
+    """
+
+    def __init__(self, model_path: str, vectorizer_path: str, db_path: str = None, jobs_dir: str = None,
+                 workers: int = None, on_results=None):
+        self.model_path = model_path
+        self.vectorizer_path = vectorizer_path
+        self.db = get_db(db_path or JOBS_DB_PATH)
+        self.jobs_dir = jobs_dir or JOBS_DIR
+        self.workers = max(1, workers or SCORING_PROCESSES)
+        self.on_results = on_results
+        self._queue = queue.Queue()
+        self._thread = None
+        self._pool = None
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._live = {}     # job id -> (run start time, rows_done at run start)
+        self._heartbeats = {}   # job id -> last heartbeat written
+        self._token = uuid.uuid4().hex[:8]
+        self._init_db()
+
+    @property
+    def owner(self) -> str:
+        # Includes the pid so workers forked from one preloaded manager still differ
+        return f"{os.getpid()}-{self._token}"
+
+    def _init_db(self):
+        with self.db.writer() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'queued',
+                    input_path TEXT,
+                    chunk_rows INTEGER,
+                    total_rows INTEGER,
+                    rows_done INTEGER DEFAULT 0,
+                    chunks_done INTEGER DEFAULT 0,
+                    error TEXT,
+                    created_at REAL,
+                    started_at REAL,
+                    finished_at REAL,
+                    owner TEXT,
+                    heartbeat REAL
+                )
+            """)
+            # Databases created before jobs were claimed lack the owner columns
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for column, column_type in (("owner", "TEXT"), ("heartbeat", "REAL")):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {column_type}")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS job_chunks (
+                    job_id TEXT NOT NULL,
+                    chunk_index INTEGER NOT NULL,
+                    rows INTEGER,
+                    output_path TEXT,
+                    finished_at REAL,
+                    PRIMARY KEY (job_id, chunk_index)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status)")
+
+    # ----- Submission -----
+    def submit_csv(self, source, chunk_rows: int = None) -> str:
+        """Copy a CSV file object into the job folder and queue it."""
+        job_id, job_dir = self._new_job_dir()
+        input_path = os.path.join(job_dir, "input.csv")
+        with open(input_path, "wb") as f:
+            shutil.copyfileobj(source, f)
+        return self._create(job_id, "csv", input_path, chunk_rows or CSV_CHUNK_ROWS)
+
+    def submit_urls(self, urls: list, chunk_rows: int = None) -> str:
+        """Queue a list of job-posting URLs to scrape and score."""
+        job_id, job_dir = self._new_job_dir()
+        input_path = os.path.join(job_dir, "urls.txt")
+        with open(input_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(urls))
+        return self._create(job_id, "urls", input_path, chunk_rows or JOB_URL_CHUNK, total_rows=len(urls))
+
+    def _new_job_dir(self):
+        job_id = uuid.uuid4().hex
+        job_dir = os.path.join(self.jobs_dir, job_id)
+        os.makedirs(job_dir, exist_ok=True)
+        return job_id, job_dir
+
+    def _create(self, job_id, kind, input_path, chunk_rows, total_rows=None) -> str:
+        with self.db.writer() as conn:
+            conn.execute("""
+                INSERT INTO jobs (id, kind, status, input_path, chunk_rows, total_rows, created_at)
+                VALUES (?, ?, 'queued', ?, ?, ?, ?)
+            """, (job_id, kind, input_path, max(1, int(chunk_rows)), total_rows, time.time()))
+        self._ensure_started()
+        self._queue.put(job_id)
+        return job_id
+
+    def resume(self) -> int:
+        """
+        Queue every job left queued or running by a previous process. Returns how many.
+        Jobs another live process is running are skipped when they fail to be claimed.
+        """
+        with self.db.reader() as conn:
+            rows = conn.execute(
+                "SELECT id FROM jobs WHERE status IN ('queued', 'running') ORDER BY created_at"
+            ).fetchall()
+        if rows:
+            self._ensure_started()
+            for (job_id,) in rows:
+                self._queue.put(job_id)
+            print(f"[JOBS] Resuming {len(rows)} unfinished job(s)")
+        return len(rows)
+
+    # ----- Status and results -----
+    def get(self, job_id: str):
+        with self.db.reader() as conn:
+            row = conn.execute("""
+                SELECT id, kind, status, total_rows, rows_done, chunks_done, error, created_at, started_at, finished_at
+                FROM jobs WHERE id = ?
+            """, (job_id,)).fetchone()
+        return self._describe(row) if row else None
+
+    def list(self, limit: int = 20) -> list:
+        with self.db.reader() as conn:
+            rows = conn.execute("""
+                SELECT id, kind, status, total_rows, rows_done, chunks_done, error, created_at, started_at, finished_at
+                FROM jobs ORDER BY created_at DESC LIMIT ?
+            """, (limit,)).fetchall()
+        return [self._describe(row) for row in rows]
+
+    def _describe(self, row) -> dict:
+        job_id, kind, status, total_rows, rows_done, chunks_done, error, created_at, started_at, finished_at = row
+        throughput = 0.0
+        live = self._live.get(job_id)
+        if live is not None:
+            # This run only, so time spent before a restart does not drag the rate down
+            elapsed = time.time() - live[0]
+            throughput = (rows_done - live[1]) / elapsed if elapsed > 0 else 0.0
+        elif started_at and finished_at and finished_at > started_at:
+            throughput = rows_done / (finished_at - started_at)
+
+        def fmt(ts):
+            return datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S") if ts else None
+
+        return {
+            "job_id": job_id,
+            "kind": kind,
+            "status": status,
+            "rows_done": rows_done,
+            "total_rows": total_rows,
+            "chunks_done": chunks_done,
+            "progress": round(rows_done / total_rows * 100, 1) if total_rows else (100.0 if status == "completed" else None),
+            "throughput_rows_per_sec": round(throughput, 1),
+            "error": error,
+            "created_at": fmt(created_at),
+            "started_at": fmt(started_at),
+            "finished_at": fmt(finished_at)
+        }
+
+    def iter_results(self, job_id: str, format: str = "ndjson"):
+        """Yield the finished job's results in input order as json, ndjson or csv text."""
+        with self.db.reader() as conn:
+            kind = conn.execute("SELECT kind FROM jobs WHERE id = ?", (job_id,)).fetchone()[0]
+            paths = [r[0] for r in conn.execute(
+                "SELECT output_path FROM job_chunks WHERE job_id = ? ORDER BY chunk_index", (job_id,)
+            )]
+        columns = URL_RESULT_COLUMNS if kind == "urls" else RESULT_COLUMNS
+
+        if format == "json":
+            yield '{"results":['
+        elif format == "csv":
+            yield ",".join(columns) + "\n"
+        first = True
+        for path in paths:
+            with open(path, "r", encoding="utf-8") as f:
+                lines = f.read().splitlines()
+            if not lines:
+                continue
+            if format == "ndjson":
+                yield "\n".join(lines) + "\n"
+            elif format == "json":
+                yield ("" if first else ",") + ",".join(lines)
+            else:
+                yield pd.DataFrame([json.loads(line) for line in lines], columns=columns).to_csv(index=False, header=False)
+            first = False
+        if format == "json":
+            yield "]}"
+
+    # ----- Dispatcher -----
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="job-dispatcher", daemon=True)
+                self._thread.start()
+
+    def _get_pool(self):
+        # Shared with the parallel CSV scorer; remembered so a broken pool can be discarded
+        self._pool = get_scoring_pool(self.model_path, self.vectorizer_path, self.workers)
+        return self._pool
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                job_id = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                self._run_job(job_id)
+            except _ClaimLost:
+                pass  # another process owns the job now and will finish it
+            except Exception as e:
+                if self._stop.is_set():
+                    break  # interrupted by shutdown; the job resumes on next start
+                print(f"[JOBS] Job {job_id} failed: {e}")
+                self._finish(job_id, "failed", str(e))
+                if isinstance(e, BrokenProcessPool):
+                    discard_scoring_pool(self._pool)  # a worker died; start a fresh pool for the next job
+            finally:
+                self._live.pop(job_id, None)
+                self._heartbeats.pop(job_id, None)
+
+    def _run_job(self, job_id: str):
+        with self.db.reader() as conn:
+            job = conn.execute(
+                "SELECT kind, status, input_path, chunk_rows, rows_done FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+            done = {r[0] for r in conn.execute("SELECT chunk_index FROM job_chunks WHERE job_id = ?", (job_id,))}
+        if job is None or job[1] not in ("queued", "running"):
+            return
+        kind, _, input_path, chunk_rows, rows_done = job
+        if not self._claim(job_id):
+            return
+        self._live[job_id] = (time.time(), rows_done)
+
+        pool = self._get_pool()
+        score = score_chunk if kind == "csv" else _score_url_chunk
+        max_in_flight = self.workers * max(1, JOB_CHUNKS_AHEAD)
+        in_flight = {}
+        total_rows = 0
+        try:
+            for index, chunk in enumerate(self._iter_input(kind, input_path, chunk_rows)):
+                total_rows += len(chunk)
+                if index in done:
+                    continue
+                while len(in_flight) >= max_in_flight:
+                    self._collect(job_id, kind, in_flight)
+                if self._stop.is_set() or not self._heartbeat(job_id):
+                    return
+                in_flight[pool.submit(score, chunk)] = index
+
+            # The whole input has been read, so the total is known now
+            with self.db.writer() as conn:
+                conn.execute("UPDATE jobs SET total_rows = ? WHERE id = ?", (total_rows, job_id))
+            while in_flight:
+                self._collect(job_id, kind, in_flight)
+                if not self._heartbeat(job_id):
+                    return
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+        if not self._stop.is_set():
+            self._finish(job_id, "completed")
+
+    def _claim(self, job_id) -> bool:
+        """Atomically take ownership of a queued job, or of a running one whose owner went silent."""
+        now = time.time()
+        with self.db.writer() as conn:
+            claimed = conn.execute("""
+                UPDATE jobs SET status = 'running', owner = ?, heartbeat = ?, started_at = IFNULL(started_at, ?)
+                WHERE id = ? AND (status = 'queued' OR (status = 'running' AND IFNULL(heartbeat, 0) < ?))
+            """, (self.owner, now, now, job_id, now - JOB_STALE_AFTER)).rowcount
+        if not claimed:
+            print(f"[JOBS] Job {job_id} is owned by another process; skipping")
+            return False
+        self._heartbeats[job_id] = now
+        return True
+
+    def _heartbeat(self, job_id) -> bool:
+        """Refresh this process's claim (at most every JOB_HEARTBEAT_INTERVAL). False if it was lost."""
+        now = time.time()
+        last = self._heartbeats.get(job_id, 0)
+        if now - last < JOB_HEARTBEAT_INTERVAL:
+            return True
+        with self.db.writer() as conn:
+            held = conn.execute("UPDATE jobs SET heartbeat = ? WHERE id = ? AND owner = ? AND status = 'running'",
+                                (now, job_id, self.owner)).rowcount
+        self._heartbeats[job_id] = now
+        if not held:
+            print(f"[JOBS] Lost the claim on job {job_id}; stopping")
+        return bool(held)
+
+    def _iter_input(self, kind, input_path, chunk_rows):
+        if kind == "csv":
+            yield from read_csv_chunks(input_path, chunk_rows)
+            return
+        with open(input_path, "r", encoding="utf-8") as f:
+            urls = [line.strip() for line in f if line.strip()]
+        for start in range(0, len(urls), chunk_rows):
+            yield urls[start:start + chunk_rows]
+
+    def _collect(self, job_id, kind, in_flight):
+        # Wake up at least once per heartbeat interval so long chunks keep the claim alive
+        finished, _ = wait(list(in_flight), timeout=JOB_HEARTBEAT_INTERVAL, return_when=FIRST_COMPLETED)
+        if not finished and not self._heartbeat(job_id):
+            raise _ClaimLost(job_id)
+        for future in finished:
+            index = in_flight.pop(future)
+            self._record_chunk(job_id, kind, index, future.result())
+
+    def _record_chunk(self, job_id, kind, index, results: pd.DataFrame):
+        # Output first (atomically), then the row that marks the chunk done
+        path = os.path.join(self.jobs_dir, job_id, f"chunk-{index:06d}.ndjson")
+        tmp_path = f"{path}.{self.owner}.tmp"
+        records = results.astype(object).where(results.notna(), None).to_dict(orient="records")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n" for record in records)
+        os.replace(tmp_path, path)
+        with self.db.writer() as conn:
+            inserted = conn.execute("""
+                INSERT OR IGNORE INTO job_chunks (job_id, chunk_index, rows, output_path, finished_at)
+                VALUES (?, ?, ?, ?, ?)
+            """, (job_id, index, len(results), path, time.time())).rowcount
+            if inserted:
+                conn.execute("UPDATE jobs SET rows_done = rows_done + ?, chunks_done = chunks_done + 1 WHERE id = ?",
+                             (len(results), job_id))
+        if not inserted:
+            return  # already recorded (and its results saved) by an earlier run
+        if self.on_results is not None:
+            try:
+                self.on_results(kind, results)
+            except Exception as e:
+                print(f"[JOBS] on_results failed for {job_id}: {e}")
+
+    def _finish(self, job_id, status, error=None):
+        # Only the owner settles a job, so a process that lost its claim cannot overwrite the result
+        with self.db.writer() as conn:
+            conn.execute("UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ? AND owner = ?",
+                         (status, error, time.time(), job_id, self.owner))
+
+    # ----- Lifecycle -----
+    def shutdown(self, timeout: float = 10.0):
+        """Stop dispatching; unfinished jobs go back to 'queued' and resume on next start."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        # Release this process's claims so a restart (or another worker) picks them up right away
+        with self.db.writer() as conn:
+            conn.execute("UPDATE jobs SET status = 'queued', owner = NULL WHERE owner = ? AND status = 'running'",
+                         (self.owner,))
+
+    def get_stats(self) -> dict:
+        with self.db.reader() as conn:
+            counts = dict(conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return {
+            "workers": self.workers,
+            "queued": self._queue.qsize(),
+            "dispatcher_alive": self._thread is not None and self._thread.is_alive(),
+            "jobs": counts
+        }
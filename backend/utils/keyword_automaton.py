@@ -0,0 +1,108 @@
+"""
+Keyword Automaton Module
+Aho-Corasick multi-phrase matcher: finds every occurrence of every phrase in one linear pass.
+"""
+from collections import deque
+
+
+class KeywordAutomaton:
+    """
+    Build once with add() + build(), then call find_all() per text.
+
+    Matching is plain substring matching (like `phrase in text`), so the cost
+    of a scan depends on the text length and the number of matches, not on
+    how many phrases are loaded.
+    """
+
+    def __init__(self):
+        self._goto = [{}]        # state -> {char: next_state}
+        self._fail = [0]         # state -> failure state
+        self._out = [[]]         # state -> ids of phrases ending exactly here
+        self._dict_link = [0]    # state -> nearest failure-chain state with output (0 = none)
+        self._entries = []       # id -> (phrase, payload)
+        self._built = False
+
+    def add(self, phrase: str, payload: dict = None) -> int:
+        """Register a phrase with an arbitrary payload. Returns the entry id."""
+        if not phrase:
+            raise ValueError("Empty phrase")
+        state = 0
+        for ch in phrase:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+                self._dict_link.append(0)
+                self._goto[state][ch] = nxt
+            state = nxt
+        entry_id = len(self._entries)
+        self._entries.append((phrase, payload or {}))
+        self._out[state].append(entry_id)
+        self._built = False
+        return entry_id
+
+    def build(self):
+        """Compute failure and output links (breadth-first)."""
+        queue = deque()
+        for nxt in self._goto[0].values():
+            self._fail[nxt] = 0
+            self._dict_link[nxt] = 0
+            queue.append(nxt)
+
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                fail_state = self._fail[nxt]
+                self._dict_link[nxt] = fail_state if self._out[fail_state] else self._dict_link[fail_state]
+
+        self._built = True
+        return self
+
+    def iter_matches(self, text: str):
+        """Yield (entry_id, start, end) for every occurrence, in order of end offset."""
+        if not self._built:
+            self.build()
+        goto, fail, out, dict_link, entries = self._goto, self._fail, self._out, self._dict_link, self._entries
+
+        state = 0
+        for end, ch in enumerate(text, 1):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+
+            hit = state if out[state] else dict_link[state]
+            while hit:
+                for entry_id in out[hit]:
+                    yield entry_id, end - len(entries[entry_id][0]), end
+                hit = dict_link[hit]
+
+    def find_all(self, text: str) -> list:
+        """Every occurrence as {"phrase", "start", "end", **payload}."""
+        matches = []
+        for entry_id, start, end in self.iter_matches(text):
+            phrase, payload = self._entries[entry_id]
+            matches.append({"phrase": phrase, "start": start, "end": end, **payload})
+        return matches
+
+    def first_matches(self, text: str) -> dict:
+        """First occurrence of each matched entry: {entry_id: (start, end)}."""
+        found = {}
+        for entry_id, start, end in self.iter_matches(text):
+            if entry_id not in found:
+                found[entry_id] = (start, end)
+        return found
+
+    def entry(self, entry_id: int):
+        """(phrase, payload) for an entry id."""
+        return self._entries[entry_id]
+
+    def __len__(self):
+        return len(self._entries)
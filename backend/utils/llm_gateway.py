@@ -0,0 +1,281 @@
+"""
+LLM Gateway Module
+Pooled keep-alive clients for every Gemini / OpenAI call, with per-provider concurrency limits, timeouts and one response model.
+"""
+import os
+import time
+import asyncio
+import threading
+from typing import Optional
+
+import httpx
+from pydantic import BaseModel
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENV_PATH = os.path.join(BASE_DIR, ".env")
+
+# Whole-call budget (waiting for a slot + the request itself), unless the caller passes its own
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "10"))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "3"))
+# Concurrent calls per provider; callers beyond it wait for a slot within their timeout
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_KEEPALIVE_CONNECTIONS", "20"))
+
+PROVIDERS = {
+    "gemini": {"key_env": "GEMINI_API_KEY", "model": os.getenv("GEMINI_MODEL", "gemini-1.5-flash")},
+    "openai": {"key_env": "OPENAI_API_KEY", "model": os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")},
+}
+GEMINI_URL = "https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent"
+OPENAI_URL = "https://api.openai.com/v1/chat/completions"
+
+
+class LLMResponse(BaseModel):
+    ok: bool
+    provider: str
+    model: str
+    text: Optional[str] = None
+    error: Optional[str] = None
+    status_code: Optional[int] = None
+    latency_ms: float = 0.0
+
+
+# ================= API KEYS =================
+_env_loaded = False
+_env_lock = threading.Lock()
+
+
+def get_api_key(provider: str) -> Optional[str]:
+    """Key from the environment, falling back to backend/.env (read once per process)."""
+    global _env_loaded
+    key_env = PROVIDERS[provider]["key_env"]
+    if not os.getenv(key_env) and not _env_loaded:
+        with _env_lock:
+            if not _env_loaded:
+                _env_loaded = True
+                try:
+                    from dotenv import load_dotenv
+                    load_dotenv(ENV_PATH)
+                except Exception as e:
+                    print(f"[LLM] .env read error: {e}")
+    return os.getenv(key_env) or None
+
+
+# ================= PROVIDER FORMATS =================
+
+def _build_request(provider, api_key, model, prompt, messages, system, max_tokens, temperature, top_p):
+    """(url, headers, payload) for one generation call."""
+    if provider == "gemini":
+        text = prompt if prompt is not None else "\n".join(f"{m.get('role', 'user')}: {m.get('content', '')}" for m in messages)
+        if system:
+            text = f"{system}\n\n{text}"
+        payload = {"contents": [{"parts": [{"text": text}]}]}
+        config = {name: value for name, value in (
+            ("temperature", temperature), ("topP", top_p), ("maxOutputTokens", max_tokens)
+        ) if value is not None}
+        if config:
+            payload["generationConfig"] = config
+        return GEMINI_URL.format(model=model), {"x-goog-api-key": api_key}, payload
+
+    chat = [{"role": "system", "content": system}] if system else []
+    chat += list(messages) if messages is not None else [{"role": "user", "content": prompt}]
+    payload = {"model": model, "messages": chat}
+    for name, value in (("max_tokens", max_tokens), ("temperature", temperature), ("top_p", top_p)):
+        if value is not None:
+            payload[name] = value
+    return OPENAI_URL, {"Authorization": f"Bearer {api_key}"}, payload
+
+
+def _parse_text(provider, data) -> Optional[str]:
+    try:
+        if provider == "gemini":
+            return data["candidates"][0]["content"]["parts"][0]["text"]
+        return data["choices"][0]["message"]["content"]
+    except (KeyError, IndexError, TypeError):
+        return None
+
+
+# ================= GATEWAY =================
+
+class LLMGateway:
+    """
+    Single entry point for LLM calls.
+
+    generate() is for async handlers: one pooled httpx.AsyncClient per event
+    loop and an asyncio.Semaphore per provider. generate_sync() is for
+    worker threads and shares one pooled httpx.Client with a thread
+    semaphore of the same size. Both return an LLMResponse and never raise
+    for provider errors or timeouts.
+    """
+
+    def __init__(self, max_concurrency: int = None, timeout: float = None):
+        self.max_concurrency = max(1, max_concurrency or LLM_MAX_CONCURRENCY)
+        self.timeout = timeout or LLM_TIMEOUT
+        self._limits = httpx.Limits(
+            max_connections=self.max_concurrency * len(PROVIDERS),
+            max_keepalive_connections=LLM_KEEPALIVE_CONNECTIONS
+        )
+
+        self._loop = None
+        self._client = None
+        self._slots = {}
+        self._sync_client = None
+        self._sync_slots = {provider: threading.BoundedSemaphore(self.max_concurrency) for provider in PROVIDERS}
+        self._lock = threading.Lock()
+        self._stats = {
+            provider: {"requests": 0, "ok": 0, "errors": 0, "timeouts": 0, "busy": 0, "in_flight": 0, "total_ms": 0.0}
+            for provider in PROVIDERS
+        }
+
+    def is_configured(self, provider: str) -> bool:
+        return get_api_key(provider) is not None
+
+    def _async_state(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # New event loop (e.g. after a reload): the old client's connections belong to the old loop
+            self._loop = loop
+            self._client = httpx.AsyncClient(limits=self._limits)
+            self._slots = {provider: asyncio.Semaphore(self.max_concurrency) for provider in PROVIDERS}
+        return self._client, self._slots
+
+    def _get_sync_client(self) -> httpx.Client:
+        with self._lock:
+            if self._sync_client is None:
+                self._sync_client = httpx.Client(limits=self._limits)
+            return self._sync_client
+
+    def _prepare(self, provider, model, prompt, messages):
+        if provider not in PROVIDERS:
+            raise ValueError(f"Unknown LLM provider: {provider}")
+        if prompt is None and messages is None:
+            raise ValueError("Either prompt or messages is required")
+        model = model or PROVIDERS[provider]["model"]
+        return model, get_api_key(provider)
+
+    def _http_timeout(self, remaining: float) -> httpx.Timeout:
+        remaining = max(0.1, remaining)
+        return httpx.Timeout(remaining, connect=min(LLM_CONNECT_TIMEOUT, remaining))
+
+    async def generate(self, provider: str, prompt: str = None, messages: list = None, system: str = None,
+                       model: str = None, max_tokens: int = None, temperature: float = None,
+                       top_p: float = None, timeout: float = None) -> LLMResponse:
+        """One completion from provider ("gemini" / "openai") without blocking the event loop."""
+        model, api_key = self._prepare(provider, model, prompt, messages)
+        if not api_key:
+            return LLMResponse(ok=False, provider=provider, model=model, error="API key not configured")
+
+        timeout = timeout or self.timeout
+        client, slots = self._async_state()
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(slots[provider].acquire(), timeout)
+        except asyncio.TimeoutError:
+            return self._record(provider, model, started, "busy", error="concurrency limit reached")
+
+        self._begin(provider)
+        try:
+            url, headers, payload = _build_request(provider, api_key, model, prompt, messages, system, max_tokens, temperature, top_p)
+            remaining = timeout - (time.perf_counter() - started)
+            # httpx timeouts are per phase (connect / each read); wait_for caps the whole call
+            response = await asyncio.wait_for(
+                client.post(url, json=payload, headers=headers, timeout=self._http_timeout(remaining)),
+                max(0.1, remaining)
+            )
+            return self._from_http(provider, model, started, response)
+        except (httpx.TimeoutException, asyncio.TimeoutError):
+            return self._record(provider, model, started, "timeouts", error=f"timed out after {timeout}s")
+        except Exception as e:
+            return self._record(provider, model, started, "errors", error=str(e))
+        finally:
+            self._end(provider)
+            slots[provider].release()
+
+    def generate_sync(self, provider: str, prompt: str = None, messages: list = None, system: str = None,
+                      model: str = None, max_tokens: int = None, temperature: float = None,
+                      top_p: float = None, timeout: float = None) -> LLMResponse:
+        """Blocking variant of generate() for executor threads and scripts."""
+        model, api_key = self._prepare(provider, model, prompt, messages)
+        if not api_key:
+            return LLMResponse(ok=False, provider=provider, model=model, error="API key not configured")
+
+        timeout = timeout or self.timeout
+        started = time.perf_counter()
+        slot = self._sync_slots[provider]
+        if not slot.acquire(timeout=timeout):
+            return self._record(provider, model, started, "busy", error="concurrency limit reached")
+
+        self._begin(provider)
+        try:
+            url, headers, payload = _build_request(provider, api_key, model, prompt, messages, system, max_tokens, temperature, top_p)
+            response = self._get_sync_client().post(
+                url, json=payload, headers=headers,
+                timeout=self._http_timeout(timeout - (time.perf_counter() - started))
+            )
+            return self._from_http(provider, model, started, response)
+        except httpx.TimeoutException:
+            return self._record(provider, model, started, "timeouts", error=f"timed out after {timeout}s")
+        except Exception as e:
+            return self._record(provider, model, started, "errors", error=str(e))
+        finally:
+            self._end(provider)
+            slot.release()
+
+    def _from_http(self, provider, model, started, response) -> LLMResponse:
+        if response.status_code != 200:
+            return self._record(provider, model, started, "errors", error=f"HTTP {response.status_code}: {response.text[:200]}",
+                                status_code=response.status_code)
+        text = _parse_text(provider, response.json())
+        if not text:
+            return self._record(provider, model, started, "errors", error="Empty response", status_code=200)
+        return self._record(provider, model, started, "ok", text=text, status_code=200)
+
+    # ----- Stats -----
+    def _begin(self, provider):
+        with self._lock:
+            self._stats[provider]["in_flight"] += 1
+
+    def _end(self, provider):
+        with self._lock:
+            self._stats[provider]["in_flight"] -= 1
+
+    def _record(self, provider, model, started, outcome, text=None, error=None, status_code=None) -> LLMResponse:
+        latency_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            stats = self._stats[provider]
+            stats["requests"] += 1
+            stats[outcome] += 1
+            stats["total_ms"] += latency_ms
+        if error:
+            print(f"[LLM] {provider} ({model}): {error}")
+        return LLMResponse(
+            ok=outcome == "ok", provider=provider, model=model, text=text, error=error,
+            status_code=status_code, latency_ms=round(latency_ms, 1)
+        )
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            providers = {}
+            for provider, stats in self._stats.items():
+                stats = dict(stats)
+                total_ms = stats.pop("total_ms")
+                stats["avg_latency_ms"] = round(total_ms / stats["requests"], 1) if stats["requests"] else 0
+                stats["configured"] = get_api_key(provider) is not None
+                providers[provider] = stats
+        return {"providers": providers, "max_concurrency": self.max_concurrency, "timeout": self.timeout}
+
+    async def aclose(self):
+        """Close the pooled clients (app shutdown)."""
+        client, self._client, self._loop = self._client, None, None
+        if client is not None:
+            await client.aclose()
+        with self._lock:
+            sync_client, self._sync_client = self._sync_client, None
+        if sync_client is not None:
+            sync_client.close()
+
+
+llm_gateway = LLMGateway()
+
+
+def get_llm_stats() -> dict:
+    return llm_gateway.get_stats()
@@ -0,0 +1,502 @@
+"""
+Model Artifacts Module
+Flat, memory-mapped copies of the TF-IDF vectorizer and classifier that load instantly and share pages across workers.
+
+Convert the pickles once after every retrain (run from the backend folder):
+    python -m utils.model_artifacts [--model models/best_model.pkl] [--vectorizer models/tfidf_vectorizer.pkl] [--out models/compiled]
+"""
+import os
+import re
+import json
+import time
+import shutil
+import hashlib
+import argparse
+import tempfile
+import unicodedata
+
+import joblib
+import numpy as np
+from scipy import sparse
+from scipy.special import expit, softmax
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL_PATH = os.path.join(BASE_DIR, "models", "best_model.pkl")
+VECTORIZER_PATH = os.path.join(BASE_DIR, "models", "tfidf_vectorizer.pkl")
+COMPILED_DIR = os.path.join(BASE_DIR, "models", "compiled")
+
+# "auto" = compiled artifacts when they match the pickles, else the pickles; "pickle" = always the pickles
+MODEL_FORMAT = os.getenv("MODEL_FORMAT", "auto").lower()
+
+FORMAT_VERSION = 1
+MANIFEST = "manifest.json"
+
+# 64-bit FNV-1a, used to look terms up by hash
+FNV_OFFSET = np.uint64(14695981039346656037)
+FNV_PRIME = np.uint64(1099511628211)
+
+
+# ================= LOADING =================
+
+def load_model(model_path: str = MODEL_PATH, vectorizer_path: str = VECTORIZER_PATH, compiled_dir: str = COMPILED_DIR):
+    """
+    Return (model, vectorizer). The memory-mapped artifacts are used when
+    compiled_dir holds a conversion of exactly these pickles; otherwise the
+    pickles are loaded as before.
+    """
+    if MODEL_FORMAT != "pickle":
+        manifest = read_manifest(compiled_dir)
+        if manifest and _sources_match(manifest.get("sources"), (model_path, vectorizer_path)):
+            started = time.perf_counter()
+            model, vectorizer = load_compiled(compiled_dir, manifest)
+            print(f"[MODEL] Mapped {compiled_dir} in {(time.perf_counter() - started) * 1000:.1f}ms")
+            return model, vectorizer
+        if manifest:
+            print(f"[MODEL] {compiled_dir} does not match the pickles; run python -m utils.model_artifacts to refresh it")
+    return joblib.load(model_path), joblib.load(vectorizer_path)
+
+
+def read_manifest(compiled_dir: str):
+    try:
+        with open(os.path.join(compiled_dir, MANIFEST), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get("format_version") == FORMAT_VERSION else None
+
+
+def load_compiled(compiled_dir: str = COMPILED_DIR, manifest: dict = None):
+    """(model, vectorizer) backed by read-only memory maps of compiled_dir."""
+    manifest = manifest or read_manifest(compiled_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"No compiled model artifacts in {compiled_dir}")
+
+    def array(name):
+        # Plain ndarray views of the maps: same shared pages, without np.memmap's per-index overhead
+        return np.asarray(np.load(os.path.join(compiled_dir, f"{name}.npy"), mmap_mode="r"))
+
+    vectorizer = MappedTfidfVectorizer(compiled_dir, manifest["vectorizer"], array)
+    kind = manifest["model"]["kind"]
+    if kind == "linear":
+        model = MappedLinearClassifier(compiled_dir, manifest["model"], array)
+    elif kind == "forest":
+        model = MappedForestClassifier(compiled_dir, manifest["model"], array)
+    else:
+        raise ValueError(f"Unknown model kind in {compiled_dir}: {kind}")
+    return model, vectorizer
+
+
+def _load_compiled_vectorizer(compiled_dir):
+    return load_compiled(compiled_dir)[1]
+
+
+def _load_compiled_model(compiled_dir):
+    return load_compiled(compiled_dir)[0]
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _fingerprint(*paths) -> list:
+    return [
+        {"name": os.path.basename(path), "size": os.path.getsize(path),
+         "mtime_ns": os.stat(path).st_mtime_ns, "sha256": _file_sha256(path)}
+        for path in paths
+    ]
+
+
+def _sources_match(sources, paths) -> bool:
+    """
+    True if the artifacts were converted from these pickles. Size + mtime is
+    enough on the machine that converted them; after a checkout or copy the
+    mtimes differ and the contents are hashed instead (still far cheaper than unpickling).
+    """
+    if not sources or len(sources) != len(paths):
+        return False
+    for source, path in zip(sources, paths):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        if stat.st_size != source["size"]:
+            return False
+        if stat.st_mtime_ns != source["mtime_ns"] and _file_sha256(path) != source["sha256"]:
+            return False
+    return True
+
+
+# ================= VECTORIZER =================
+
+class MappedTfidfVectorizer:
+    """
+    transform() / get_feature_names_out() stand-in for a fitted word-analyzer
+    TfidfVectorizer (or CountVectorizer).
+
+    Instead of a vocabulary dict in every worker, the vocabulary is three
+    memory-mapped arrays ordered by term hash: the hashes, the UTF-8 terms and
+    their columns. A batch's tokens are hashed column-wise in numpy and found
+    with one binary search over the hashes.
+    """
+
+    def __init__(self, compiled_dir: str, spec: dict, array):
+        self.compiled_dir = compiled_dir
+        self.spec = spec
+        self.term_hashes = array("vocab_hashes")
+        self.terms = array("vocab_terms")
+        self.term_columns = array("vocab_columns")
+        self.idf_ = array("idf") if spec["use_idf"] else None
+        self.n_features = len(self.terms)
+        self.ngram_range = tuple(spec["ngram_range"])
+        self.stop_words = frozenset(spec["stop_words"] or ())
+        self.dtype = np.dtype(spec["dtype"])
+        self._token_pattern = re.compile(spec["token_pattern"])
+        self._feature_names = None
+
+    def __reduce__(self):
+        # Pickled into a spawned worker: map the same files rather than copying the arrays
+        return _load_compiled_vectorizer, (self.compiled_dir,)
+
+    def _analyze(self, doc) -> list:
+        if isinstance(doc, bytes):
+            doc = doc.decode("utf-8")
+        elif not isinstance(doc, str):
+            doc = "" if doc is None else str(doc)
+        if self.spec["lowercase"]:
+            doc = doc.lower()
+        if self.spec["strip_accents"]:
+            doc = _strip_accents(doc, self.spec["strip_accents"])
+
+        tokens = self._token_pattern.findall(doc)
+        if self.stop_words:
+            tokens = [t for t in tokens if t not in self.stop_words]
+
+        min_n, max_n = self.ngram_range
+        if max_n == 1:
+            return tokens
+        grams = list(tokens) if min_n == 1 else []
+        for n in range(max(min_n, 2), min(max_n, len(tokens)) + 1):
+            grams.extend(map(" ".join, zip(*(tokens[i:] for i in range(n)))))
+        return grams
+
+    def transform(self, raw_documents) -> sparse.csr_matrix:
+        if isinstance(raw_documents, str):
+            raise ValueError("Iterable over raw text documents expected, string object received.")
+
+        doc_grams = [self._analyze(doc) for doc in raw_documents]
+        n_docs = len(doc_grams)
+        keys = np.array([g.encode("utf-8") for doc in doc_grams for g in doc], dtype=np.bytes_)
+        if not keys.size or not self.n_features:
+            return sparse.csr_matrix((n_docs, self.n_features), dtype=self.dtype)
+
+        hashes = _term_hashes(keys)
+        positions = np.minimum(np.searchsorted(self.term_hashes, hashes), self.n_features - 1)
+        # Compare the terms too, so a hash collision with an unknown token cannot match
+        found = (self.term_hashes[positions] == hashes) & (self.terms[positions] == keys)
+        rows = np.repeat(np.arange(n_docs), [len(doc) for doc in doc_grams])[found]
+        columns = self.term_columns[positions[found]]
+
+        # Duplicate (row, column) pairs are summed into term counts
+        X = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=self.dtype), (rows, columns)), shape=(n_docs, self.n_features)
+        )
+        X.sum_duplicates()
+        if self.spec["binary"]:
+            X.data[:] = 1
+        if self.spec["sublinear_tf"]:
+            np.log(X.data, X.data)
+            X.data += 1
+        if self.idf_ is not None:
+            X.data *= self.idf_[X.indices]
+        if self.spec["norm"]:
+            row_ids = np.repeat(np.arange(n_docs), np.diff(X.indptr))
+            weights = X.data ** 2 if self.spec["norm"] == "l2" else np.abs(X.data)
+            norms = np.bincount(row_ids, weights=weights, minlength=n_docs)
+            if self.spec["norm"] == "l2":
+                norms = np.sqrt(norms)
+            norms[norms == 0] = 1
+            X.data /= norms[row_ids]
+        return X
+
+    def get_feature_names_out(self, input_features=None) -> np.ndarray:
+        if self._feature_names is None:
+            names = np.empty(self.n_features, dtype=object)
+            names[np.asarray(self.term_columns)] = [term.decode("utf-8") for term in self.terms]
+            self._feature_names = names
+        return self._feature_names
+
+
+def _term_hashes(keys: np.ndarray) -> np.ndarray:
+    """FNV-1a of each UTF-8 term, one byte column at a time; the NUL padding of shorter terms is skipped."""
+    keys = np.ascontiguousarray(keys)
+    hashes = np.full(len(keys), FNV_OFFSET, dtype=np.uint64)
+    if not keys.dtype.itemsize:
+        return hashes
+    data = keys.view(np.uint8).reshape(len(keys), keys.dtype.itemsize)
+    for i in range(data.shape[1]):
+        column = data[:, i].astype(np.uint64)
+        hashes = np.where(column != 0, (hashes ^ column) * FNV_PRIME, hashes)
+    return hashes
+
+
+def _strip_accents(doc: str, mode: str) -> str:
+    """Same results as sklearn's strip_accents_ascii / strip_accents_unicode."""
+    normalized = unicodedata.normalize("NFKD", doc)
+    if mode == "ascii":
+        return normalized.encode("ASCII", "ignore").decode("ASCII")
+    return "".join(c for c in normalized if not unicodedata.combining(c))
+
+
+# ================= CLASSIFIERS =================
+
+class MappedLinearClassifier:
+    """predict / predict_proba / decision_function of a fitted LogisticRegression over mapped coefficients."""
+
+    kind = "linear"
+
+    def __init__(self, compiled_dir: str, spec: dict, array):
+        self.compiled_dir = compiled_dir
+        self.multi_class = spec["multi_class"]
+        self.coef_ = array("coef")
+        self.intercept_ = array("intercept")
+        self.classes_ = array("classes")
+
+    def __reduce__(self):
+        return _load_compiled_model, (self.compiled_dir,)
+
+    def decision_function(self, X) -> np.ndarray:
+        scores = np.asarray(X @ self.coef_.T) + self.intercept_
+        return scores.ravel() if scores.shape[1] == 1 else scores
+
+    def predict_proba(self, X) -> np.ndarray:
+        decision = self.decision_function(X)
+        if decision.ndim == 1:
+            positive = expit(decision)
+            return np.column_stack([1 - positive, positive])
+        if self.multi_class == "multinomial":
+            return softmax(decision, axis=1)
+        probabilities = expit(decision)
+        return probabilities / probabilities.sum(axis=1, keepdims=True)
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
+
+
+class MappedForestClassifier:
+    """
+    predict / predict_proba of a fitted decision tree or random forest.
+
+    All trees' nodes are stored back to back in flat arrays (children,
+    split feature, threshold, leaf class probabilities). Leaf probabilities
+    and feature importances stay mapped; the split structure is copied into
+    sklearn's compiled Tree objects once at load, so rows are routed at the
+    same speed as with the pickle.
+    """
+
+    kind = "forest"
+
+    def __init__(self, compiled_dir: str, spec: dict, array):
+        from sklearn.tree._tree import Tree, NODE_DTYPE
+
+        self.compiled_dir = compiled_dir
+        self.offsets = array("tree_offsets")
+        self.leaf_proba = array("tree_value")
+        self.feature_importances_ = array("feature_importances")
+        self.classes_ = array("classes")
+
+        left, right = array("tree_left"), array("tree_right")
+        feature, threshold = array("tree_feature"), array("tree_threshold")
+        n_classes = np.array([len(self.classes_)], dtype=np.intp)
+        self.trees = []
+        for start, end, depth in zip(self.offsets[:-1], self.offsets[1:], spec["depths"]):
+            # Fields routing does not use (impurity, sample counts) are left at zero
+            nodes = np.zeros(end - start, dtype=NODE_DTYPE)
+            nodes["left_child"], nodes["right_child"] = left[start:end], right[start:end]
+            nodes["feature"], nodes["threshold"] = feature[start:end], threshold[start:end]
+            tree = Tree(spec["n_features"], n_classes, 1)
+            tree.__setstate__({
+                "max_depth": depth, "node_count": end - start, "nodes": nodes,
+                "values": np.ascontiguousarray(self.leaf_proba[start:end, np.newaxis, :])
+            })
+            self.trees.append(tree)
+
+    def __reduce__(self):
+        return _load_compiled_model, (self.compiled_dir,)
+
+    def predict_proba(self, X) -> np.ndarray:
+        # Trees route float32 input, as sklearn does
+        X = sparse.csr_matrix(X, dtype=np.float32) if sparse.issparse(X) else np.asarray(X, dtype=np.float32)
+        if sparse.issparse(X):
+            X.sort_indices()
+        probabilities = np.zeros((X.shape[0], len(self.classes_)))
+        for start, tree in zip(self.offsets, self.trees):
+            probabilities += self.leaf_proba[start + tree.apply(X)]
+        return probabilities / len(self.trees)
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
+
+
+# ================= CONVERSION =================
+
+def _vectorizer_arrays(vectorizer, arrays: dict) -> dict:
+    params = vectorizer.get_params()
+    if (params.get("analyzer") != "word" or params.get("tokenizer") or params.get("preprocessor")
+            or params.get("input", "content") != "content" or callable(params.get("strip_accents"))):
+        raise ValueError("Only word-analyzer vectorizers with the built-in tokenizer and preprocessor can be converted")
+    if not hasattr(vectorizer, "vocabulary_"):
+        raise ValueError("The vectorizer is not fitted")
+
+    # Ordered by term hash for the binary search in transform()
+    terms = np.array([term.encode("utf-8") for term in vectorizer.vocabulary_], dtype=np.bytes_)
+    columns = np.fromiter(vectorizer.vocabulary_.values(), dtype=np.int64, count=len(terms))
+    hashes = _term_hashes(terms)
+    order = np.argsort(hashes, kind="stable")
+    if len(hashes) and (np.diff(hashes[order]) == 0).any():
+        raise ValueError("Two vocabulary terms share a 64-bit hash; the vocabulary cannot be converted")
+    arrays["vocab_hashes"] = hashes[order]
+    arrays["vocab_terms"] = terms[order]
+    arrays["vocab_columns"] = columns[order]
+
+    use_idf = bool(params.get("use_idf", False))
+    if use_idf:
+        arrays["idf"] = np.asarray(vectorizer.idf_, dtype=np.float64)
+    stop_words = vectorizer.get_stop_words()
+    return {
+        "lowercase": bool(params["lowercase"]),
+        "strip_accents": params["strip_accents"],
+        "token_pattern": params["token_pattern"],
+        "stop_words": sorted(stop_words) if stop_words else None,
+        "ngram_range": list(params["ngram_range"]),
+        "binary": bool(params["binary"]),
+        "use_idf": use_idf,
+        "sublinear_tf": bool(params.get("sublinear_tf", False)),
+        "norm": params.get("norm"),
+        "dtype": np.dtype(params["dtype"]).name
+    }
+
+
+def _classes_array(model) -> np.ndarray:
+    classes = np.asarray(model.classes_)
+    # Object arrays cannot be memory-mapped
+    return classes.astype(str) if classes.dtype == object else classes
+
+
+def _model_arrays(model, arrays: dict) -> dict:
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.ensemble import RandomForestClassifier, ExtraTreesClassifier
+    from sklearn.tree import DecisionTreeClassifier
+
+    arrays["classes"] = _classes_array(model)
+
+    if isinstance(model, LogisticRegression):
+        coef = model.coef_.toarray() if sparse.issparse(model.coef_) else model.coef_
+        arrays["coef"] = np.ascontiguousarray(coef, dtype=np.float64)
+        arrays["intercept"] = np.asarray(model.intercept_, dtype=np.float64)
+        multi_class = "binary"
+        if len(model.classes_) > 2:
+            multi_class = model.multi_class
+            if multi_class == "auto":
+                multi_class = "ovr" if model.solver == "liblinear" else "multinomial"
+        return {"kind": "linear", "type": type(model).__name__, "multi_class": multi_class}
+
+    if isinstance(model, (RandomForestClassifier, ExtraTreesClassifier, DecisionTreeClassifier)):
+        if model.n_outputs_ != 1:
+            raise ValueError("Only single-output tree models can be converted")
+        trees = [est.tree_ for est in model.estimators_] if hasattr(model, "estimators_") else [model.tree_]
+        value = []
+        for tree in trees:
+            counts = tree.value[:, 0, :]
+            totals = counts.sum(axis=1, keepdims=True)
+            totals[totals == 0] = 1
+            value.append(counts / totals)
+        # Child indices stay local to their tree; tree_offsets[i] is where tree i starts
+        arrays["tree_offsets"] = np.concatenate([[0], np.cumsum([tree.node_count for tree in trees])]).astype(np.int64)
+        arrays["tree_left"] = np.concatenate([tree.children_left for tree in trees]).astype(np.int64)
+        arrays["tree_right"] = np.concatenate([tree.children_right for tree in trees]).astype(np.int64)
+        arrays["tree_feature"] = np.concatenate([tree.feature for tree in trees]).astype(np.int64)
+        arrays["tree_threshold"] = np.concatenate([tree.threshold for tree in trees]).astype(np.float64)
+        arrays["tree_value"] = np.concatenate(value).astype(np.float64)
+        arrays["feature_importances"] = np.asarray(model.feature_importances_, dtype=np.float64)
+        return {"kind": "forest", "type": type(model).__name__, "n_features": int(model.n_features_in_),
+                "depths": [int(tree.max_depth) for tree in trees]}
+
+    raise ValueError(f"{type(model).__name__} cannot be converted; keep serving the pickle")
+
+
+def _verify(model, vectorizer, mapped_model, mapped_vectorizer):
+    """Score sample texts built from the vocabulary both ways; raise if anything differs."""
+    names = list(vectorizer.get_feature_names_out())
+    texts = [" ".join(names[i:i + 25]) for i in range(0, min(len(names), 5000), 25)]
+    texts += ["", "Work from home, earn $500 daily. No experience needed!", "Senior Python developer at Acme Corp"]
+
+    expected, actual = vectorizer.transform(texts), mapped_vectorizer.transform(texts)
+    if expected.shape != actual.shape or abs(expected - actual).max() > 1e-9:
+        raise ValueError("Converted vectorizer output differs from the pickle")
+    if not np.allclose(model.predict_proba(expected), mapped_model.predict_proba(actual), atol=1e-9):
+        raise ValueError("Converted model probabilities differ from the pickle")
+    if list(vectorizer.get_feature_names_out()) != list(mapped_vectorizer.get_feature_names_out()):
+        raise ValueError("Converted feature names differ from the pickle")
+
+
+def convert(model_path: str = MODEL_PATH, vectorizer_path: str = VECTORIZER_PATH, out_dir: str = COMPILED_DIR) -> dict:
+    """
+    Write the flat artifacts for a pair of pickles into out_dir and return the manifest.
+    The new directory is built and verified next to the old one and swapped in by
+    rename; running workers keep reading their already-mapped (unlinked) files.
+    """
+    model, vectorizer = joblib.load(model_path), joblib.load(vectorizer_path)
+    arrays = {}
+    manifest = {
+        "format_version": FORMAT_VERSION,
+        "sources": _fingerprint(model_path, vectorizer_path),
+        "vectorizer": _vectorizer_arrays(vectorizer, arrays),
+        "model": _model_arrays(model, arrays)
+    }
+
+    parent = os.path.dirname(os.path.abspath(out_dir))
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=".compiled-", dir=parent)
+    try:
+        for name, array in arrays.items():
+            np.save(os.path.join(staging, f"{name}.npy"), array, allow_pickle=False)
+        with open(os.path.join(staging, MANIFEST), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        _verify(model, vectorizer, *load_compiled(staging))
+
+        previous = None
+        if os.path.exists(out_dir):
+            previous = f"{staging}.previous"
+            os.rename(out_dir, previous)
+        os.rename(staging, out_dir)
+        if previous:
+            shutil.rmtree(previous, ignore_errors=True)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert the model pickles into memory-mappable artifacts.")
+    parser.add_argument("--model", default=MODEL_PATH, help="Path to best_model.pkl")
+    parser.add_argument("--vectorizer", default=VECTORIZER_PATH, help="Path to tfidf_vectorizer.pkl")
+    parser.add_argument("--out", default=COMPILED_DIR, help="Output directory")
+    args = parser.parse_args()
+
+    manifest = convert(args.model, args.vectorizer, args.out)
+    size = sum(os.path.getsize(os.path.join(args.out, name)) for name in os.listdir(args.out))
+
+    started = time.perf_counter()
+    joblib.load(args.model), joblib.load(args.vectorizer)
+    pickle_ms = (time.perf_counter() - started) * 1000
+    started = time.perf_counter()
+    _, mapped_vectorizer = load_compiled(args.out)
+    mapped_ms = (time.perf_counter() - started) * 1000
+
+    print(f"[MODEL] Wrote {manifest['model']['type']} and {mapped_vectorizer.n_features} terms ({size / 1024:.0f} KB) to {args.out}")
+    print(f"[MODEL] Cold load: pickle {pickle_ms:.1f}ms, mapped {mapped_ms:.1f}ms")
@@ -0,0 +1,128 @@
+"""
+Parallel Scoring Module
+Splits large batches into shards scored across the shared scoring pool and merges them in input order.
+
+Command-line batch scorer (run from the backend folder):
+    python -m utils.parallel_scoring jobs.csv -o scored.csv [--workers 8] [--chunk-rows 20000]
+"""
+import os
+import sys
+import time
+import argparse
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+
+from .executors import SCORING_PROCESSES
+from .model_artifacts import load_model, MODEL_PATH, VECTORIZER_PATH
+from .batch_scoring import read_csv_chunks, combine_text, score_texts, build_results, RESULT_COLUMNS
+from .scoring_pool import (
+    get_scoring_pool, discard_scoring_pool, shutdown_scoring_pool, get_scoring_pool_stats, score_shard
+)
+
+# Below this many rows a batch is scored in-process; shipping shards costs more than it saves
+PARALLEL_MIN_ROWS = int(os.getenv("PARALLEL_MIN_ROWS", "2000"))
+
+
+class ParallelScorer:
+    """
+    Shards a chunk of rows across worker processes and merges the results in
+    input order.
+
+    The shards go to the process-wide scoring pool (utils.scoring_pool), which
+    background jobs use too; its workers load the model from model_path and
+    vectorizer_path, which must be the files model and vectorizer came from.
+    With one worker, or for small batches, scoring runs in-process with model
+    and vectorizer, and the pool is only started by the first batch of at least
+    min_rows rows (or by an explicit start()).
+    """
+
+    def __init__(self, model, vectorizer, workers: int = None, min_rows: int = None,
+                 model_path: str = MODEL_PATH, vectorizer_path: str = VECTORIZER_PATH):
+        self.model = model
+        self.vectorizer = vectorizer
+        self.model_path = model_path
+        self.vectorizer_path = vectorizer_path
+        self.workers = max(1, workers or SCORING_PROCESSES)
+        self.min_rows = PARALLEL_MIN_ROWS if min_rows is None else min_rows
+        self._stats = {"batches": 0, "parallel_batches": 0, "rows": 0, "shards": 0}
+
+    @property
+    def parallel(self) -> bool:
+        return self.workers > 1
+
+    def start(self):
+        """Start the workers now instead of on the first large batch."""
+        if self.parallel:
+            # Workers are started on demand; touch each one so they load the model here
+            list(self._get_pool().map(int, range(self.workers)))
+        return self
+
+    def _get_pool(self):
+        return get_scoring_pool(self.model_path, self.vectorizer_path, self.workers)
+
+    def score_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Score one chunk; same output as batch_scoring.score_frame."""
+        self._stats["batches"] += 1
+        self._stats["rows"] += len(df)
+        if not self.parallel or len(df) < self.min_rows:
+            labels, confidences = score_texts(combine_text(df), self.model, self.vectorizer)
+            return build_results(df, labels, confidences)
+
+        shard_rows = -(-len(df) // self.workers)
+        shards = [df.iloc[start:start + shard_rows] for start in range(0, len(df), shard_rows)]
+        self._stats["parallel_batches"] += 1
+        self._stats["shards"] += len(shards)
+        # map() yields in submission order, so the merge keeps input order
+        pool = self._get_pool()
+        try:
+            parts = list(pool.map(score_shard, shards))
+        except BrokenProcessPool:
+            discard_scoring_pool(pool)  # a worker died; the next batch starts a fresh pool
+            raise
+        labels = np.concatenate([part[0] for part in parts])
+        confidences = np.concatenate([part[1] for part in parts])
+        return build_results(df, labels, confidences)
+
+    def score_csv(self, source, chunk_rows: int = None):
+        """Yield one scored RESULT_COLUMNS frame per chunk of the CSV."""
+        for chunk in read_csv_chunks(source, chunk_rows):
+            if len(chunk):
+                yield self.score_frame(chunk)
+
+    def get_stats(self) -> dict:
+        stats = dict(self._stats)
+        stats.update({"workers": self.workers, "min_rows": self.min_rows, "pool": get_scoring_pool_stats()})
+        return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score a CSV of job postings across worker processes.")
+    parser.add_argument("input", help="CSV file to score")
+    parser.add_argument("-o", "--output", help="Output file (.csv or .ndjson); defaults to stdout as CSV")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: SCORING_PROCESSES)")
+    parser.add_argument("--chunk-rows", type=int, default=20000, help="Rows read and sharded at a time")
+    args = parser.parse_args()
+
+    scorer = ParallelScorer(*load_model(MODEL_PATH, VECTORIZER_PATH), workers=args.workers).start()
+    as_ndjson = bool(args.output) and args.output.endswith(".ndjson")
+    out = open(args.output, "w", encoding="utf-8", newline="") if args.output else sys.stdout
+
+    started = time.perf_counter()
+    rows = 0
+    try:
+        if not as_ndjson:
+            out.write(",".join(RESULT_COLUMNS) + "\n")
+        for results in scorer.score_csv(args.input, args.chunk_rows):
+            if as_ndjson:
+                out.write(results.to_json(orient="records", lines=True, force_ascii=False).rstrip("\n") + "\n")
+            else:
+                results.to_csv(out, index=False, header=False)
+            rows += len(results)
+            print(f"[SCORE] {rows} rows, {rows / (time.perf_counter() - started):.0f} rows/s", file=sys.stderr)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        shutdown_scoring_pool()
+    print(f"[SCORE] Done: {rows} rows in {time.perf_counter() - started:.1f}s with {scorer.workers} worker(s)", file=sys.stderr)
@@ -3,50 +3,24 @@ Comprehensive Fraud Risk Scoring Module
 Combines multiple signals to generate a unified risk score.
 """
 from typing import Optional
-from .domain_check import analyze_url_security
-from .company_verify import verify_company
-from .blacklist import check_blacklist
-from .explain import explain_prediction
+from .analysis_context import AnalysisContext
+from .rule_engine import RulePack, get_rules
 
-# Suspicious keywords in job descriptions
-HIGH_RISK_KEYWORDS = [
-    "wire transfer", "western union", "money gram", "bitcoin payment",
-    "personal bank account", "send money", "upfront fee", "processing fee",
-    "registration fee", "training fee", "guaranteed income", "easy money",
-    "work from home $5000", "unlimited earning", "no experience needed",
-    "telegram interview", "whatsapp interview", "interview via chat",
-    "copy paste job", "data entry $500", "typing job", "ad posting job",
-    "email processing", "rebate processing", "envelope stuffing",
-    "mlm", "network marketing", "recruitment bonus", "pyramid",
-    "nigerian prince", "inheritance", "lottery winner"
-]
+# Blacklist-check score (out of 100) for a company that only resembles a reported one,
+# scaled by name similarity; exact blacklist hits score 100
+POSSIBLE_MATCH_MAX_SCORE = 50
 
-MEDIUM_RISK_KEYWORDS = [
-    "urgently hiring", "immediate start", "asap", "fast cash",
-    "no resume required", "no interview", "same day pay",
-    "flexible schedule $", "part time $1000", "simple tasks",
-    "mystery shopper", "secret shopper", "personal assistant",
-    "sugar daddy", "sugar mommy", "benefactor"
-]
 
-# Positive indicators (reduce risk)
-POSITIVE_INDICATORS = [
-    "401k", "health insurance", "dental", "vision", "pto",
-    "paid time off", "equity", "stock options", "onsite",
-    "hybrid", "team collaboration", "agile", "scrum",
-    "background check", "drug test", "references required",
-    "linkedin profile", "portfolio", "github", "years experience"
-]
-
-
-def calculate_text_risk(text: str) -> dict:
+def calculate_text_risk(text: str, rules: Optional[RulePack] = None) -> dict:
     """
     Analyze job description text for risk indicators.
-    Returns risk score and flagged keywords.
+    Returns risk score and flagged keywords (with the offset of their first occurrence).
+    Keywords, salary patterns and contact rules come from the active rule pack.
     """
     if not text:
         return {"score": 20, "flags": ["No job description provided"], "positive": []}
     
+    rules = rules or get_rules()
     text_lower = text.lower()
     result = {
         "score": 0,
@@ -55,61 +29,48 @@ def calculate_text_risk(text: str) -> dict:
         "keyword_details": []
     }
     
-    # Check high risk keywords
-    for keyword in HIGH_RISK_KEYWORDS:
-        if keyword in text_lower:
-            result["score"] += 25
-            result["flags"].append(f"🚨 '{keyword}'")
-            result["keyword_details"].append({
-                "word": keyword,
-                "severity": "high",
-                "impact": 25
-            })
-            
-    # Check medium risk keywords
-    for keyword in MEDIUM_RISK_KEYWORDS:
-        if keyword in text_lower:
-            result["score"] += 12
-            result["flags"].append(f"⚠️ '{keyword}'")
-            result["keyword_details"].append({
-                "word": keyword,
-                "severity": "medium",
-                "impact": 12
-            })
-            
-    # Check positive indicators
-    for indicator in POSITIVE_INDICATORS:
-        if indicator in text_lower:
-            result["score"] -= 5
-            result["positive"].append(indicator)
+    # Single pass over the text for every keyword and contact phrase
+    automaton = rules.text_automaton
+    hits = []
+    contact_hits = set()
+    for entry_id, (start, end) in automaton.first_matches(text_lower).items():
+        phrase, payload = automaton.entry(entry_id)
+        if payload["kind"] == "contact":
+            contact_hits.add((payload["rule"], payload["role"]))
+        else:
+            hits.append((payload["rank"], phrase, payload, start, end))
+    hits.sort(key=lambda hit: hit[0])
+    
+    for _, keyword, payload, start, end in hits:
+        result["score"] += payload["impact"]
+        if payload["impact"] < 0:
+            result["positive"].append(keyword)
+            continue
+        result["flags"].append(f"{payload['icon']} '{keyword}'" if payload["icon"] else f"'{keyword}'")
+        result["keyword_details"].append({
+            "word": keyword,
+            "severity": payload["severity"],
+            "impact": payload["impact"],
+            "start": start,
+            "end": end
+        })
             
     # Salary red flags
-    import re
-    salary_patterns = [
-        (r'\$\d{4,}\s*(?:per|/|a)\s*(?:day|daily)', 40, "Unrealistic daily pay"),
-        (r'\$\d{5,}\s*(?:per|/|a)\s*(?:week|weekly)', 35, "Suspiciously high weekly pay"),
-        (r'earn\s*\$?\d{4,}\s*(?:fast|quick|easy)', 30, "Get rich quick language"),
-    ]
-    
-    for pattern, score, desc in salary_patterns:
-        if re.search(pattern, text_lower):
-            result["score"] += score
-            result["flags"].append(f"💰 {desc}")
+    for rule in rules.salary_patterns.matches(text_lower):
+        result["score"] += rule["score"]
+        result["flags"].append(rule["flag"])
             
     # Check for lack of specific requirements (red flag)
-    if len(text) < 100:
-        result["score"] += 15
-        result["flags"].append("Very short job description")
+    min_length = rules.min_length
+    if min_length and len(text) < min_length["chars"]:
+        result["score"] += min_length["score"]
+        result["flags"].append(min_length["flag"])
         
     # Check for contact methods (red flags)
-    if "telegram" in text_lower or "whatsapp" in text_lower:
-        result["score"] += 30
-        result["flags"].append("🚨 Uses Telegram/WhatsApp for communication")
-        
-    if "personal email" in text_lower or "@gmail.com" in text_lower or "@yahoo.com" in text_lower:
-        if "hr" not in text_lower and "recruiting" not in text_lower:
-            result["score"] += 15
-            result["flags"].append("Uses personal email for business")
+    for index, rule in enumerate(rules.contact_rules):
+        if (index, "phrases") in contact_hits and (index, "unless") not in contact_hits:
+            result["score"] += rule["score"]
+            result["flags"].append(rule["flag"])
             
     return result
 
@@ -120,10 +81,12 @@ def calculate_comprehensive_risk(
     company: str = "",
     url: Optional[str] = None,
     model = None,
-    vectorizer = None
+    vectorizer = None,
+    context: Optional[AnalysisContext] = None
 ) -> dict:
     """
     Calculate comprehensive fraud risk score combining all signals.
+    If a context is given, its cached results are reused instead of re-running each check.
     
     Returns a complete risk assessment with:
     - Overall risk score (0-100)
@@ -148,8 +111,16 @@ def calculate_comprehensive_risk(
         "is_blacklisted": False
     }
     
+    if context is None:
+        context = AnalysisContext(
+            title=title, description=text, company=company, url=url,
+            model=model, vectorizer=vectorizer
+        )
+    company = context.company
+    url = context.url
+    
     # 1. Text Analysis
-    text_result = calculate_text_risk(f"{title} {text} {company}")
+    text_result = calculate_text_risk(context.text)
     result["breakdown"]["text_analysis"]["score"] = min(100, max(0, text_result["score"]))
     result["breakdown"]["text_analysis"]["details"] = text_result
     result["flags"].extend(text_result["flags"][:5])  # Top 5 flags
@@ -157,7 +128,7 @@ def calculate_comprehensive_risk(
     
     # 2. Company Verification
     if company:
-        company_result = verify_company(company)
+        company_result = context.company_check
         company_score = company_result.get("risk_score", 30)
         if company_result.get("verified"):
             company_score = 0
@@ -171,7 +142,7 @@ def calculate_comprehensive_risk(
             
     # 3. URL Security Analysis
     if url:
-        url_result = analyze_url_security(url)
+        url_result = context.url_security
         url_score = url_result.get("risk_score", 0)
         result["breakdown"]["url_security"]["score"] = min(100, url_score)
         result["breakdown"]["url_security"]["details"] = url_result
@@ -181,20 +152,25 @@ def calculate_comprehensive_risk(
         result["flags"].extend([f for f in url_result.get("flags", [])[:3] if "🚨" in f or "⚠️" in f])
         
     # 4. Blacklist Check
-    blacklist_result = check_blacklist(url=url, company=company)
+    blacklist_result = context.blacklist_check
     if blacklist_result.get("is_blacklisted"):
         result["is_blacklisted"] = True
         result["breakdown"]["blacklist_check"]["score"] = 100
         result["breakdown"]["blacklist_check"]["details"] = blacklist_result
         result["flags"].insert(0, blacklist_result.get("recommendation", "🚨 BLACKLISTED"))
+    elif blacklist_result.get("possible_matches"):
+        # Similar name only: a partial contribution that scales with similarity, never the blacklist override
+        similarity = blacklist_result["possible_matches"][0].get("similarity", 0)
+        result["breakdown"]["blacklist_check"]["score"] = round(POSSIBLE_MATCH_MAX_SCORE * similarity)
+        result["breakdown"]["blacklist_check"]["details"] = blacklist_result
+        result["flags"].append(blacklist_result.get("recommendation"))
     else:
         result["breakdown"]["blacklist_check"]["score"] = 0
         
     # 5. AI Model Prediction
-    if model and vectorizer:
+    if context.has_model:
         try:
-            full_text = f"{title} {text} {company}"
-            explanation = explain_prediction(full_text, model, vectorizer)
+            explanation = context.explanation
             
             # If AI says Fake, add to risk
             if explanation.get("prediction") == 0:  # Fake
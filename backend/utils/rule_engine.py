@@ -0,0 +1,254 @@
+"""
+Rule Engine Module
+Loads the heuristic rule pack (data/rule_pack.json), compiles it into matchers and hot-swaps it when the file changes.
+"""
+import os
+import re
+import json
+import time
+import threading
+
+try:
+    from re import _parser as sre_parse, _constants as sre_constants
+except ImportError:  # Python < 3.11
+    import sre_parse, sre_constants
+
+from .keyword_automaton import KeywordAutomaton
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RULE_PACK_PATH = os.getenv("RULE_PACK_PATH", os.path.join(BASE_DIR, "data", "rule_pack.json"))
+RULE_PACK_CHECK_INTERVAL = float(os.getenv("RULE_PACK_CHECK_INTERVAL", "2"))  # seconds between mtime checks
+
+
+class RegexSet:
+    """
+    A list of regex rules evaluated together.
+
+    Each pattern is reduced to the longest literal it requires (e.g. "telegram",
+    or "offer" for job.*offer.*\\d+). One Aho-Corasick pass over the input finds
+    which of those literals occur, and only the rules whose literal was seen are
+    run, so the scan cost does not grow with the number of rules. Patterns with
+    no required literal (e.g. a top-level alternation) are always run.
+    """
+
+    def __init__(self, rules: list):
+        self.rules = list(rules)
+        self._regexes = [re.compile(rule["pattern"]) for rule in self.rules]  # reports the offending pattern
+        self._literals = KeywordAutomaton()
+        self._literal_rules = []     # automaton entry id -> rule indexes sharing that literal
+        self._always = []            # rule indexes without a required literal
+        by_literal = {}
+        for index, regex in enumerate(self._regexes):
+            literal = _required_literal(regex.pattern)
+            if literal is None:
+                self._always.append(index)
+            elif literal in by_literal:
+                self._literal_rules[by_literal[literal]].append(index)
+            else:
+                by_literal[literal] = self._literals.add(literal)
+                self._literal_rules.append([index])
+        self._literals.build()
+
+    def candidates(self, text: str) -> list:
+        """Indexes of the rules that can match text (a superset of the actual matches)."""
+        indexes = set(self._always)
+        if self._literal_rules:
+            for entry_id in self._literals.first_matches(text.lower()):
+                indexes.update(self._literal_rules[entry_id])
+        return sorted(indexes)
+
+    def matches(self, text: str) -> list:
+        """Rules whose pattern occurs anywhere in text, in rule order."""
+        return [self.rules[i] for i in self.candidates(text) if self._regexes[i].search(text)]
+
+    def __len__(self):
+        return len(self.rules)
+
+
+def _required_literal(pattern: str):
+    """
+    Longest run of literal characters every match of pattern must contain
+    (lowercased, for a case-insensitive prefilter), or None if there is none.
+    """
+    runs = []
+
+    def walk(items):
+        run = []
+        for op, arg in items:
+            if op is sre_constants.LITERAL:
+                run.append(chr(arg))
+                continue
+            if run:
+                runs.append("".join(run))
+                run = []
+            if op is sre_constants.SUBPATTERN:
+                walk(arg[-1])
+            elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT) and arg[0] >= 1:
+                walk(arg[2])
+        if run:
+            runs.append("".join(run))
+
+    walk(sre_parse.parse(pattern))
+    return max(runs, key=len).lower() if runs else None
+
+
+class RulePack:
+    """Compiled, immutable view of one rule-pack file."""
+
+    def __init__(self, data: dict, source: str = None):
+        self.source = source
+        self.version = data.get("version")
+        self.loaded_at = time.time()
+        self._compile_text(data.get("text", {}))
+        self._compile_url(data.get("url", {}))
+        self._compile_company(data.get("company", {}))
+
+    # ----- Text -----
+    def _compile_text(self, text: dict):
+        automaton = KeywordAutomaton()
+        rank = 0
+        for severity, group in text.get("keywords", {}).items():
+            for phrase in group.get("phrases", []):
+                automaton.add(phrase.lower(), {
+                    "kind": "keyword",
+                    "severity": severity,
+                    "impact": int(group["impact"]),
+                    "icon": group.get("icon"),
+                    "rank": rank
+                })
+                rank += 1
+
+        self.contact_rules = text.get("contact_rules", [])
+        for index, rule in enumerate(self.contact_rules):
+            for role in ("phrases", "unless"):
+                for phrase in rule.get(role, []):
+                    automaton.add(phrase.lower(), {"kind": "contact", "rule": index, "role": role, "rank": rank})
+                    rank += 1
+
+        self.text_automaton = automaton.build()
+        self.salary_patterns = RegexSet(text.get("salary_patterns", []))
+        self.min_length = text.get("min_length")
+
+    # ----- URL -----
+    def _compile_url(self, url: dict):
+        trusted = url.get("trusted_domains", {})
+        self.trusted_score = int(trusted.get("score", 0))
+        self.trusted_domains = {d.lower().lstrip("."): d for d in trusted.get("domains", [])}
+
+        tlds = url.get("suspicious_tlds", {})
+        self.suspicious_tld_score = int(tlds.get("score", 0))
+        self.suspicious_tlds = {t.lower() if t.startswith(".") else "." + t.lower() for t in tlds.get("tlds", [])}
+
+        shorteners = url.get("shorteners", {})
+        self.shortener_score = int(shorteners.get("score", 0))
+        self.shortener_automaton = KeywordAutomaton()
+        for term in shorteners.get("terms", []):
+            self.shortener_automaton.add(term.lower())
+        self.shortener_automaton.build()
+
+        self.url_patterns = RegexSet(url.get("scam_patterns", []))
+
+    def trusted_domain(self, host: str):
+        """Trusted entry matching host or one of its parent domains, else None."""
+        host = (host or "").lower()
+        while host:
+            if host in self.trusted_domains:
+                return self.trusted_domains[host]
+            _, _, host = host.partition(".")
+        return None
+
+    def has_shortener(self, url_lower: str) -> bool:
+        return next(self.shortener_automaton.iter_matches(url_lower), None) is not None
+
+    # ----- Company -----
+    def _compile_company(self, company: dict):
+        self.company_patterns = RegexSet(company.get("suspicious_patterns", []))
+
+    def get_stats(self) -> dict:
+        return {
+            "version": self.version,
+            "source": self.source,
+            "loaded_at": self.loaded_at,
+            "text_phrases": len(self.text_automaton),
+            "salary_patterns": len(self.salary_patterns),
+            "trusted_domains": len(self.trusted_domains),
+            "suspicious_tlds": len(self.suspicious_tlds),
+            "shorteners": len(self.shortener_automaton),
+            "url_patterns": len(self.url_patterns),
+            "company_patterns": len(self.company_patterns)
+        }
+
+
+def load_rule_pack(path: str) -> RulePack:
+    with open(path, encoding="utf-8") as f:
+        return RulePack(json.load(f), source=path)
+
+
+class RuleEngine:
+    """
+    Holds the active RulePack and swaps in a new one when the file changes.
+
+    Readers call current() once per evaluation and use that pack throughout,
+    so a reload never mixes rules from two versions. A file that fails to
+    parse or compile is reported and the previous pack stays active.
+    """
+
+    def __init__(self, path: str = None, check_interval: float = None):
+        self.path = path or RULE_PACK_PATH
+        self.check_interval = RULE_PACK_CHECK_INTERVAL if check_interval is None else check_interval
+        self._lock = threading.Lock()
+        self._next_check = 0
+        self._mtime = None
+        self._stats = {"loads": 0, "reload_errors": 0, "last_error": None}
+        self._pack = self._load()
+
+    def _load(self) -> RulePack:
+        mtime = os.stat(self.path).st_mtime_ns
+        pack = load_rule_pack(self.path)
+        self._pack, self._mtime = pack, mtime
+        self._stats["loads"] += 1
+        return pack
+
+    def current(self) -> RulePack:
+        now = time.monotonic()
+        if now >= self._next_check and self._lock.acquire(blocking=False):
+            try:
+                self._next_check = now + self.check_interval
+                mtime = os.stat(self.path).st_mtime_ns
+                if mtime != self._mtime:
+                    self._mtime = mtime  # a broken file is retried only after it changes again
+                    self.reload()
+            except OSError as e:
+                self._record_error(e)
+            finally:
+                self._lock.release()
+        return self._pack
+
+    def reload(self) -> bool:
+        """Load the file now. Returns False (keeping the old pack) on error."""
+        try:
+            self._load()
+            print(f"[RULES] Loaded rule pack v{self._pack.version} from {self.path}")
+            return True
+        except Exception as e:
+            self._record_error(e)
+            return False
+
+    def _record_error(self, error: Exception):
+        self._stats["reload_errors"] += 1
+        self._stats["last_error"] = str(error)
+        print(f"[RULES] Keeping previous rule pack, reload failed: {error}")
+
+    def get_stats(self) -> dict:
+        stats = dict(self._stats)
+        stats.update(self._pack.get_stats())
+        return stats
+
+
+# Shared instance for the whole process
+rule_engine = RuleEngine()
+
+
+def get_rules() -> RulePack:
+    """The active rule pack (reloaded automatically when the file changes)."""
+    return rule_engine.current()
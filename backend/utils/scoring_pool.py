@@ -0,0 +1,108 @@
+"""
+Scoring Pool Module
+The one process pool per server process that scores batches for the parallel CSV scorer and background jobs.
+"""
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from .executors import SCORING_PROCESSES
+from .model_artifacts import load_model, MODEL_PATH, VECTORIZER_PATH
+from .batch_scoring import combine_text, score_texts, score_frame
+
+# Workers start from a clean interpreter (forkserver, or spawn where that is missing)
+# instead of a fork of the threaded server, and map the compiled model in their initializer
+SCORING_START_METHOD = os.getenv("SCORING_START_METHOD") or (
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+_pool = None
+_pool_pid = None
+_pool_sources = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+# ================= WORKER SIDE =================
+# Each pool process loads the model once in its initializer and keeps it for every task.
+# load_model memory-maps models/compiled when it is current, so the workers share those pages.
+_worker_model = None
+_worker_vectorizer = None
+
+
+def _init_worker(model_path: str, vectorizer_path: str):
+    global _worker_model, _worker_vectorizer
+    _worker_model, _worker_vectorizer = load_model(model_path, vectorizer_path)
+
+
+def score_worker_texts(texts):
+    """(labels, confidences%) with the worker's model; only valid inside a pool process."""
+    return score_texts(texts, _worker_model, _worker_vectorizer)
+
+
+def score_shard(frame):
+    return score_worker_texts(combine_text(frame))
+
+
+def score_chunk(frame):
+    return score_frame(frame, _worker_model, _worker_vectorizer)
+
+
+# ================= POOL =================
+
+def get_scoring_pool(model_path: str = MODEL_PATH, vectorizer_path: str = VECTORIZER_PATH,
+                     workers: int = None) -> ProcessPoolExecutor:
+    """
+    Return this process's scoring pool, creating it on first use. The first
+    caller fixes the model and the worker count (default SCORING_PROCESSES);
+    workers are started on demand.
+    """
+    global _pool, _pool_pid, _pool_sources, _pool_workers
+    with _pool_lock:
+        # A pool inherited through fork (e.g. gunicorn --preload) belongs to the parent
+        if _pool is not None and _pool_pid == os.getpid():
+            if _pool_sources != (model_path, vectorizer_path):
+                raise ValueError(f"The scoring pool already serves {_pool_sources[0]}")
+            return _pool
+        context = multiprocessing.get_context(SCORING_START_METHOD)
+        if SCORING_START_METHOD == "forkserver":
+            # The fork server imports only the scoring code, not the app that started it
+            context.set_forkserver_preload([__name__])
+        _pool_workers = max(1, workers or SCORING_PROCESSES)
+        _pool = ProcessPoolExecutor(
+            max_workers=_pool_workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(model_path, vectorizer_path)
+        )
+        _pool_pid = os.getpid()
+        _pool_sources = (model_path, vectorizer_path)
+        return _pool
+
+
+def discard_scoring_pool(pool: ProcessPoolExecutor):
+    """Drop a broken pool so the next get_scoring_pool() starts a fresh one."""
+    global _pool
+    with _pool_lock:
+        if _pool is not pool:
+            return  # another caller already replaced it
+        _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_scoring_pool():
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None and _pool_pid == os.getpid():
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def get_scoring_pool_stats() -> dict:
+    started = _pool is not None and _pool_pid == os.getpid()
+    return {
+        "start_method": SCORING_START_METHOD,
+        "started": started,
+        "workers": _pool_workers if started else 0
+    }
@@ -5,8 +5,7 @@ import re
 import json
 from urllib.parse import urlparse
 
-# Global client for connection pooling
-async_client = httpx.AsyncClient(
+CLIENT_OPTIONS = dict(
     timeout=httpx.Timeout(15.0),
     headers={
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
@@ -16,12 +15,21 @@ async_client = httpx.AsyncClient(
     follow_redirects=True
 )
 
-async def scrape_job_details(url):
+# Global client for connection pooling
+async_client = httpx.AsyncClient(**CLIENT_OPTIONS)
+
+
+def new_client() -> httpx.AsyncClient:
+    """A separate client for code running outside the server's event loop (e.g. job workers)."""
+    return httpx.AsyncClient(**CLIENT_OPTIONS)
+
+
+async def scrape_job_details(url, client: httpx.AsyncClient = None):
     """
     Next Level: Asynchronous Scraper for high-performance job extraction.
     """
     try:
-        response = await async_client.get(url)
+        response = await (client or async_client).get(url)
         response.raise_for_status()
         
         soup = BeautifulSoup(response.text, 'html.parser')
@@ -0,0 +1,204 @@
+"""
+Write-Behind Queue Module
+Request handlers enqueue INSERT/UPDATE statements; one writer thread commits them in groups.
+"""
+import os
+import time
+import queue
+import asyncio
+import threading
+
+# A group is committed once it holds this many statements or its oldest one is this old
+WRITE_QUEUE_BATCH_SIZE = int(os.getenv("WRITE_QUEUE_BATCH_SIZE", "200"))
+WRITE_QUEUE_FLUSH_MS = float(os.getenv("WRITE_QUEUE_FLUSH_MS", "50"))
+# Backpressure: callers wait for room once this many statements are pending...
+WRITE_QUEUE_MAX_DEPTH = int(os.getenv("WRITE_QUEUE_MAX_DEPTH", "10000"))
+# ...and give up after this long
+WRITE_QUEUE_PUT_TIMEOUT_MS = float(os.getenv("WRITE_QUEUE_PUT_TIMEOUT_MS", "2000"))
+
+_STOP = object()
+
+
+class WriteQueueFullError(RuntimeError):
+    """Raised when the queue stayed full for the whole put timeout."""
+
+
+class WriteBehindQueue:
+    """
+    Group-commit writer in front of a ConnectionManager.
+
+    submit()/enqueue() return as soon as the statement is queued. The writer
+    thread takes the first pending statement, keeps collecting until the group
+    is full or WRITE_QUEUE_FLUSH_MS has passed, and runs the whole group in one
+    transaction, so N inserts cost one fsync instead of N lock round-trips.
+    If a group fails it is retried statement by statement so one bad row
+    does not drop the rest.
+    """
+
+    def __init__(self, db, batch_size: int = None, flush_ms: float = None, max_depth: int = None):
+        self.db = db
+        self.batch_size = max(1, batch_size or WRITE_QUEUE_BATCH_SIZE)
+        self.flush_interval = (WRITE_QUEUE_FLUSH_MS if flush_ms is None else flush_ms) / 1000.0
+        self.max_depth = max(1, max_depth or WRITE_QUEUE_MAX_DEPTH)
+        self._queue = queue.Queue(maxsize=self.max_depth)
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._pid = os.getpid()
+        self._stats = {
+            "enqueued": 0,
+            "committed": 0,
+            "failed": 0,
+            "batches": 0,
+            "max_batch_size_seen": 0,
+            "backpressure_waits": 0,
+            "rejected": 0,
+            "last_commit_ms": 0.0
+        }
+
+    def _ensure_writer(self):
+        if os.getpid() != self._pid:
+            # The writer thread does not survive a fork
+            self._pid = os.getpid()
+            self._queue = queue.Queue(maxsize=self.max_depth)
+            self._thread = None
+        if self._thread is None or not self._thread.is_alive():
+            with self._start_lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name=f"{self.db.name}-writer", daemon=True)
+                    self._thread.start()
+
+    # ----- Producers -----
+    def submit(self, sql: str, params=(), many: bool = False):
+        """Queue one statement (or an executemany batch). Blocks only while the queue is full."""
+        item = (sql, params, many)
+        if self._put_nowait(item):
+            return
+        self._stats["backpressure_waits"] += 1
+        try:
+            self._queue.put(item, timeout=WRITE_QUEUE_PUT_TIMEOUT_MS / 1000)
+        except queue.Full:
+            self._stats["rejected"] += 1
+            raise WriteQueueFullError(f"{self.db.name} write queue full ({self.max_depth} pending)")
+        self._stats["enqueued"] += 1
+
+    async def enqueue(self, sql: str, params=(), many: bool = False):
+        """submit() for the event loop: waits for room on a worker thread instead of blocking the loop."""
+        if not self._put_nowait((sql, params, many)):
+            await asyncio.get_running_loop().run_in_executor(None, self.submit, sql, params, many)
+
+    def _put_nowait(self, item) -> bool:
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            return False
+        self._stats["enqueued"] += 1
+        return True
+
+    # ----- Writer -----
+    def _run(self):
+        pending = self._queue
+        while True:
+            item = pending.get()
+            if item is _STOP:
+                pending.task_done()
+                return
+            batch = [item]
+            stop = False
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = pending.get(timeout=remaining) if remaining > 0 else pending.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+
+            self._commit(batch)
+            for _ in range(len(batch) + stop):
+                pending.task_done()
+            if stop:
+                return
+
+    def _commit(self, batch):
+        start = time.perf_counter()
+        try:
+            with self.db.writer() as conn:
+                for sql, params, many in batch:
+                    (conn.executemany if many else conn.execute)(sql, params)
+            self._stats["committed"] += len(batch)
+        except Exception as e:
+            print(f"[WRITE QUEUE] {self.db.name} group of {len(batch)} failed ({e}); retrying one by one")
+            for sql, params, many in batch:
+                try:
+                    with self.db.writer() as conn:
+                        (conn.executemany if many else conn.execute)(sql, params)
+                    self._stats["committed"] += 1
+                except Exception as row_error:
+                    self._stats["failed"] += 1
+                    print(f"[WRITE QUEUE] {self.db.name} dropped statement: {row_error}")
+        self._stats["batches"] += 1
+        self._stats["max_batch_size_seen"] = max(self._stats["max_batch_size_seen"], len(batch))
+        self._stats["last_commit_ms"] = round((time.perf_counter() - start) * 1000, 2)
+
+    # ----- Lifecycle -----
+    def flush(self, timeout: float = None) -> bool:
+        """Wait until everything queued so far is committed. Returns False on timeout."""
+        if self._thread is None or not self._thread.is_alive():
+            return self._queue.unfinished_tasks == 0
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def close(self, timeout: float = 30.0):
+        """Commit everything still queued and stop the writer (called on shutdown)."""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def get_stats(self) -> dict:
+        stats = dict(self._stats)
+        stats["avg_batch_size"] = round(stats["committed"] / stats["batches"], 2) if stats["batches"] else 0
+        stats.update({
+            "depth": self._queue.qsize(),
+            "max_depth": self.max_depth,
+            "batch_size": self.batch_size,
+            "flush_ms": self.flush_interval * 1000,
+            "writer_alive": self._thread is not None and self._thread.is_alive()
+        })
+        return stats
+
+
+_queues = {}
+_queues_lock = threading.Lock()
+
+
+def get_write_queue(db) -> WriteBehindQueue:
+    """Return the shared write-behind queue for a ConnectionManager."""
+    write_queue = _queues.get(db.db_path)
+    if write_queue is None:
+        with _queues_lock:
+            write_queue = _queues.get(db.db_path)
+            if write_queue is None:
+                write_queue = _queues[db.db_path] = WriteBehindQueue(db)
+    return write_queue
+
+
+def get_write_queue_stats() -> dict:
+    return {write_queue.db.name: write_queue.get_stats() for write_queue in list(_queues.values())}
+
+
+def close_all_queues(timeout: float = 30.0):
+    """Flush and stop every writer thread."""
+    for write_queue in list(_queues.values()):
+        write_queue.close(timeout)